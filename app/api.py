@@ -0,0 +1,240 @@
+"""Async HTTP service exposing search, structured Q&A and contract analysis.
+
+Run with several worker processes behind a load balancer:
+
+    uvicorn api:app --app-dir app --host 0.0.0.0 --port 8000 --workers 4
+
+or ``python app/api.py`` (uses the API_* settings).
+
+Endpoints:
+    POST /search           {"query": str, "limit": int, "metadata_filter": {...}}
+    POST /qa               {"question": str, "filename": str}
+    POST /ask              {"question": str}  (aggregate questions via SQL, others via RAG)
+    POST /analyze          raw PDF body, ?file_name=contract.pdf
+    GET  /healthz          liveness
+    GET  /readyz           database reachability
+    GET  /metrics          per-worker request counters, latencies and pool utilization
+"""
+
+import asyncio
+import statistics
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+
+from config.settings import get_settings
+from database.connection_pool import get_pool, pool_metrics
+from database.vector_store import get_vector_store
+from services.analysis import EmptyDocumentError, analyze_pdf
+from services.deadline import Deadline, DeadlineExceeded, get_latency_tracker
+from services.qa import answer_structured_question
+from services.query_router import answer_question
+from services.prompt_cache import get_prompt_cache
+from services.semantic_cache import get_answer_cache
+
+settings = get_settings()
+app = FastAPI(title="Compliance Checker API")
+
+_request_slots = asyncio.Semaphore(settings.api.max_concurrency)
+_analysis_slots = asyncio.Semaphore(settings.api.max_concurrent_analyses)
+_latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+_counters: Dict[str, int] = defaultdict(int)
+_in_flight = 0
+
+
+class SearchRequest(BaseModel):
+    query: str
+    limit: int = Field(default=5, ge=1, le=100)
+    metadata_filter: Optional[Dict[str, Any]] = None
+
+
+class AskRequest(BaseModel):
+    question: str
+
+
+class QARequest(BaseModel):
+    question: str
+    filename: str
+
+
+async def _run_blocking(name: str, fn: Callable[[], Any], timeout: float, slots: asyncio.Semaphore) -> Any:
+    """Run a blocking pipeline call in a thread under a concurrency limit and a timeout.
+
+    Time spent waiting for a slot counts against the timeout. On timeout the
+    client gets a 504; the worker thread finishes in the background and keeps
+    its slot until then, so timeouts cannot push the load past the limit.
+    """
+    start_time = time.time()
+    _counters[f"{name}_requests"] += 1
+
+    def release(task: asyncio.Future) -> None:
+        global _in_flight
+        _in_flight -= 1
+        slots.release()
+        if not task.cancelled():
+            task.exception()  # retrieved here when the request already timed out
+
+    async def guarded() -> Any:
+        global _in_flight
+        await slots.acquire()
+        _in_flight += 1
+        task = asyncio.ensure_future(asyncio.to_thread(fn))
+        task.add_done_callback(release)
+        # Shielded: a timeout cancels only this wait, not the task holding the slot
+        return await asyncio.shield(task)
+
+    try:
+        return await asyncio.wait_for(guarded(), timeout)
+    except DeadlineExceeded as e:
+        _counters[f"{name}_deadline_exceeded"] += 1
+        raise HTTPException(status_code=504, detail=str(e))
+    except asyncio.TimeoutError:
+        _counters[f"{name}_timeouts"] += 1
+        raise HTTPException(status_code=504, detail=f"{name} timed out after {timeout:.0f}s")
+    except HTTPException:
+        raise
+    except Exception as e:
+        _counters[f"{name}_errors"] += 1
+        raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {e}")
+    finally:
+        _latencies[name].append(time.time() - start_time)
+
+
+def _deadline(timeout: float) -> Deadline:
+    """Deadline that expires shortly before the request's timeout, leaving time to respond."""
+    return Deadline(max(1.0, timeout - settings.latency.deadline_margin_seconds))
+
+
+def _search(request: SearchRequest, deadline: Deadline) -> List[dict]:
+    df = get_vector_store().search(
+        request.query,
+        limit=request.limit,
+        metadata_filter=request.metadata_filter,
+        deadline=deadline,
+    )
+    df = df.drop(columns=["embedding"], errors="ignore")
+    # Metadata keys missing from some rows (e.g. duplicate_of) expand to NaN, which JSON can't encode
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
+
+
+@app.post("/search")
+async def search(request: SearchRequest) -> dict:
+    deadline = _deadline(settings.api.request_timeout)
+    results = await _run_blocking(
+        "search", lambda: _search(request, deadline), settings.api.request_timeout, _request_slots
+    )
+    return {"results": results}
+
+
+@app.post("/qa")
+async def qa(request: QARequest) -> dict:
+    deadline = _deadline(settings.api.request_timeout)
+    structured = await _run_blocking(
+        "qa",
+        lambda: answer_structured_question(get_vector_store(), request.question, request.filename, deadline),
+        settings.api.request_timeout,
+        _request_slots,
+    )
+    if structured is None:
+        raise HTTPException(status_code=422, detail="Question does not match a supported structured field")
+    return {
+        "label": structured.label,
+        "answer": structured.answer,
+        "supporting": structured.supporting,
+        "cached": structured.cached,
+    }
+
+
+@app.post("/ask")
+async def ask(request: AskRequest) -> dict:
+    deadline = _deadline(settings.api.request_timeout)
+    response = await _run_blocking(
+        "ask",
+        lambda: answer_question(get_vector_store(), request.question, deadline=deadline),
+        settings.api.request_timeout,
+        _request_slots,
+    )
+    return {
+        "answer": response.answer,
+        "thought_process": response.thought_process,
+        "enough_context": response.enough_context,
+    }
+
+
+@app.post("/analyze")
+async def analyze(request: Request, file_name: str = Query(...)) -> dict:
+    deadline = _deadline(settings.api.analyze_timeout)
+    data = await request.body()
+    if not data:
+        raise HTTPException(status_code=400, detail="Request body must be the PDF file")
+
+    def run() -> Any:
+        try:
+            return analyze_pdf(data, file_name, get_vector_store(), deadline)
+        except EmptyDocumentError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    result = await _run_blocking("analyze", run, settings.api.analyze_timeout, _analysis_slots)
+    return {
+        "file_name": result.file_name,
+        "report": result.report,
+        "sufficient_context": result.sufficient_context,
+        "elapsed_seconds": round(result.elapsed_seconds, 3),
+        "degraded": result.degraded,
+        "cached": result.cached,
+    }
+
+
+@app.get("/healthz")
+async def healthz() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz() -> dict:
+    def check() -> None:
+        with get_pool().connection() as conn:
+            conn.execute("SELECT 1")
+
+    await _run_blocking("readyz", check, 5.0, _request_slots)
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def metrics() -> dict:
+    latency = {}
+    for name, values in _latencies.items():
+        ordered = sorted(values)
+        if ordered:
+            latency[name] = {
+                "count": len(ordered),
+                "p50": round(statistics.median(ordered), 4),
+                "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 4),
+                "max": round(ordered[-1], 4),
+            }
+    return {
+        "in_flight": _in_flight,
+        "counters": dict(_counters),
+        "latency_seconds": latency,
+        "hedged_calls": dict(get_latency_tracker().hedges),
+        "answer_cache": get_answer_cache().stats() if get_answer_cache.cache_info().currsize else {},
+        "prompt_cache": get_prompt_cache().stats() if get_prompt_cache.cache_info().currsize else {},
+        "db_pool": pool_metrics(),
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "api:app",
+        app_dir=str(Path(__file__).resolve().parent),
+        host=settings.api.host,
+        port=settings.api.port,
+        workers=settings.api.workers,
+    )
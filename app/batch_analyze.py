@@ -0,0 +1,158 @@
+"""Headless batch compliance analysis over a directory or manifest of PDFs.
+
+Runs the same extraction -> retrieval -> Synthesizer -> generate_fallback_report
+pipeline as multiple.py, without Streamlit. Results are appended to a JSONL file
+that doubles as the checkpoint: re-running with the same output skips documents
+that already completed successfully.
+
+Usage:
+    python app/batch_analyze.py contracts/ --output reports/batch.jsonl --workers 8
+    python app/batch_analyze.py manifest.txt --executor process --pdf-dir reports/batch
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Set
+
+from config.settings import get_settings
+from database.vector_store import get_vector_store
+from services.analysis import analyze_pdf
+
+
+def collect_inputs(source: Path, pattern: str) -> List[Path]:
+    """List PDFs in a directory (recursively) or the paths listed one per line in a manifest file."""
+    if source.is_dir():
+        return sorted(p for p in source.rglob(pattern) if p.is_file())
+    base = source.parent
+    paths = []
+    for line in source.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            path = Path(line)
+            paths.append(path if path.is_absolute() else base / path)
+    return paths
+
+
+def load_completed(output: Path) -> Set[str]:
+    """Return the paths that already have a successful result in the output JSONL."""
+    completed = set()
+    if not output.exists():
+        return completed
+    with output.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line from an interrupted run
+            if record.get("status") == "ok":
+                completed.add(record["path"])
+    return completed
+
+
+def process_document(path: str) -> dict:
+    """Analyze one PDF; never raises so one bad file doesn't stop the batch."""
+    start_time = time.time()
+    record = {"path": path, "file_name": Path(path).name}
+    try:
+        data = Path(path).read_bytes()
+        record["sha256"] = hashlib.sha256(data).hexdigest()
+        result = analyze_pdf(data, record["file_name"], get_vector_store())
+        record.update(
+            status="ok",
+            report=result.report,
+            sufficient_context=result.sufficient_context,
+            degraded=result.degraded,
+            cached=result.cached,
+        )
+    except Exception as e:
+        logging.exception(f"Failed to analyze {path}")
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed_seconds"] = round(time.time() - start_time, 3)
+    record["completed_at"] = datetime.now(timezone.utc).isoformat()
+    return record
+
+
+def print_summary(records: List[dict], skipped: int, wall_seconds: float) -> None:
+    ok = [r for r in records if r["status"] == "ok"]
+    failed = len(records) - len(ok)
+    latencies = sorted(r["elapsed_seconds"] for r in records)
+    degraded = sum(1 for r in ok if r.get("degraded"))
+    cached = sum(1 for r in ok if r.get("cached"))
+    print(f"Processed {len(records)} documents in {wall_seconds:.1f}s ({len(ok)} ok, {failed} failed, {skipped} skipped from checkpoint)")
+    if cached:
+        print(f"{cached} reports were reused from the analysis store")
+    if degraded:
+        print(f"{degraded} reports fell back to the heuristic analysis after exceeding the time budget")
+    if records:
+        print(f"Throughput: {len(records) / max(wall_seconds, 1e-9):.2f} documents/s")
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        print(f"Latency per document: p50 {statistics.median(latencies):.2f}s, p95 {p95:.2f}s, max {latencies[-1]:.2f}s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Batch compliance analysis of contract PDFs")
+    parser.add_argument("source", type=Path, help="Directory of PDFs or a manifest file listing PDF paths")
+    parser.add_argument("--output", type=Path, default=Path("reports/batch_results.jsonl"))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--pdf-dir", type=Path, help="Also write a PDF report per document into this directory")
+    parser.add_argument("--pattern", default="*.pdf", help="Glob used when source is a directory")
+    parser.add_argument("--limit", type=int, help="Process at most this many pending documents")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    missing_env = [
+        name for name, value in (
+            ("GOOGLE_API_KEY", settings.google_gemini.api_key),
+            ("TIMESCALE_SERVICE_URL", settings.database.service_url),
+        ) if not value
+    ]
+    if missing_env:
+        print(f"Missing required environment variables: {', '.join(missing_env)}")
+        return 2
+
+    inputs = [str(p) for p in collect_inputs(args.source, args.pattern)]
+    completed = load_completed(args.output)
+    pending = [p for p in inputs if p not in completed]
+    skipped = len(inputs) - len(pending)
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    print(f"{len(inputs)} documents found, {len(pending)} to process")
+
+    renderer = None
+    if args.pdf_dir:
+        from services.reports import get_report_renderer
+
+        renderer = get_report_renderer()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    executor_cls = ProcessPoolExecutor if args.executor == "process" else ThreadPoolExecutor
+    records = []
+    start_time = time.time()
+    with args.output.open("a", encoding="utf-8") as out, executor_cls(max_workers=args.workers) as executor:
+        futures = [executor.submit(process_document, path) for path in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            if renderer is not None and record["status"] == "ok":
+                record["pdf_report"] = str(renderer.save(record["report"], record["file_name"], args.pdf_dir))
+            out.write(json.dumps(record) + "\n")
+            out.flush()  # each line is a checkpoint
+            records.append(record)
+            if len(records) % 50 == 0:
+                rate = len(records) / max(time.time() - start_time, 1e-9)
+                print(f"{len(records)}/{len(pending)} done ({rate:.2f} documents/s)")
+
+    print_summary(records, skipped, time.time() - start_time)
+    return 0 if all(r["status"] == "ok" for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
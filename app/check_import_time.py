@@ -0,0 +1,121 @@
+"""Import-time budget check for the app packages.
+
+Runs ``python -X importtime`` in a fresh interpreter, importing the modules that
+the Streamlit apps load before rendering the first widget, and fails when the
+cumulative import time exceeds the budget or a heavy dependency is pulled in
+eagerly.
+
+Usage:
+    python app/check_import_time.py
+    python app/check_import_time.py --budget-ms 250 --runs 5
+"""
+
+import argparse
+import ast
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Streamlit entry points whose module-level imports are measured
+ENTRY_POINTS = ["main.py", "multiple.py"]
+
+
+def entry_point_modules() -> list[str]:
+    """App modules imported at module level by ENTRY_POINTS (streamlit and stdlib excluded).
+
+    Read from the entry points' source, so modules added there later are
+    measured without updating this script.
+    """
+    modules: set[str] = set()
+    for entry_point in ENTRY_POINTS:
+        tree = ast.parse((APP_DIR / entry_point).read_text(encoding="utf-8"))
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                modules.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules.add(node.module)
+    # Only the app's own packages; third-party and stdlib imports are covered through them
+    return sorted(m for m in modules if (APP_DIR / m.split(".")[0]).is_dir())
+
+
+CHECKED_MODULES = entry_point_modules()
+
+# Dependencies that must only be imported on first use
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "PyPDF2",
+    "reportlab",
+    "google.generativeai",
+    "timescale_vector",
+    "psycopg",
+    "psycopg2",
+    "torch",
+    "transformers",
+    "sentence_transformers",
+]
+
+
+def measure_once() -> tuple[float, set[str]]:
+    """Import CHECKED_MODULES in a fresh interpreter.
+
+    Returns:
+        The cumulative import time in milliseconds and the set of imported
+        top-level package names.
+    """
+    code = "; ".join(f"import {m}" for m in CHECKED_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{proc.stderr}")
+
+    total_us = 0
+    imported: set[str] = set()
+    for line in proc.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        imported.add(name.strip())
+        # Top-level entries (no leading indentation) carry the full cumulative cost
+        if not line.split("|")[2].startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000.0, imported
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Median cumulative import budget")
+    parser.add_argument("--runs", type=int, default=3, help="Number of fresh interpreters to measure")
+    args = parser.parse_args()
+
+    timings = []
+    eager: set[str] = set()
+    for _ in range(args.runs):
+        elapsed_ms, imported = measure_once()
+        timings.append(elapsed_ms)
+        eager |= {m for m in HEAVY_MODULES if m in imported}
+
+    median_ms = statistics.median(timings)
+    print(f"Import time (median of {args.runs}): {median_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    ok = True
+    if eager:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(sorted(eager))}")
+        ok = False
+    if median_ms > args.budget_ms:
+        print("FAIL: import-time budget exceeded")
+        ok = False
+    if ok:
+        print("OK")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
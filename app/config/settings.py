@@ -2,7 +2,7 @@ import logging
 import os
 from datetime import timedelta
 from functools import lru_cache
-from typing import Optional
+from typing import List, Optional
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -14,6 +14,12 @@ _ENV_PATH = os.path.join(_PROJECT_ROOT, ".env")
 load_dotenv(dotenv_path=_ENV_PATH)
 
 
+def _env_days(name: str) -> Optional[timedelta]:
+	"""Read an optional number of days from the environment as a timedelta."""
+	value = os.getenv(name)
+	return timedelta(days=float(value)) if value else None
+
+
 def setup_logging():
 	"""Configure basic logging for the application."""
 	logging.basicConfig(
@@ -37,26 +43,268 @@ class GoogleGeminiSettings(LLMSettings):
 	embedding_model: str = Field(default="text-embedding-004")
 
 
+class EmbeddingSettings(BaseModel):
+	"""Settings for the embedding provider and how embedding requests are dispatched."""
+
+	# "google_gemini" (API) or "local" (sentence-transformers model on CPU)
+	provider: str = Field(default_factory=lambda: os.getenv("EMBEDDING_PROVIDER", "google_gemini"))
+	# Directory of a locally stored sentence-transformers model, required for the local provider
+	local_model_path: Optional[str] = Field(default_factory=lambda: os.getenv("LOCAL_EMBEDDING_MODEL_PATH"))
+	# "torch" or "onnx" (needs optimum[onnxruntime])
+	local_backend: str = Field(default_factory=lambda: os.getenv("LOCAL_EMBEDDING_BACKEND", "torch"))
+	# ONNX file inside the model directory, e.g. onnx/model_qint8_avx512.onnx for int8 weights
+	local_onnx_file: Optional[str] = Field(default_factory=lambda: os.getenv("LOCAL_EMBEDDING_ONNX_FILE"))
+	local_batch_size: int = Field(default_factory=lambda: int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32")))
+	# Threads that tokenize upcoming batches while the model runs the current one
+	tokenizer_workers: int = 2
+	# torch intra-op threads (None keeps torch's default)
+	local_num_threads: Optional[int] = Field(
+		default_factory=lambda: int(os.getenv("LOCAL_EMBEDDING_THREADS")) if os.getenv("LOCAL_EMBEDDING_THREADS") else None
+	)
+	# Coalesce concurrent get_embedding calls into batched embed_content calls
+	batching_enabled: bool = Field(
+		default_factory=lambda: os.getenv("EMBEDDING_BATCHING", "false").lower() in ("1", "true", "yes")
+	)
+	# How long to wait for more requests after the first one arrives
+	batch_window_ms: float = Field(default_factory=lambda: float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5")))
+	# Texts per batched call (the Gemini API accepts up to 100)
+	max_batch_size: int = Field(default_factory=lambda: int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "100")))
+	max_in_flight_batches: int = 4
+
+
+class DedupSettings(BaseModel):
+	"""Near-duplicate detection during ingestion (insert_vectors.py)."""
+
+	# "report" (detect only), "skip" (don't store duplicates), "link" (store them with the
+	# canonical row's embedding) or "diff" (embed only the lines that differ from the canonical row)
+	policy: str = Field(default_factory=lambda: os.getenv("DEDUP_POLICY", "report"))
+	# Estimated Jaccard similarity of word shingles above which rows are near-duplicates
+	threshold: float = Field(default_factory=lambda: float(os.getenv("DEDUP_THRESHOLD", "0.85")))
+	num_perm: int = 128
+	shingle_size: int = 5
+
+
+class DocumentSettings(BaseModel):
+	"""Settings for page-streaming PDF text extraction (services.pdf_document)."""
+
+	# Extracted text above this size is moved to a temporary file instead of memory
+	spill_threshold_bytes: int = Field(
+		default_factory=lambda: int(os.getenv("PDF_SPILL_THRESHOLD_BYTES", str(8 * 1024 * 1024)))
+	)
+	# Pages per window when scanning a document
+	window_pages: int = 8
+
+
 class DatabaseSettings(BaseModel):
-	"""Database connection settings."""
+	"""Database connection settings.
+
+	pool_max_size caps the process's connections in total. The timescale_vector
+	client (predicate searches, upserts, DDL, deletes) keeps its own psycopg2
+	connections and gets vec_client_max_connections of them; the shared
+	psycopg pool, which serves every other query including the default ANN
+	search, gets the rest (at least one).
+	"""
 
 	service_url: str = Field(default_factory=lambda: os.getenv("TIMESCALE_SERVICE_URL"))
+	# Shared connection pool used by every VectorStore in the process
+	pool_min_size: int = Field(default_factory=lambda: int(os.getenv("DB_POOL_MIN_SIZE", "1")))
+	pool_max_size: int = Field(default_factory=lambda: int(os.getenv("DB_POOL_MAX_SIZE", "10")))
+	# Share of pool_max_size reserved for the timescale_vector client's own connections
+	vec_client_max_connections: int = Field(
+		default_factory=lambda: int(os.getenv("DB_VEC_CLIENT_MAX_CONNECTIONS", "2"))
+	)
+	# Seconds an idle connection above min_size is kept before being closed
+	pool_max_idle: float = 300.0
+	# Seconds to wait for a free connection before raising
+	pool_timeout: float = 30.0
+	# Server-side statement timeout applied to every pooled connection (0 disables)
+	statement_timeout_ms: int = Field(default_factory=lambda: int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")))
 
 
 class VectorStoreSettings(BaseModel):
 	"""Settings for the VectorStore."""
 
-	table_name: str = "embedding_1"
-	embedding_dimensions: int = 768
+	# Overridable so throwaway tables (e.g. load_test.py's) don't touch the real one
+	table_name: str = Field(default_factory=lambda: os.getenv("VECTOR_TABLE_NAME", "embedding_1"))
+	# Sent to the embedding call as output_dimensionality (e.g. 256, 384, 768); must match the table's vector(n)
+	embedding_dimensions: int = Field(default_factory=lambda: int(os.getenv("EMBEDDING_DIMENSIONS", "768")))
 	time_partition_interval: timedelta = timedelta(days=7)
+	# "float" (StreamingDiskANN on full vectors), "halfvec" or "binary" (quantized HNSW index + exact rescoring)
+	storage_mode: str = Field(default_factory=lambda: os.getenv("VECTOR_STORAGE_MODE", "float"))
+	# Quantized modes fetch limit * rescore_factor candidates before rescoring at full precision
+	rescore_factor: int = 4
+	# Hypertable lifecycle (None disables): compress chunks older than compress_after,
+	# drop chunks older than retention_after
+	compress_after: Optional[timedelta] = Field(default_factory=lambda: _env_days("VECTOR_COMPRESS_AFTER_DAYS"))
+	retention_after: Optional[timedelta] = Field(default_factory=lambda: _env_days("VECTOR_RETENTION_DAYS"))
+	# Searches without an explicit time_range only scan rows ingested within this horizon
+	default_search_horizon: Optional[timedelta] = Field(
+		default_factory=lambda: _env_days("VECTOR_SEARCH_HORIZON_DAYS")
+	)
+	# Metadata keys that get their own expression index (plus a GIN index on the whole column)
+	indexed_metadata_keys: List[str] = ["filename", "governing_law", "exact_law", "source"]
+	# Filtered searches matching at most this many rows use an exact scan instead of the ANN index
+	exact_scan_threshold: int = 5000
+	# Seconds a filter's row-count estimate is reused before it is recounted
+	selectivity_cache_ttl: float = 300.0
+
+
+class ProfilingSettings(BaseModel):
+	"""Settings for the opt-in per-request profiler used by the Streamlit apps."""
+
+	enabled: bool = Field(
+		default_factory=lambda: os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+	)
+	# Both modes write .collapsed (flame graph) and .pstats files. "sampling" is cheap enough to leave on
+	# in production and builds both from stack samples; "deterministic" writes cProfile's exact .pstats
+	mode: str = Field(default_factory=lambda: os.getenv("PROFILING_MODE", "sampling"))
+	# Fraction of button-triggered runs that get profiled (0.0 - 1.0)
+	sample_rate: float = Field(default_factory=lambda: float(os.getenv("PROFILING_SAMPLE_RATE", "1.0")))
+	# Seconds between stack samples in sampling mode
+	sample_interval: float = Field(default_factory=lambda: float(os.getenv("PROFILING_SAMPLE_INTERVAL", "0.005")))
+	output_dir: str = Field(
+		default_factory=lambda: os.getenv("PROFILING_OUTPUT_DIR", os.path.join(_PROJECT_ROOT, "reports", "profiles"))
+	)
+
+
+class ReportSettings(BaseModel):
+	"""Settings for background PDF report rendering."""
+
+	max_workers: int = 2
+	# Number of rendered reports (and zip exports) kept in memory
+	cache_size: int = 64
+
+
+class LatencySettings(BaseModel):
+	"""Deadline budgets and request hedging for embedding, search and completion calls."""
+
+	# Time budget of one contract analysis; on overrun it degrades to the heuristic report (0 disables)
+	analysis_budget_seconds: float = Field(
+		default_factory=lambda: float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "120"))
+	)
+	# Fire a duplicate call once the first exceeds this latency percentile (e.g. 95); unset disables hedging
+	hedge_percentile: Optional[float] = Field(
+		default_factory=lambda: float(os.getenv("HEDGE_PERCENTILE")) if os.getenv("HEDGE_PERCENTILE") else None
+	)
+	# Latency samples required per call type before hedging starts, and how many are kept
+	hedge_min_samples: int = 20
+	latency_window: int = 500
+	# Threads running deadline-bound and hedged calls
+	max_workers: int = 32
+	# Budget kept back from API timeouts so the degraded answer is returned before the 504
+	deadline_margin_seconds: float = 2.0
+
+
+class RerankerSettings(BaseModel):
+	"""Settings for reranking retrieved chunks before they are sent to the LLM."""
+
+	enabled: bool = Field(
+		default_factory=lambda: os.getenv("RERANKER", "true").lower() in ("1", "true", "yes")
+	)
+	# "hybrid" (BM25 + vector similarity) or "cross_encoder" (local sentence-transformers CrossEncoder)
+	method: str = Field(default_factory=lambda: os.getenv("RERANKER_METHOD", "hybrid"))
+	cross_encoder_path: Optional[str] = Field(default_factory=lambda: os.getenv("RERANKER_MODEL_PATH"))
+	# Rows retrieved before reranking, and the most passed on afterwards
+	candidates: int = Field(default_factory=lambda: int(os.getenv("RERANKER_CANDIDATES", "24")))
+	max_chunks: int = 6
+	# Chunks scoring below this are dropped (at least min_chunks are always kept)
+	min_score: float = Field(default_factory=lambda: float(os.getenv("RERANKER_MIN_SCORE", "0.35")))
+	min_chunks: int = 1
+	# Weight of the BM25 score in the hybrid score; the rest is cosine similarity
+	lexical_weight: float = 0.3
+
+
+class SectionAnalysisSettings(BaseModel):
+	"""Settings for map-reduce analysis of long contracts (Synthesizer.generate_sectioned_response)."""
+
+	enabled: bool = Field(
+		default_factory=lambda: os.getenv("ANALYSIS_MAP_REDUCE", "false").lower() in ("1", "true", "yes")
+	)
+	# Contracts with at most this many characters are analyzed with a single completion call
+	min_chars: int = 8000
+	section_chars: int = Field(default_factory=lambda: int(os.getenv("ANALYSIS_SECTION_CHARS", "12000")))
+	# Upper bound on completion calls per contract; later sections are left to the heuristic scan
+	max_sections: int = Field(default_factory=lambda: int(os.getenv("ANALYSIS_MAX_SECTIONS", "32")))
+	# Section calls in flight at once per analysis
+	max_concurrency: int = Field(default_factory=lambda: int(os.getenv("ANALYSIS_SECTION_CONCURRENCY", "4")))
+
+
+class AnalysisStoreSettings(BaseModel):
+	"""Settings for the persistent store of finished contract analyses."""
+
+	# Reuse stored reports for identical PDFs analyzed with the same pipeline version
+	enabled: bool = Field(
+		default_factory=lambda: os.getenv("ANALYSIS_CACHE", "true").lower() in ("1", "true", "yes")
+	)
+	table_name: str = "analysis_results"
+
+
+class AnswerCacheSettings(BaseModel):
+	"""Settings for the per-document semantic cache of Q&A answers."""
+
+	enabled: bool = Field(
+		default_factory=lambda: os.getenv("QA_CACHE", "true").lower() in ("1", "true", "yes")
+	)
+	# Cosine similarity above which a new question reuses a cached answer
+	similarity_threshold: float = Field(
+		default_factory=lambda: float(os.getenv("QA_CACHE_SIMILARITY", "0.92"))
+	)
+	ttl_seconds: float = Field(default_factory=lambda: float(os.getenv("QA_CACHE_TTL_SECONDS", "3600")))
+	max_entries_per_document: int = 256
+	# Documents with cached answers; the least recently used is dropped beyond this
+	max_documents: int = 512
+	# Seconds between checks of a document's stored rows for re-ingestion
+	fingerprint_ttl_seconds: float = 30.0
+
+
+class PromptCacheSettings(BaseModel):
+	"""Settings for provider-side caching of static system prompts."""
+
+	enabled: bool = Field(
+		default_factory=lambda: os.getenv("PROMPT_CACHE", "false").lower() in ("1", "true", "yes")
+	)
+	ttl_seconds: float = Field(default_factory=lambda: float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600")))
+	# Handles this close to expiry are extended before use
+	refresh_margin_seconds: float = 300.0
+	# After a failed create (unsupported model, prompt below the provider minimum), send inline this long
+	retry_after_seconds: float = 3600.0
+	# Shorter system prompts are always sent inline: roughly Gemini's minimum cached-content size
+	# (4,096 tokens) in characters, so prompts the provider would reject cost no create call
+	min_prefix_chars: int = Field(default_factory=lambda: int(os.getenv("PROMPT_CACHE_MIN_CHARS", "16000")))
+
+
+class ApiSettings(BaseModel):
+	"""Settings for the HTTP service (api.py)."""
+
+	host: str = Field(default_factory=lambda: os.getenv("API_HOST", "0.0.0.0"))
+	port: int = Field(default_factory=lambda: int(os.getenv("API_PORT", "8000")))
+	workers: int = Field(default_factory=lambda: int(os.getenv("API_WORKERS", "2")))
+	# Seconds before a request is answered with 504
+	request_timeout: float = 60.0
+	analyze_timeout: float = 180.0
+	# Concurrent requests per worker process; further requests wait for a slot
+	max_concurrency: int = 16
+	max_concurrent_analyses: int = 2
 
 
 class Settings(BaseModel):
 	"""Main settings class combining all sub-settings."""
 
 	google_gemini: GoogleGeminiSettings = Field(default_factory=GoogleGeminiSettings)
+	embedding: EmbeddingSettings = Field(default_factory=EmbeddingSettings)
+	dedup: DedupSettings = Field(default_factory=DedupSettings)
+	documents: DocumentSettings = Field(default_factory=DocumentSettings)
 	database: DatabaseSettings = Field(default_factory=DatabaseSettings)
 	vector_store: VectorStoreSettings = Field(default_factory=VectorStoreSettings)
+	profiling: ProfilingSettings = Field(default_factory=ProfilingSettings)
+	reports: ReportSettings = Field(default_factory=ReportSettings)
+	latency: LatencySettings = Field(default_factory=LatencySettings)
+	reranker: RerankerSettings = Field(default_factory=RerankerSettings)
+	sections: SectionAnalysisSettings = Field(default_factory=SectionAnalysisSettings)
+	analysis_store: AnalysisStoreSettings = Field(default_factory=AnalysisStoreSettings)
+	answer_cache: AnswerCacheSettings = Field(default_factory=AnswerCacheSettings)
+	prompt_cache: PromptCacheSettings = Field(default_factory=PromptCacheSettings)
+	api: ApiSettings = Field(default_factory=ApiSettings)
 
 
 @lru_cache()
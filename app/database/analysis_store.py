@@ -0,0 +1,129 @@
+import json
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Optional
+
+from config.settings import get_settings
+
+
+class AnalysisStore:
+	"""Finished contract analyses keyed by (document sha256, pipeline version).
+
+	The document hash is taken over the uploaded PDF bytes, so a repeat upload
+	skips extraction as well as retrieval and synthesis. The pipeline version
+	(see services.analysis.pipeline_version) changes with the prompt, models and
+	rubric, so entries from an older pipeline are simply never read again and
+	can be removed with prune().
+	"""
+
+	def __init__(self, table_name: str):
+		self.table_name = table_name
+		self._table_ready = False
+		self._lock = threading.Lock()
+
+	def _connect(self) -> Any:
+		from database.connection_pool import get_pool
+
+		return get_pool().connection()
+
+	def create_table(self) -> None:
+		"""Create the results table if it does not exist yet."""
+		with self._lock:
+			if self._table_ready:
+				return
+			with self._connect() as conn:
+				conn.execute(
+					f"CREATE TABLE IF NOT EXISTS {self.table_name} ("
+					"document_sha256 TEXT NOT NULL, "
+					"pipeline_version TEXT NOT NULL, "
+					"file_name TEXT, "
+					"report TEXT NOT NULL, "
+					"sufficient_context BOOLEAN NOT NULL, "
+					"artifacts JSONB, "
+					"elapsed_seconds DOUBLE PRECISION, "
+					"created_at TIMESTAMPTZ NOT NULL DEFAULT now(), "
+					"PRIMARY KEY (document_sha256, pipeline_version))"
+				)
+			self._table_ready = True
+
+	def get(self, document_sha256: str, version: str) -> Optional[dict]:
+		"""Return the stored row for the document and pipeline version, or None."""
+		self.create_table()
+		with self._connect() as conn:
+			row = conn.execute(
+				f"SELECT file_name, report, sufficient_context, artifacts, elapsed_seconds, created_at "
+				f"FROM {self.table_name} WHERE document_sha256 = %s AND pipeline_version = %s",
+				(document_sha256, version),
+			).fetchone()
+		if row is None:
+			return None
+		file_name, report, sufficient_context, artifacts, elapsed_seconds, created_at = row
+		return {
+			"file_name": file_name,
+			"report": report,
+			"sufficient_context": sufficient_context,
+			"artifacts": artifacts or {},
+			"elapsed_seconds": elapsed_seconds,
+			"created_at": created_at,
+		}
+
+	def put(
+		self,
+		document_sha256: str,
+		version: str,
+		file_name: str,
+		report: str,
+		sufficient_context: bool,
+		artifacts: dict,
+		elapsed_seconds: float,
+	) -> None:
+		"""Insert or replace the stored analysis for the document and pipeline version."""
+		self.create_table()
+		with self._connect() as conn:
+			conn.execute(
+				f"INSERT INTO {self.table_name} (document_sha256, pipeline_version, file_name, report, "
+				"sufficient_context, artifacts, elapsed_seconds) VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s) "
+				"ON CONFLICT (document_sha256, pipeline_version) DO UPDATE SET "
+				"file_name = EXCLUDED.file_name, report = EXCLUDED.report, "
+				"sufficient_context = EXCLUDED.sufficient_context, artifacts = EXCLUDED.artifacts, "
+				"elapsed_seconds = EXCLUDED.elapsed_seconds, created_at = now()",
+				(
+					document_sha256,
+					version,
+					file_name,
+					report,
+					sufficient_context,
+					json.dumps(artifacts, default=str),
+					elapsed_seconds,
+				),
+			)
+
+	def stats(self) -> dict:
+		"""Return the number of stored analyses per pipeline version."""
+		self.create_table()
+		with self._connect() as conn:
+			rows = conn.execute(
+				f"SELECT pipeline_version, count(*) FROM {self.table_name} GROUP BY pipeline_version"
+			).fetchall()
+		return dict(rows)
+
+	def prune(self, keep_version: Optional[str] = None) -> int:
+		"""Delete stored analyses of every pipeline version except keep_version (all when None)."""
+		self.create_table()
+		with self._connect() as conn:
+			if keep_version is None:
+				cur = conn.execute(f"DELETE FROM {self.table_name}")
+			else:
+				cur = conn.execute(
+					f"DELETE FROM {self.table_name} WHERE pipeline_version <> %s", (keep_version,)
+				)
+			deleted = cur.rowcount
+		logging.info(f"Pruned {deleted} stored analyses from {self.table_name}")
+		return deleted
+
+
+@lru_cache()
+def get_analysis_store() -> AnalysisStore:
+	"""Create and return the process-wide AnalysisStore."""
+	return AnalysisStore(get_settings().analysis_store.table_name)
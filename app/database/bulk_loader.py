@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import logging
+import struct
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+	import numpy as np
+	import pandas as pd
+
+# Binary COPY framing, see https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+_NULL_FIELD = struct.pack("!i", -1)
+_FIELD_COUNT = struct.pack("!h", 4)
+_JSONB_VERSION = b"\x01"
+
+
+def encode_vector(values: Any) -> bytes:
+	"""Encode one embedding in pgvector's binary wire format.
+
+	The format is a big-endian int16 dimension count, an unused int16 and the
+	float32 values in network byte order.
+	"""
+	import numpy as np
+
+	array = np.asarray(values, dtype=">f4")
+	return struct.pack("!hh", array.shape[0], 0) + array.tobytes()
+
+
+def decode_vector(data: Any) -> np.ndarray:
+	"""Decode pgvector's binary wire format into a float32 array without copying.
+
+	The result is a read-only big-endian view over ``data``; call
+	``astype(np.float32)`` for a native-endian copy when needed.
+	"""
+	import numpy as np
+
+	dimensions, _ = struct.unpack_from("!hh", data)
+	return np.frombuffer(data, dtype=">f4", count=dimensions, offset=4)
+
+
+def _field(data: bytes) -> bytes:
+	return struct.pack("!i", len(data)) + data
+
+
+def encode_rows(
+	ids: Sequence[Any],
+	metadata: Sequence[Any],
+	contents: Sequence[Any],
+	embeddings: np.ndarray,
+) -> bytes:
+	"""Encode a batch of (id, metadata, contents, embedding) rows as a binary COPY stream.
+
+	Args:
+		ids: UUIDs (or their string form) for each row.
+		metadata: JSON-serializable metadata dicts (None is written as SQL NULL).
+		contents: Row text.
+		embeddings: A 2-D array of shape (rows, dimensions).
+
+	Returns:
+		The complete COPY payload including signature and trailer.
+	"""
+	import numpy as np
+
+	# One big-endian conversion for the whole batch; rows are then sliced out of it
+	matrix = np.ascontiguousarray(embeddings, dtype=">f4")
+	vector_header = struct.pack("!hh", matrix.shape[1], 0)
+	vector_length = struct.pack("!i", len(vector_header) + matrix.shape[1] * 4)
+
+	parts: List[bytes] = [COPY_SIGNATURE]
+	for row_id, meta, text, vector in zip(ids, metadata, contents, matrix):
+		parts.append(_FIELD_COUNT)
+		parts.append(_field(uuid.UUID(str(row_id)).bytes))
+		parts.append(_NULL_FIELD if meta is None else _field(_JSONB_VERSION + json.dumps(meta, default=str).encode("utf-8")))
+		parts.append(_NULL_FIELD if text is None else _field(str(text).encode("utf-8")))
+		parts.append(vector_length)
+		parts.append(vector_header)
+		parts.append(vector.tobytes())
+	parts.append(COPY_TRAILER)
+	return b"".join(parts)
+
+
+def iter_batches(df: pd.DataFrame, batch_size: int) -> Iterator[pd.DataFrame]:
+	"""Yield consecutive row slices of df with at most batch_size rows."""
+	for start in range(0, len(df), batch_size):
+		yield df.iloc[start:start + batch_size]
+
+
+def copy_upsert(
+	conn: Any,
+	table_name: str,
+	batches: Iterable[pd.DataFrame],
+	dimensions: int,
+) -> Tuple[int, float]:
+	"""Stream DataFrame batches into table_name through a binary COPY staging table.
+
+	Each batch is copied into a temporary staging table and merged with
+	INSERT ... ON CONFLICT (id) DO UPDATE in its own transaction, so a failed
+	batch does not roll back earlier ones.
+
+	Args:
+		conn: An open psycopg (v3) connection.
+		table_name: Target table, already created by VectorStore.create_tables.
+		batches: DataFrames with columns id, metadata, contents, embedding.
+		dimensions: Expected embedding dimensionality.
+
+	Returns:
+		A tuple of (rows loaded, elapsed seconds).
+	"""
+	import numpy as np
+	from psycopg import sql
+
+	table = sql.Identifier(table_name)
+	staging = sql.Identifier(f"{table_name}_staging")
+	columns = sql.SQL("id, metadata, contents, embedding")
+
+	start_time = time.time()
+	total = 0
+	with conn.cursor() as cur:
+		cur.execute(
+			sql.SQL(
+				"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+			).format(staging=staging, table=table)
+		)
+		conn.commit()
+
+		for batch in batches:
+			if batch.empty:
+				continue
+			embeddings = np.stack(batch["embedding"].to_numpy()).astype(np.float32, copy=False)
+			if embeddings.ndim != 2 or embeddings.shape[1] != dimensions:
+				raise ValueError(
+					f"Expected embeddings of dimension {dimensions}, got shape {embeddings.shape}"
+				)
+			payload = encode_rows(
+				batch["id"].tolist(),
+				batch["metadata"].tolist(),
+				batch["contents"].tolist(),
+				embeddings,
+			)
+			with cur.copy(
+				sql.SQL("COPY {staging} ({columns}) FROM STDIN WITH (FORMAT BINARY)").format(
+					staging=staging, columns=columns
+				)
+			) as copy:
+				copy.write(payload)
+			cur.execute(
+				sql.SQL(
+					"INSERT INTO {table} ({columns}) "
+					"SELECT DISTINCT ON (id) {columns} FROM {staging} "
+					"ON CONFLICT (id) DO UPDATE SET "
+					"metadata = EXCLUDED.metadata, contents = EXCLUDED.contents, embedding = EXCLUDED.embedding"
+				).format(table=table, staging=staging, columns=columns)
+			)
+			conn.commit()
+			total += len(batch)
+			logging.info(f"Bulk loaded {total} rows into {table_name}")
+	return total, time.time() - start_time
@@ -0,0 +1,81 @@
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+from config.settings import get_settings
+
+
+@lru_cache()
+def get_pool() -> Any:
+	"""Create and return the process-wide psycopg connection pool.
+
+	Connections are health-checked when they are handed out, idle ones above
+	pool_min_size are closed after pool_max_idle seconds, and every connection
+	carries the configured statement_timeout. The pool holds pool_max_size
+	minus the timescale_vector client's share (see shared_pool_max_size).
+	"""
+	from psycopg_pool import ConnectionPool
+
+	database = get_settings().database
+	max_size = shared_pool_max_size()
+	min_size = min(database.pool_min_size, max_size)
+	kwargs = {}
+	if database.statement_timeout_ms:
+		kwargs["options"] = f"-c statement_timeout={database.statement_timeout_ms}"
+	pool = ConnectionPool(
+		database.service_url,
+		min_size=min_size,
+		max_size=max_size,
+		max_idle=database.pool_max_idle,
+		timeout=database.pool_timeout,
+		kwargs=kwargs,
+		check=ConnectionPool.check_connection,
+		name="vector-store",
+		open=True,
+	)
+	logging.info(
+		f"Opened database pool (min {min_size}, max {max_size} connections; "
+		f"{database.vec_client_max_connections} more for the timescale_vector client)"
+	)
+	return pool
+
+
+def shared_pool_max_size() -> int:
+	"""Connections of pool_max_size left for the shared pool after the timescale_vector client's share."""
+	database = get_settings().database
+	return max(1, database.pool_max_size - database.vec_client_max_connections)
+
+
+@lru_cache()
+def get_vec_client(
+	service_url: str,
+	table_name: str,
+	num_dimensions: int,
+	time_partition_interval: Optional[Any] = None,
+) -> Any:
+	"""Return a Timescale Vector client shared by all VectorStore instances with the same table.
+
+	The client keeps its own psycopg2 connections, capped at
+	vec_client_max_connections so that together with the shared pool the
+	process stays within pool_max_size.
+	"""
+	from timescale_vector import client
+
+	return client.Sync(
+		service_url,
+		table_name,
+		num_dimensions,
+		time_partition_interval=time_partition_interval,
+		max_db_connections=max(1, get_settings().database.vec_client_max_connections),
+	)
+
+
+def pool_metrics() -> dict:
+	"""Return utilization metrics of the shared pool (empty if it was never opened)."""
+	if get_pool.cache_info().currsize == 0:
+		return {}
+	pool = get_pool()
+	# get_stats() includes pool_min/pool_max/pool_size/pool_available/requests_waiting among others
+	stats = pool.get_stats()
+	stats["utilization"] = (stats.get("pool_size", 0) - stats.get("pool_available", 0)) / max(pool.max_size, 1)
+	return stats
@@ -0,0 +1,150 @@
+"""SQL builders for searches that VectorStore runs directly instead of through timescale_vector."""
+
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+	import numpy as np
+
+STORAGE_MODES = ("float", "halfvec", "binary")
+
+
+def vector_literal(embedding: np.ndarray) -> str:
+	"""Format an embedding as a pgvector text literal."""
+	return "[" + ",".join(f"{float(x):.8g}" for x in embedding) + "]"
+
+
+def quantized_index_expression(storage_mode: str, dimensions: int) -> Tuple[str, str]:
+	"""Return the (indexed expression, operator class) for a quantized storage mode.
+
+	The full-precision ``embedding`` column is kept for rescoring; only the index
+	is built over the quantized expression, so its size shrinks 2x (halfvec) or
+	32x (binary) while the table stays the same.
+	"""
+	if storage_mode == "halfvec":
+		return f"(embedding::halfvec({dimensions}))", "halfvec_cosine_ops"
+	if storage_mode == "binary":
+		return f"(binary_quantize(embedding)::bit({dimensions}))", "bit_hamming_ops"
+	raise ValueError(f"Unsupported quantized storage mode: {storage_mode}")
+
+
+def quantized_order_by(storage_mode: str, dimensions: int) -> str:
+	"""Return the ORDER BY expression matching quantized_index_expression, with the query as %(query)s."""
+	expression, _ = quantized_index_expression(storage_mode, dimensions)
+	if storage_mode == "halfvec":
+		return f"{expression} <=> %(query)s::vector::halfvec({dimensions})"
+	return f"{expression} <~> binary_quantize(%(query)s::vector)::bit({dimensions})"
+
+
+def metadata_index_name(table_name: str, key: str) -> str:
+	"""Name of the expression index on metadata->>key."""
+	return f"{table_name}_meta_{re.sub(r'[^A-Za-z0-9_]+', '_', key)}_idx"
+
+
+def _filter_conditions(item: dict, index: int, indexed_keys: Sequence[str], params: Dict[str, Any]) -> str:
+	"""Conditions for one filter dict: hot string keys compare metadata->>key, the rest use @>."""
+	conditions = []
+	remainder = {}
+	for key, value in item.items():
+		# The key is inlined (not a parameter) so the planner can match the expression index
+		if key in indexed_keys and isinstance(value, str) and re.fullmatch(r"[A-Za-z0-9_]+", key):
+			name = f"filter_{index}_{key}"
+			params[name] = value
+			conditions.append(f"metadata->>'{key}' = %({name})s")
+		else:
+			remainder[key] = value
+	if remainder or not conditions:
+		params[f"filter_{index}"] = json.dumps(remainder)
+		conditions.append(f"metadata @> %(filter_{index})s::jsonb")
+	return " AND ".join(conditions)
+
+
+def build_where_clause(
+	metadata_filter: Union[dict, List[dict], None] = None,
+	time_range: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None,
+	indexed_keys: Sequence[str] = (),
+) -> Tuple[str, Dict[str, Any]]:
+	"""Build a WHERE clause equivalent to timescale_vector's filter/uuid_time_filter.
+
+	A dict filter means JSONB containment; a list of dicts means any of them.
+	String values of indexed_keys are compared with ``metadata->>'key'`` so the
+	per-key expression indexes can serve them.
+
+	Returns:
+		A tuple of (SQL starting with "WHERE" or empty string, named parameters).
+	"""
+	conditions: List[str] = []
+	params: Dict[str, Any] = {}
+
+	if metadata_filter:
+		filters = metadata_filter if isinstance(metadata_filter, list) else [metadata_filter]
+		alternatives = [
+			f"({_filter_conditions(item, i, indexed_keys, params)})" for i, item in enumerate(filters)
+		]
+		conditions.append("(" + " OR ".join(alternatives) + ")")
+
+	if time_range:
+		start_date, end_date = time_range
+		if start_date is not None:
+			params["start_date"] = start_date
+			conditions.append("uuid_timestamp(id) >= %(start_date)s")
+		if end_date is not None:
+			params["end_date"] = end_date
+			conditions.append("uuid_timestamp(id) < %(end_date)s")
+
+	if not conditions:
+		return "", params
+	return "WHERE " + " AND ".join(conditions), params
+
+
+def answer_field_expression(label: str) -> str:
+	"""SQL expression extracting a structured '<label>: value' line from the row contents."""
+	if not re.fullmatch(r"[A-Za-z0-9 /_-]+", label):
+		raise ValueError(f"Unsupported answer field label: {label}")
+	return f"trim(substring(contents from '{label}: ([^\\n]*)'))"
+
+
+def year_expression(date_expression: str) -> str:
+	"""SQL expression for the (4-digit) year at the end of a date like 7/11/06 or 2/10/2014."""
+	return (
+		"(SELECT CASE WHEN length(y) = 2 THEN ((CASE WHEN y::int > 50 THEN 1900 ELSE 2000 END) + y::int)::text "
+		f"ELSE y END FROM (SELECT substring({date_expression} from '([0-9]{{4}}|[0-9]{{2}})\\s*$') AS y) AS parts)"
+	)
+
+
+def build_aggregate_query(
+	table_name: str,
+	value_expression: Optional[str] = None,
+	condition: Optional[str] = None,
+	limit: Optional[int] = None,
+) -> str:
+	"""Count distinct documents (metadata filename), optionally grouped by value_expression.
+
+	Rows whose value is missing ('', 'None') are left out of groupings. condition
+	may reference named parameters, which the caller passes to execute().
+
+	Returns:
+		SQL selecting (value, documents) rows, most frequent value first; value is
+		NULL when not grouping.
+	"""
+	conditions = ["metadata->>'filename' IS NOT NULL"]
+	if condition:
+		conditions.append(f"({condition})")
+	rows = (
+		f"SELECT {value_expression or 'NULL::text'} AS value, metadata->>'filename' AS filename "
+		f"FROM {table_name} WHERE {' AND '.join(conditions)}"
+	)
+	if value_expression is None:
+		return f"SELECT NULL AS value, count(DISTINCT filename) AS documents FROM ({rows}) AS matching"
+	query = (
+		f"SELECT value, count(DISTINCT filename) AS documents FROM ({rows}) AS matching "
+		"WHERE value IS NOT NULL AND value NOT IN ('', 'None') "
+		"GROUP BY value ORDER BY documents DESC, value"
+	)
+	if limit is not None:
+		query += f" LIMIT {int(limit)}"
+	return query
@@ -1,51 +1,169 @@
+from __future__ import annotations
+
 import logging
 import time
-from typing import Any, List, Optional, Tuple, Union
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Union
 from datetime import datetime
 
-import pandas as pd
-import google.generativeai as genai
 from config.settings import get_settings
-from timescale_vector import client
+
+# pandas, the embedding provider and timescale_vector are slow to import; they are
+# loaded on first use so that importing this module stays cheap.
+if TYPE_CHECKING:
+	import numpy as np
+	import pandas as pd
+	from timescale_vector import client
+
+	from services.deadline import Deadline
+
+# Largest hnsw.ef_search pgvector accepts
+HNSW_MAX_EF_SEARCH = 1000
 
 
 class VectorStore:
 	"""A class for managing vector operations and database interactions."""
 
 	def __init__(self):
-		"""Initialize the VectorStore with settings, Google Gemini client, and Timescale Vector client."""
+		"""Initialize the VectorStore with settings.
+
+		The embedding provider and Timescale Vector client are created on first use, so
+		constructing a VectorStore never touches the network or the database.
+		"""
 		self.settings = get_settings()
-		genai.configure(api_key=self.settings.google_gemini.api_key)
 		self.embedding_model = self.settings.google_gemini.embedding_model
 		self.vector_settings = self.settings.vector_store
-		self.vec_client = client.Sync(
-			self.settings.database.service_url,
-			self.vector_settings.table_name,
-			self.vector_settings.embedding_dimensions,
-			time_partition_interval=self.vector_settings.time_partition_interval,
-		)
+		self._vec_client = None
+		self._embedder = None
+		self._batcher = None
+		self._schema_checked = False
+		# (filter json, time range) -> (matching row count capped at threshold + 1, measured at)
+		self._selectivity_cache: dict = {}
+
+	@property
+	def vec_client(self) -> client.Sync:
+		"""Timescale Vector client, created on first access and shared across instances."""
+		if self._vec_client is None:
+			from database.connection_pool import get_vec_client
+
+			self._vec_client = get_vec_client(
+				self.settings.database.service_url,
+				self.vector_settings.table_name,
+				self.vector_settings.embedding_dimensions,
+				self.vector_settings.time_partition_interval,
+			)
+		return self._vec_client
+
+	@property
+	def embedder(self) -> Any:
+		"""EmbeddingFactory for the configured provider, created on first access and shared across instances."""
+		if self._embedder is None:
+			from services.embedding_factory import get_embedding_factory
 
-	def get_embedding(self, text: str) -> List[float]:
+			self._embedder = get_embedding_factory(self.settings.embedding.provider)
+		return self._embedder
+
+	def get_embedding(self, text: str, deadline: Optional[Deadline] = None) -> np.ndarray:
 		"""
 		Generate embedding for the given text.
 
 		Args:
 			text: The input text to generate an embedding for.
+			deadline: Optional request deadline; raises DeadlineExceeded when it passes first.
 
 		Returns:
-			A list of floats representing the embedding.
+			A 1-D float32 NumPy array representing the embedding.
 		"""
-		text = text.replace("\n", " ")
+		from services.deadline import DeadlineExceeded, call_with_deadline
+
+		if self.settings.embedding.batching_enabled:
+			from concurrent.futures import TimeoutError as FutureTimeoutError
+
+			try:
+				return self._get_batcher().embed(text, deadline.check("embedding") if deadline else None)
+			except FutureTimeoutError:
+				raise DeadlineExceeded("Embedding did not finish within the deadline") from None
+
 		start_time = time.time()
-		embedding = genai.embed_content(
-			model=self.embedding_model,
-			content=text,
-			task_type="retrieval_document"
-		)["embedding"]
+		embedding = call_with_deadline(
+			"embedding",
+			lambda: self.embedder.embed([text], self.vector_settings.embedding_dimensions)[0],
+			deadline,
+		)
 		elapsed_time = time.time() - start_time
 		logging.info(f"Embedding generated in {elapsed_time:.3f} seconds")
 		return embedding
 
+	def _get_batcher(self) -> Any:
+		"""EmbeddingBatcher shared by all threads using this VectorStore (see get_vector_store)."""
+		if self._batcher is None:
+			from services.embedding_batcher import EmbeddingBatcher
+
+			embedding_settings = self.settings.embedding
+			self._batcher = EmbeddingBatcher(
+				self.get_embeddings,
+				window_ms=embedding_settings.batch_window_ms,
+				max_batch_size=embedding_settings.max_batch_size,
+				max_in_flight=embedding_settings.max_in_flight_batches,
+			)
+		return self._batcher
+
+	def get_embeddings(
+		self,
+		texts: List[str],
+		batch_size: Optional[int] = None,
+		output_dimensionality: Optional[int] = None,
+	) -> np.ndarray:
+		"""
+		Generate embeddings for many texts with batched embedding calls.
+
+		Args:
+			texts: The input texts.
+			batch_size: Texts per embed_content call for Gemini (at most 100); the
+				local provider uses its configured batch size.
+			output_dimensionality: Override the configured embedding dimensions.
+
+		Returns:
+			A contiguous float32 matrix of shape (len(texts), dimensions).
+		"""
+		dimensions = output_dimensionality or self.vector_settings.embedding_dimensions
+		start_time = time.time()
+		matrix = self.embedder.embed(texts, dimensions, batch_size=batch_size)
+		elapsed_time = time.time() - start_time
+		logging.info(f"{len(texts)} embeddings generated in {elapsed_time:.3f} seconds")
+		return matrix
+
+	def verify_schema(self) -> None:
+		"""Check that the table's vector column matches the configured embedding dimensions.
+
+		Does nothing if the table does not exist yet.
+
+		Raises:
+			ValueError: If the column is declared with a different dimension.
+		"""
+		import re
+
+		with self._connect() as conn:
+			row = conn.execute(
+				"SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+				"WHERE attrelid = to_regclass(%s) AND attname = 'embedding' AND NOT attisdropped",
+				(self.vector_settings.table_name,),
+			).fetchone()
+		self._schema_checked = True
+		if row is None:
+			return
+		match = re.search(r"\((\d+)\)", row[0] or "")
+		if match and int(match.group(1)) != self.vector_settings.embedding_dimensions:
+			raise ValueError(
+				f"Table {self.vector_settings.table_name} stores {row[0]} embeddings but "
+				f"EMBEDDING_DIMENSIONS is {self.vector_settings.embedding_dimensions}; "
+				"re-create the table or change the setting."
+			)
+
+	def _check_schema_once(self) -> None:
+		if not self._schema_checked:
+			self.verify_schema()
+
 	def create_tables(self) -> None:
 		"""Create the necessary tablesin the database"""
 		self.vec_client.create_tables()
@@ -53,8 +171,17 @@ class VectorStore:
 	def create_index(self) -> None:
 		"""Create the StreamingDiskANN index to speed up similarity search.
 
+		In the "halfvec" and "binary" storage modes a quantized HNSW index is
+		created instead (see create_quantized_index).
+
 		Safe to call multiple times: if the index already exists, it logs and skips.
 		"""
+		if self.vector_settings.storage_mode != "float":
+			self.create_quantized_index()
+			return
+
+		from timescale_vector import client
+
 		try:
 			self.vec_client.create_embedding_index(client.DiskAnnIndex())
 		except Exception as exc:  # psycopg2 DuplicateTable or similar
@@ -65,9 +192,60 @@ class VectorStore:
 			raise
 
 	def drop_index(self) -> None:
-		"""Drop the StreamingDiskANN index in the database"""
+		"""Drop the embedding index (StreamingDiskANN or quantized) in the database"""
+		if self.vector_settings.storage_mode != "float":
+			with self._connect() as conn:
+				conn.execute(f"DROP INDEX IF EXISTS {self._quantized_index_name()}")
+			return
 		self.vec_client.drop_embedding_index()
 
+	def create_metadata_indexes(self) -> None:
+		"""Create a GIN index on metadata and expression indexes on the hot metadata keys.
+
+		The GIN (jsonb_path_ops) index serves the ``metadata @> ...`` containment
+		filters, the per-key btree indexes serve equality on indexed_metadata_keys
+		and make filter selectivity checks cheap. Safe to call multiple times.
+		"""
+		from database.search_sql import metadata_index_name
+
+		table_name = self.vector_settings.table_name
+		with self._connect() as conn:
+			conn.execute(
+				f"CREATE INDEX IF NOT EXISTS {table_name}_metadata_gin_idx "
+				f"ON {table_name} USING gin (metadata jsonb_path_ops)"
+			)
+			for key in self.vector_settings.indexed_metadata_keys:
+				conn.execute(
+					f"CREATE INDEX IF NOT EXISTS {metadata_index_name(table_name, key)} "
+					f"ON {table_name} ((metadata->>'{key}'))"
+				)
+		logging.info(
+			f"Ensured metadata indexes on {table_name} for keys: {', '.join(self.vector_settings.indexed_metadata_keys)}"
+		)
+
+	def create_quantized_index(self) -> None:
+		"""Create an HNSW index over the halfvec or binary-quantized embedding.
+
+		The table keeps full-precision embeddings, which search uses to rescore
+		the quantized candidates. Safe to call multiple times.
+		"""
+		from database.search_sql import quantized_index_expression
+
+		expression, opclass = quantized_index_expression(
+			self.vector_settings.storage_mode, self.vector_settings.embedding_dimensions
+		)
+		with self._connect() as conn:
+			conn.execute(
+				f"CREATE INDEX IF NOT EXISTS {self._quantized_index_name()} "
+				f"ON {self.vector_settings.table_name} USING hnsw ({expression} {opclass})"
+			)
+		logging.info(
+			f"Ensured {self.vector_settings.storage_mode} index on {self.vector_settings.table_name}"
+		)
+
+	def _quantized_index_name(self) -> str:
+		return f"{self.vector_settings.table_name}_embedding_{self.vector_settings.storage_mode}_idx"
+
 	def upsert(self, df: pd.DataFrame) -> None:
 		"""
 		Insert or update records in the database from a pandas DataFrame.
@@ -75,13 +253,76 @@ class VectorStore:
 		Args:
 			df: A pandas DataFrame containing the data to insert or update.
 				Expected columns: id, metadata, contents, embedding
+				(embedding values may be float32 NumPy arrays)
 		"""
+		self._check_schema_once()
 		records = df.to_records(index=False)
 		self.vec_client.upsert(list(records))
 		logging.info(
 			f"Inserted {len(df)} records into {self.vector_settings.table_name}"
 		)
 
+	def bulk_upsert(
+		self,
+		df: pd.DataFrame,
+		batch_size: int = 5000,
+		rebuild_index: bool = False,
+	) -> None:
+		"""
+		Bulk load records through binary COPY into a staging table, then merge.
+
+		Much faster than upsert for large loads: rows are streamed in batches with
+		pgvector's binary encoding instead of one INSERT per row.
+
+		Args:
+			df: A pandas DataFrame with columns id, metadata, contents, embedding.
+			batch_size: Number of rows per COPY/merge transaction.
+			rebuild_index: Drop the embedding index before loading and rebuild it
+				afterwards. Recommended for initial loads of very large tables.
+		"""
+		from database.bulk_loader import copy_upsert, iter_batches
+
+		self._check_schema_once()
+		if rebuild_index:
+			try:
+				self.drop_index()
+			except Exception as exc:
+				logging.info(f"No embedding index dropped before bulk load: {exc}")
+		try:
+			with self._connect() as conn:
+				total, elapsed_time = copy_upsert(
+					conn,
+					self.vector_settings.table_name,
+					iter_batches(df, batch_size),
+					self.vector_settings.embedding_dimensions,
+				)
+		finally:
+			if rebuild_index:
+				self.create_index()
+		logging.info(
+			f"Bulk loaded {total} records into {self.vector_settings.table_name} in {elapsed_time:.3f} seconds"
+		)
+
+	def _connect(self, deadline: Optional[Deadline] = None) -> Any:
+		"""Borrow a psycopg (v3) connection from the shared pool.
+
+		Used as a context manager: the connection is committed (or rolled back on
+		error) and returned to the pool on exit. With a deadline, waiting for a
+		free connection is bounded by its remaining budget.
+		"""
+		from database.connection_pool import get_pool
+
+		if deadline is not None:
+			return get_pool().connection(timeout=deadline.check("database connection"))
+		return get_pool().connection()
+
+	@staticmethod
+	def _set_statement_deadline(conn: Any, deadline: Optional[Deadline]) -> None:
+		"""Cancel the current transaction's statements server-side when the deadline passes."""
+		if deadline is not None:
+			timeout_ms = max(1, int(deadline.check("search query") * 1000))
+			conn.execute(f"SET LOCAL statement_timeout = {timeout_ms}")
+
 	def search(
 		self,
 		query_text: str,
@@ -90,6 +331,8 @@ class VectorStore:
 		predicates: Optional[client.Predicates] = None,
 		time_range: Optional[Tuple[datetime, datetime]] = None,
 		return_dataframe: bool = True,
+		deadline: Optional[Deadline] = None,
+		query_embedding: Optional[np.ndarray] = None,
 	) -> Union[List[Tuple[Any, ...]], pd.DataFrame]:
 		"""
 		Query the vector database for similar embeddings based on input text.
@@ -107,7 +350,12 @@ class VectorStore:
 				- & is used to combine multiple predicates with AND operator.
 				- | is used to combine multiple predicates with OR operator.
 			time_range: A tuple of (start_date, end_date) to filter results by time.
+				Defaults to the last default_search_horizon when that setting is set,
+				so only recent hypertable chunks are scanned.
 			return_dataframe: Whether to return results as a DataFrame (default: True).
+			deadline: Optional request deadline shared by the query embedding and the
+				database query; raises DeadlineExceeded when it passes first.
+			query_embedding: Precomputed embedding of query_text, to skip embedding it again.
 
 		Returns:
 			Either a list of tuples or a pandas DataFrame containing the search results.
@@ -130,10 +378,46 @@ class VectorStore:
 			Search with time range:
 				vector_store.search("Recent updates", time_range=(datetime(2024, 1, 1), datetime(2024, 1, 31)))
 		"""
-		query_embedding = self.get_embedding(query_text)
+		from psycopg import errors
+
+		from services.deadline import DeadlineExceeded, call_with_deadline
+
+		self._check_schema_once()
+		if query_embedding is None:
+			query_embedding = self.get_embedding(query_text, deadline)
 
 		start_time = time.time()
 
+		horizon = self.vector_settings.default_search_horizon
+		if time_range is None and horizon is not None:
+			time_range = (datetime.now() - horizon, None)
+
+		try:
+			# Selective filters: an exact scan over the few matching rows is both faster and
+			# complete, whereas an ANN scan would post-filter and may return too few rows.
+			if metadata_filter and not predicates and self._is_selective(metadata_filter, time_range, deadline):
+				results = self._search_exact(query_embedding, limit, metadata_filter, time_range, deadline)
+				elapsed_time = time.time() - start_time
+				logging.info(f"Exact filtered vector search completed in {elapsed_time:.3f} seconds")
+				return self._create_dataframe_from_results(results) if return_dataframe else results
+
+			if self.vector_settings.storage_mode != "float" and not predicates:
+				results = self._search_quantized(query_embedding, limit, metadata_filter, time_range, deadline)
+				elapsed_time = time.time() - start_time
+				logging.info(f"Quantized vector search completed in {elapsed_time:.3f} seconds")
+				return self._create_dataframe_from_results(results) if return_dataframe else results
+
+			if not predicates:
+				# Runs on the shared pool, so the checkout health check and statement_timeout apply
+				results = self._search_ann(query_embedding, limit, metadata_filter, time_range, deadline)
+				elapsed_time = time.time() - start_time
+				logging.info(f"Vector search completed in {elapsed_time:.3f} seconds")
+				return self._create_dataframe_from_results(results) if return_dataframe else results
+		except errors.QueryCanceled as e:
+			if deadline is None:
+				raise
+			raise DeadlineExceeded("Vector search did not finish within the deadline") from e
+
 		search_args = {
 			"limit": limit,
 		}
@@ -141,23 +425,369 @@ class VectorStore:
 		if metadata_filter:
 			search_args["filter"] = metadata_filter
 
-		if predicates:
-			search_args["predicates"] = predicates
+		# Predicates are rendered to SQL by timescale_vector, so these searches go through its client
+		search_args["predicates"] = predicates
 
 		if time_range:
+			from timescale_vector import client
+
 			start_date, end_date = time_range
 			search_args["uuid_time_filter"] = client.UUIDTimeRange(start_date, end_date)
 
-		results = self.vec_client.search(query_embedding, **search_args)
+		# timescale_vector manages its own connections, so the deadline is enforced client-side
+		results = call_with_deadline("search", lambda: self.vec_client.search(query_embedding, **search_args), deadline)
 		elapsed_time = time.time() - start_time
 
-		logging.info(f"Vector search completed in {elapsed_time:.3f} seconds")
+		logging.info(f"Predicate vector search completed in {elapsed_time:.3f} seconds")
 
 		if return_dataframe:
 			return self._create_dataframe_from_results(results)
 		else:
 			return results
 
+	def _is_selective(
+		self,
+		metadata_filter: Union[dict, List[dict]],
+		time_range: Optional[Tuple[datetime, datetime]] = None,
+		deadline: Optional[Deadline] = None,
+	) -> bool:
+		"""Whether the filter matches at most exact_scan_threshold rows (cached for selectivity_cache_ttl)."""
+		import json
+
+		from database.search_sql import build_where_clause
+
+		threshold = self.vector_settings.exact_scan_threshold
+		cache_key = (json.dumps(metadata_filter, sort_keys=True, default=str), repr(time_range))
+		cached = self._selectivity_cache.get(cache_key)
+		if cached is not None and time.time() - cached[1] < self.vector_settings.selectivity_cache_ttl:
+			return cached[0] <= threshold
+
+		where_sql, params = build_where_clause(
+			metadata_filter, time_range, self.vector_settings.indexed_metadata_keys
+		)
+		params["cap"] = threshold + 1
+		with self._connect(deadline) as conn:
+			self._set_statement_deadline(conn, deadline)
+			count = conn.execute(
+				f"SELECT count(*) FROM (SELECT 1 FROM {self.vector_settings.table_name} "
+				f"{where_sql} LIMIT %(cap)s) AS matching",
+				params,
+			).fetchone()[0]
+		if len(self._selectivity_cache) > 1024:
+			self._selectivity_cache.clear()
+		self._selectivity_cache[cache_key] = (count, time.time())
+		return count <= threshold
+
+	def _search_ann(
+		self,
+		query_embedding: np.ndarray,
+		limit: int,
+		metadata_filter: Union[dict, List[dict], None] = None,
+		time_range: Optional[Tuple[datetime, datetime]] = None,
+		deadline: Optional[Deadline] = None,
+	) -> List[Tuple[Any, ...]]:
+		"""Approximate nearest-neighbour search on the embedding index, like timescale_vector's search.
+
+		Ordering by cosine distance lets the planner use the DiskANN index; the
+		filter is applied to the rows the index returns. Returns rows shaped like
+		timescale_vector results: (id, metadata, contents, embedding, distance).
+		"""
+		from database.bulk_loader import decode_vector
+		from database.search_sql import build_where_clause, vector_literal
+
+		where_sql, params = build_where_clause(
+			metadata_filter, time_range, self.vector_settings.indexed_metadata_keys
+		)
+		params.update(query=vector_literal(query_embedding), limit=limit)
+		query = (
+			"SELECT id, metadata, contents, embedding, embedding <=> %(query)s::vector AS distance "
+			f"FROM {self.vector_settings.table_name} {where_sql} "
+			"ORDER BY distance LIMIT %(limit)s"
+		)
+		with self._connect(deadline) as conn:
+			self._set_statement_deadline(conn, deadline)
+			with conn.cursor(binary=True) as cur:
+				cur.execute(query, params)
+				rows = cur.fetchall()
+		return [
+			(row_id, metadata, contents, decode_vector(embedding), distance)
+			for row_id, metadata, contents, embedding, distance in rows
+		]
+
+	def _search_exact(
+		self,
+		query_embedding: np.ndarray,
+		limit: int,
+		metadata_filter: Union[dict, List[dict], None] = None,
+		time_range: Optional[Tuple[datetime, datetime]] = None,
+		deadline: Optional[Deadline] = None,
+	) -> List[Tuple[Any, ...]]:
+		"""Exact cosine-distance ranking of the rows matching the filter.
+
+		The filtered rows are materialized first (served by the metadata indexes) so
+		the planner cannot switch to the ANN index and post-filter.
+		"""
+		from database.bulk_loader import decode_vector
+		from database.search_sql import build_where_clause, vector_literal
+
+		where_sql, params = build_where_clause(
+			metadata_filter, time_range, self.vector_settings.indexed_metadata_keys
+		)
+		params.update(query=vector_literal(query_embedding), limit=limit)
+		query = (
+			"WITH filtered AS MATERIALIZED ("
+			f"SELECT id, metadata, contents, embedding FROM {self.vector_settings.table_name} {where_sql}) "
+			"SELECT id, metadata, contents, embedding, embedding <=> %(query)s::vector AS distance "
+			"FROM filtered ORDER BY distance LIMIT %(limit)s"
+		)
+		with self._connect(deadline) as conn:
+			self._set_statement_deadline(conn, deadline)
+			with conn.cursor(binary=True) as cur:
+				cur.execute(query, params)
+				rows = cur.fetchall()
+		return [
+			(row_id, metadata, contents, decode_vector(embedding), distance)
+			for row_id, metadata, contents, embedding, distance in rows
+		]
+
+	def _search_quantized(
+		self,
+		query_embedding: np.ndarray,
+		limit: int,
+		metadata_filter: Union[dict, List[dict], None] = None,
+		time_range: Optional[Tuple[datetime, datetime]] = None,
+		deadline: Optional[Deadline] = None,
+	) -> List[Tuple[Any, ...]]:
+		"""Search the quantized index, then rescore the candidates at full precision.
+
+		limit * rescore_factor candidates are rescored, at most HNSW_MAX_EF_SEARCH
+		(so no more rows than that are returned either). Returns rows shaped like timescale_vector results:
+		(id, metadata, contents, embedding, distance), with cosine distance.
+		"""
+		from database.bulk_loader import decode_vector
+		from database.search_sql import build_where_clause, quantized_order_by, vector_literal
+
+		where_sql, params = build_where_clause(
+			metadata_filter, time_range, self.vector_settings.indexed_metadata_keys
+		)
+		candidates = max(limit * self.vector_settings.rescore_factor, limit)
+		# HNSW returns at most ef_search rows, and pgvector rejects ef_search above its maximum
+		ef_search = min(HNSW_MAX_EF_SEARCH, max(40, candidates))
+		if candidates > ef_search:
+			logging.warning(
+				f"Quantized search wants {candidates} candidates; rescoring {ef_search}, "
+				f"the hnsw.ef_search maximum"
+			)
+			candidates = ef_search
+		order_by = quantized_order_by(
+			self.vector_settings.storage_mode, self.vector_settings.embedding_dimensions
+		)
+		params.update(query=vector_literal(query_embedding), candidates=candidates, limit=limit)
+		query = (
+			"SELECT id, metadata, contents, embedding, embedding <=> %(query)s::vector AS distance "
+			f"FROM (SELECT id, metadata, contents, embedding FROM {self.vector_settings.table_name} "
+			f"{where_sql} ORDER BY {order_by} LIMIT %(candidates)s) AS candidates "
+			"ORDER BY distance LIMIT %(limit)s"
+		)
+		with self._connect(deadline) as conn:
+			self._set_statement_deadline(conn, deadline)
+			conn.execute(f"SET LOCAL hnsw.ef_search = {ef_search}")
+			with conn.cursor(binary=True) as cur:
+				cur.execute(query, params)
+				rows = cur.fetchall()
+		return [
+			(row_id, metadata, contents, decode_vector(embedding), distance)
+			for row_id, metadata, contents, embedding, distance in rows
+		]
+
+	def storage_footprint(self) -> dict:
+		"""Return table, index and total sizes (bytes) of the vector hypertable and each of its indexes."""
+		table_name = self.vector_settings.table_name
+		with self._connect() as conn:
+			table_bytes, index_bytes, toast_bytes, total_bytes = conn.execute(
+				"SELECT table_bytes, index_bytes, toast_bytes, total_bytes FROM hypertable_detailed_size(%s::regclass)",
+				(table_name,),
+			).fetchone()
+			indexes = conn.execute(
+				"SELECT indexname, hypertable_index_size(format('%%I', indexname)::regclass) "
+				"FROM pg_indexes WHERE tablename = %s ORDER BY indexname",
+				(table_name,),
+			).fetchall()
+		return {
+			"table_bytes": table_bytes,
+			"index_bytes": index_bytes,
+			"toast_bytes": toast_bytes,
+			"total_bytes": total_bytes,
+			"indexes": dict(indexes),
+		}
+
+	def measure_recall(self, sample_size: int = 50, k: int = 10) -> float:
+		"""Estimate recall@k of the quantized search against an exact full-precision scan.
+
+		Uses the embeddings of sample_size randomly chosen stored rows as queries.
+
+		Returns:
+			The mean fraction of exact top-k ids also returned by the quantized search.
+		"""
+		from database.search_sql import vector_literal
+
+		table_name = self.vector_settings.table_name
+		queries = self.sample_embeddings(sample_size)
+
+		recalls = []
+		for query_embedding in queries:
+			with self._connect() as conn:
+				# Force an exact scan for the ground truth
+				conn.execute("SET LOCAL enable_indexscan = off")
+				exact = conn.execute(
+					f"SELECT id FROM {table_name} ORDER BY embedding <=> %s::vector LIMIT %s",
+					(vector_literal(query_embedding), k),
+				).fetchall()
+			approximate = self._search_quantized(query_embedding, k)
+			exact_ids = {row[0] for row in exact}
+			found_ids = {row[0] for row in approximate}
+			recalls.append(len(exact_ids & found_ids) / max(len(exact_ids), 1))
+		return sum(recalls) / len(recalls) if recalls else 0.0
+
+	def apply_lifecycle_policies(self) -> dict:
+		"""Add or remove the compression and retention policies configured in settings.
+
+		Returns:
+			The policy intervals that are now in effect (None when disabled).
+		"""
+		table_name = self.vector_settings.table_name
+		compress_after = self.vector_settings.compress_after
+		retention_after = self.vector_settings.retention_after
+		with self._connect() as conn:
+			if compress_after is not None:
+				conn.execute(f"ALTER TABLE {table_name} SET (timescaledb.compress)")
+				conn.execute(
+					"SELECT add_compression_policy(%s::regclass, %s, if_not_exists => true)",
+					(table_name, compress_after),
+				)
+			else:
+				conn.execute(
+					"SELECT remove_compression_policy(%s::regclass, if_exists => true)", (table_name,)
+				)
+			if retention_after is not None:
+				conn.execute(
+					"SELECT add_retention_policy(%s::regclass, %s, if_not_exists => true)",
+					(table_name, retention_after),
+				)
+			else:
+				conn.execute(
+					"SELECT remove_retention_policy(%s::regclass, if_exists => true)", (table_name,)
+				)
+		logging.info(
+			f"Lifecycle policies on {table_name}: compress after {compress_after}, retain for {retention_after}"
+		)
+		return {"compress_after": compress_after, "retention_after": retention_after}
+
+	def chunk_report(self) -> List[dict]:
+		"""Return one entry per hypertable chunk with its time range, compression state and size."""
+		table_name = self.vector_settings.table_name
+		with self._connect() as conn:
+			rows = conn.execute(
+				"SELECT c.chunk_name, c.range_start, c.range_end, c.is_compressed, s.total_bytes "
+				"FROM timescaledb_information.chunks c "
+				"JOIN chunks_detailed_size(%s::regclass) s "
+				"ON s.chunk_schema = c.chunk_schema AND s.chunk_name = c.chunk_name "
+				"WHERE c.hypertable_name = %s ORDER BY c.range_start",
+				(table_name, table_name),
+			).fetchall()
+		return [
+			{
+				"chunk": chunk,
+				"range_start": range_start,
+				"range_end": range_end,
+				"is_compressed": is_compressed,
+				"total_bytes": total_bytes,
+			}
+			for chunk, range_start, range_end, is_compressed, total_bytes in rows
+		]
+
+	def fetch_source_rows(self, source: str) -> List[Tuple[str, str, str]]:
+		"""Return (id, source_key, content_sha256) for every stored row ingested from source."""
+		import json
+
+		with self._connect() as conn:
+			rows = conn.execute(
+				f"SELECT id::text, metadata->>'source_key', metadata->>'content_sha256' "
+				f"FROM {self.vector_settings.table_name} WHERE metadata @> %s::jsonb",
+				(json.dumps({"source": source}),),
+			).fetchall()
+		return rows
+
+	def aggregate(
+		self,
+		value_expression: Optional[str] = None,
+		condition: Optional[str] = None,
+		params: Optional[dict] = None,
+		limit: Optional[int] = None,
+	) -> List[Tuple[Any, int]]:
+		"""Count stored documents, optionally grouped by an SQL expression over each row.
+
+		See search_sql.build_aggregate_query; no embedding or LLM call is involved.
+
+		Returns:
+			(value, document count) rows, most frequent first.
+		"""
+		from database.search_sql import build_aggregate_query
+
+		query = build_aggregate_query(self.vector_settings.table_name, value_expression, condition, limit)
+		start_time = time.time()
+		with self._connect() as conn:
+			rows = conn.execute(query, params or {}).fetchall()
+		elapsed_time = time.time() - start_time
+		logging.info(f"Aggregate query completed in {elapsed_time:.3f} seconds")
+		return rows
+
+	def document_fingerprint(self, filename: str) -> str:
+		"""Return a token that changes whenever the stored rows of a document change.
+
+		Row ids derive from the row's content hash (see services.ingest_manifest),
+		so re-ingesting changed content, adding or removing rows all change it.
+		"""
+		with self._connect() as conn:
+			count, digest = conn.execute(
+				f"SELECT count(*), md5(coalesce(string_agg(id::text, ',' ORDER BY id), '')) "
+				f"FROM {self.vector_settings.table_name} WHERE metadata->>'filename' = %s",
+				(filename,),
+			).fetchone()
+		return f"{count}:{digest}"
+
+	def fetch_embeddings(self, ids: List[str]) -> dict:
+		"""Return {id: float32 embedding} for the stored rows among ids."""
+		import numpy as np
+		from database.bulk_loader import decode_vector
+
+		if not ids:
+			return {}
+		with self._connect() as conn:
+			with conn.cursor(binary=True) as cur:
+				cur.execute(
+					f"SELECT id::text, embedding FROM {self.vector_settings.table_name} WHERE id = ANY(%s::uuid[])",
+					(list(ids),),
+				)
+				rows = cur.fetchall()
+		return {row_id: decode_vector(embedding).astype(np.float32) for row_id, embedding in rows}
+
+	def sample_embeddings(self, sample_size: int) -> np.ndarray:
+		"""Return the embeddings of up to sample_size random stored rows as a float32 matrix."""
+		import numpy as np
+		from database.bulk_loader import decode_vector
+
+		with self._connect() as conn:
+			with conn.cursor(binary=True) as cur:
+				cur.execute(
+					f"SELECT embedding FROM {self.vector_settings.table_name} ORDER BY random() LIMIT %s",
+					(sample_size,),
+				)
+				rows = cur.fetchall()
+		if not rows:
+			return np.empty((0, self.vector_settings.embedding_dimensions), dtype=np.float32)
+		return np.vstack([decode_vector(row[0]) for row in rows]).astype(np.float32)
+
 	def _create_dataframe_from_results(
 		self,
 		results: List[Tuple[Any, ...]],
@@ -171,11 +801,19 @@ class VectorStore:
 		Returns:
 			A pandas DataFrame containing the formatted search results.
 		"""
+		import numpy as np
+		import pandas as pd
+
 		# Convert results to DataFrame
 		df = pd.DataFrame(
 			results, columns=["id", "metadata", "content", "embedding", "distance"]
 		)
 
+		# Keep embeddings as rows of one contiguous float32 matrix rather than per-row lists
+		if len(df):
+			matrix = np.asarray(df["embedding"].tolist(), dtype=np.float32)
+			df["embedding"] = list(matrix)
+
 		# Expand metadata column
 		df = pd.concat(
 			[df.drop(["metadata"], axis=1), df["metadata"].apply(pd.Series)], axis=1
@@ -230,3 +868,9 @@ class VectorStore:
 			logging.info(
 				f"Deleted records matching metadata filter from {self.vector_settings.table_name}"
 			)
+
+
+@lru_cache()
+def get_vector_store() -> VectorStore:
+	"""Create and return a cached, process-wide VectorStore instance."""
+	return VectorStore()
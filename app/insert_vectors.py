@@ -1,16 +1,22 @@
 # %%
 
-from datetime import datetime
 from pathlib import Path
 import pandas as pd
+from config.settings import get_settings
 from database.vector_store import VectorStore
-from timescale_vector.client import uuid_from_time
+from services.ingest_manifest import IngestManifest, content_sha256
+from services.near_duplicates import DEDUP_POLICIES, differing_lines, find_near_duplicates
 
 # Initialize VectorStore
 vec = VectorStore()
 
+# Above this many rows, load with COPY (VectorStore.bulk_upsert) instead of row inserts
+BULK_LOAD_THRESHOLD = 10_000
+
 # Read the CSV file (repo-relative path)
 DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "final.csv"
+SOURCE_NAME = DATA_PATH.name
+MANIFEST_PATH = DATA_PATH.with_suffix(".manifest.json")
 df = pd.read_csv(DATA_PATH, sep=",")
 df.head()
 # Prepare data for insertion
@@ -35,11 +41,12 @@ def prepare_record(row):
     Post-Termination Services: {row['Post-Termination Services']}
     Discrepancy: {row['Discrepancy']}
     """
-    # Generate embedding
-    embedding = vec.get_embedding(content)
-
     # Prepare metadata
+    digest = content_sha256(content)
     metadata = {
+        "source": SOURCE_NAME,
+        "source_key": row["source_key"],
+        "content_sha256": digest,
         "filename": row["Filename"],
         "document_name": row["Document Name"],
         "parties": row["Parties"],
@@ -51,20 +58,141 @@ def prepare_record(row):
 
     return pd.Series(
         {
-            "id": str(uuid_from_time(datetime.now())),
+            "source_key": row["source_key"],
+            "content_sha256": digest,
             "metadata": metadata,
             "contents": content,
-            "embedding": embedding,
         }
     )
-records_df = df.apply(prepare_record, axis=1)
-
-
 
-# Create tables and insert data
+# Stable per-row key: the filename, suffixed with its occurrence number if it repeats
+df["source_key"] = df["Filename"].astype(str) + df.groupby("Filename").cumcount().map(
+    lambda n: "" if n == 0 else f"#{n}"
+)
+records_df = df.apply(prepare_record, axis=1)
+contents_by_key = dict(zip(records_df["source_key"], records_df["contents"]))
+
+# Near-duplicate detection over the whole source, in source order so canonical rows are stable.
+# Rows are compared on their field values (not the shared field labels), without the filename.
+dedup_settings = get_settings().dedup
+if dedup_settings.policy not in DEDUP_POLICIES:
+    raise ValueError(f"Unsupported DEDUP_POLICY {dedup_settings.policy!r}; expected one of {DEDUP_POLICIES}")
+dedup_text = df.drop(columns=["Filename", "source_key"]).astype(str).agg(" ".join, axis=1)
+dedup = find_near_duplicates(
+    list(zip(df["source_key"], dedup_text)),
+    threshold=dedup_settings.threshold,
+    num_perm=dedup_settings.num_perm,
+    shingle_size=dedup_settings.shingle_size,
+)
+print(
+    f"{len(dedup.duplicates)} of {dedup.total} rows are near-duplicates "
+    f"(dedup ratio {dedup.ratio:.1%}, policy '{dedup_settings.policy}')"
+)
+
+
+def embed_pending(records: pd.DataFrame) -> np.ndarray:
+    """Embed pending rows, applying the dedup policy to near-duplicates.
+
+    "link" copies the canonical row's embedding (from this batch or the table);
+    "diff" embeds only the lines that differ from the canonical row. Rows whose
+    canonical embedding is unavailable are embedded in full.
+    """
+    texts = records["contents"].tolist()
+    matrix = np.empty((len(records), vec.vector_settings.embedding_dimensions), dtype=np.float32)
+    positions = {key: i for i, key in enumerate(records["source_key"])}
+    from_batch, from_table = [], []
+    for i, key in enumerate(records["source_key"]):
+        canonical_key = dedup.canonical_of(key) if dedup_settings.policy in ("link", "diff") else None
+        if canonical_key is None:
+            continue
+        if dedup_settings.policy == "diff":
+            lines = differing_lines(texts[i], contents_by_key[canonical_key])
+            if lines:
+                texts[i] = "\n".join(lines)
+                continue
+        if canonical_key in positions:
+            from_batch.append((i, positions[canonical_key]))
+        elif canonical_key in manifest.entries:
+            from_table.append((i, manifest.entries[canonical_key].id))
+    stored = vec.fetch_embeddings([row_id for _, row_id in from_table])
+    from_table = [(i, row_id) for i, row_id in from_table if row_id in stored]
+    reused = {i for i, _ in from_batch} | {i for i, _ in from_table}
+
+    to_embed = [i for i in range(len(records)) if i not in reused]
+    if to_embed:
+        # Embed in batched calls into one float32 matrix
+        matrix[to_embed] = vec.get_embeddings([texts[i] for i in to_embed])
+    for i, j in from_batch:
+        matrix[i] = matrix[j]
+    for i, row_id in from_table:
+        matrix[i] = stored[row_id]
+    print(f"Embedded {len(to_embed)} rows, reused {len(reused)} canonical embeddings")
+    return matrix
+
+# Create tables and metadata indexes
 vec.create_tables()
-vec.create_index()  # DiskAnnIndex
-vec.upsert(records_df)
+vec.create_metadata_indexes()
+
+# Compare against what is already stored; rebuild the manifest from the table if it's missing
+manifest = IngestManifest.load(MANIFEST_PATH, SOURCE_NAME)
+if manifest is None:
+    manifest = IngestManifest.from_rows(MANIFEST_PATH, SOURCE_NAME, vec.fetch_source_rows(SOURCE_NAME))
+elif vec.vector_settings.retention_after is not None:
+    # Retention drops chunks by first-seen time behind the manifest's back; rows it
+    # removed are ingested again instead of being skipped as unchanged or deleted twice
+    forgotten = manifest.reconcile(vec.fetch_source_rows(SOURCE_NAME))
+    print(f"{forgotten} manifest rows were removed by the retention policy")
+diff = manifest.diff(dict(zip(records_df["source_key"], records_df["content_sha256"])))
+print(
+    f"{len(diff.new)} new, {len(diff.changed)} changed, "
+    f"{len(diff.unchanged)} unchanged, {len(diff.removed)} removed rows"
+)
+
+# Only new or changed rows are embedded and written; ids derive from key + content hash
+pending_keys = set(diff.new) | set(diff.changed)
+skipped_keys = set()
+if dedup_settings.policy == "skip":
+    skipped_keys = {key for key in pending_keys if dedup.canonical_of(key)}
+    pending_keys -= skipped_keys
+    print(f"Skipping {len(skipped_keys)} near-duplicate rows")
+records_df = records_df[records_df["source_key"].isin(pending_keys)].copy()
+records_df["id"] = [
+    manifest.assign_id(key, digest)
+    for key, digest in zip(records_df["source_key"], records_df["content_sha256"])
+]
+stale_ids = [manifest.entries[key].id for key in diff.changed + diff.removed]
+written = list(zip(records_df["source_key"], records_df["id"], records_df["content_sha256"]))
+
+if len(records_df):
+    if dedup_settings.policy in ("link", "diff"):
+        # Keep the link to the canonical row so duplicates can be grouped or filtered later
+        records_df["metadata"] = [
+            {**meta, "duplicate_of": dedup.duplicates[key][0], "duplicate_similarity": round(dedup.duplicates[key][1], 3)}
+            if key in dedup.duplicates else meta
+            for key, meta in zip(records_df["source_key"], records_df["metadata"])
+        ]
+    # Each row holds a view into one float32 matrix
+    embeddings = embed_pending(records_df)
+    records_df["embedding"] = list(embeddings)
+    records_df = records_df[["id", "metadata", "contents", "embedding"]]
+
+    if len(records_df) >= BULK_LOAD_THRESHOLD:
+        # Large loads: stream through COPY and build the index once at the end
+        vec.bulk_upsert(records_df, rebuild_index=True)
+    else:
+        vec.create_index()  # DiskAnnIndex
+        vec.upsert(records_df)
+
+# Remove superseded and deleted rows only after their replacements are stored
+if stale_ids:
+    vec.delete(ids=stale_ids)
+
+# Record the new state of the source
+for key, row_id, digest in written:
+    manifest.record(key, row_id, digest)
+for key in diff.removed + sorted(skipped_keys):
+    manifest.forget(key)
+manifest.save()
 
 # %%
 
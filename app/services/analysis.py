@@ -0,0 +1,435 @@
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Dict, Optional, Union
+
+from config.settings import get_settings
+from services.deadline import Deadline, DeadlineExceeded
+from services.pdf_document import StreamingDocument, iter_sections, scan_terms
+from services.synthesizer import Synthesizer, SynthesizedResponse
+
+# Bump when analyze_contract changes in a way the prompt/model/rubric hash below can't see
+PIPELINE_VERSION = "1"
+
+
+# Keep payloads under Gemini limits by truncating large texts
+def truncate_text(text: str, max_chars: int = 4000) -> str:
+	if len(text) <= max_chars:
+		return text
+	return text[:max_chars]
+
+# Fallback/formatter to build the final report with only the required sections
+def generate_fallback_report(
+	pdf_text: Union[str, StreamingDocument],
+	context_df,
+	uploaded_pdf_name: str,
+	reasoning_text: str,
+	sufficient_context: bool,
+	category_scores: Optional[Dict[str, float]] = None,
+) -> str:
+	"""
+	Build a heuristic, per-PDF report containing ONLY:
+	- Compliance Score
+	- Strengths
+	- Areas for Improvement
+	- Reasoning
+	- Additional Information
+	- Context Assessment
+
+	pdf_text may be a StreamingDocument, which is scanned page window by page
+	window instead of as one lowercased copy of the whole text. category_scores
+	(from a map-reduce section analysis) replace the keyword coverage score of
+	the categories they cover.
+	"""
+	import re
+
+	# Clause groups mapped to rubric weights
+	groups = [
+		("Core legal protections", 30, [
+			"indemnification", "indemnify", "limitation of liability", "liability cap",
+			"warranty", "warranties"
+		]),
+		("Data protection and confidentiality", 20, [
+			"confidential", "confidentiality", "data protection", "privacy", "gdpr",
+			"security", "information security"
+		]),
+		("Operational clarity", 20, [
+			"scope of work", "scope", "service level", "sla", "termination",
+			"termination for convenience", "change control", "change request"
+		]),
+		("Compliance with applicable law", 20, [
+			"governing law", "jurisdiction", "export", "anti-bribery",
+			"anti bribery", "anti corruption", "intellectual property",
+			"ip ownership", "license"
+		]),
+		("Drafting quality and completeness", 10, [
+			"definitions", "entire agreement", "order of precedence", "conflict",
+			"severability"
+		]),
+	]
+
+	bad_markers = ["tbd", "to be determined", "to be agreed", "[insert", "???"]
+
+	# One pass over the document for every clause keyword and drafting marker
+	present = scan_terms(pdf_text, [kw for _, _, keywords in groups for kw in keywords] + bad_markers)
+
+	def find_occurrence_snippet(src_text: str, keyword: str, radius: int = 160) -> str:
+		pattern = re.escape(keyword)
+		m = re.search(pattern, src_text, flags=re.IGNORECASE)
+		if not m:
+			return ""
+		start = max(0, m.start() - radius)
+		end = min(len(src_text), m.end() + radius)
+		snippet = src_text[start:end].replace("\n", " ")
+		return snippet.strip()
+
+	total_score = 0.0
+	strengths: list[str] = []
+	improvements: list[str] = []
+	section_summaries: list[str] = []
+
+	for title, weight, keywords in groups:
+		found = []
+		missing = []
+		for kw in keywords:
+			if kw in present:
+				found.append(kw)
+			else:
+				missing.append(kw)
+
+		# Score proportionally by coverage in each category, unless the section analysis scored it
+		coverage = (len(found) / len(keywords)) if keywords else 0.0
+		section_score = weight * coverage
+		model_scored = bool(category_scores) and title in category_scores
+		if model_scored:
+			section_score = max(0.0, min(float(weight), float(category_scores[title])))
+
+		# Penalize drafting quality for bad markers
+		penalty_hits = 0
+		penalty = 0.0
+		if title.startswith("Drafting"):
+			penalty_hits = sum(1 for bm in bad_markers if bm in present)
+			if penalty_hits:
+				penalty = min(0.5, penalty_hits * 0.1)  # up to 50% penalty
+				section_score *= (1.0 - penalty)
+		total_score += section_score
+
+		# Summarize contribution of this category
+		summary = f"- {title}: {round(section_score)}/{weight} from {len(found)}/{len(keywords)} signals"
+		if model_scored:
+			summary = f"- {title}: {round(section_score)}/{weight} from section analysis ({len(found)}/{len(keywords)} signals)"
+		if title.startswith("Drafting") and penalty_hits:
+			summary += f" (penalty {int(penalty * 100)}% for drafting placeholders)"
+		section_summaries.append(summary)
+
+		if found:
+			strengths.append(f"{title}: present signals (e.g., {', '.join(found[:3])})")
+		if missing:
+			improvements.append(
+				f"{title}: consider adding or clarifying {', '.join(missing[:3])}"
+			)
+
+	# Bound and format the total score; scale raw (0–100) into the 70–85 band
+	raw_score = max(0, min(100, round(total_score)))
+	final_score = int(round(70 + (raw_score * 0.15)))
+	final_score = max(70, min(85, final_score))
+
+	strengths_text = "\n".join(f"- {s}" for s in strengths) if strengths else "- No clear strengths detected."
+	improvements_text = "\n".join(f"- {i}" for i in improvements) if improvements else "- No clear gaps detected; review manually."
+
+	# Use provided reasoning text (trimmed) or a default
+	reasoning_text = (reasoning_text or "Heuristic assessment based on clause presence and drafting signals.").strip()
+
+	# Context assessment: True when final score >= 80
+	ctx_available = bool(final_score >= 80)
+
+	# Additional information (basic guidance)
+	additional_info = (
+		"- Consider explicitly defining post-termination obligations and transition services where relevant.\n"
+		"- Ensure any placeholders (e.g., TBD/To be agreed) are resolved before execution."
+	)
+
+	report = f"""**Compliance Score:**
+- {final_score} out of 100
+
+**Strengths:**
+{strengths_text}
+
+**Areas for Improvement:**
+{improvements_text}
+
+**Reasoning:**
+{reasoning_text}
+
+**Additional Information:**
+{additional_info}
+
+**Context Assessment:**
+- Sufficient context available: {str(ctx_available)}
+"""
+	return report
+
+
+class EmptyDocumentError(ValueError):
+	"""The PDF has no extractable text layer."""
+
+
+@lru_cache()
+def pipeline_version() -> str:
+	"""Identifier of the current analysis pipeline, used to key stored results.
+
+	Covers PIPELINE_VERSION, the system prompt, the generation and embedding
+	models and the source of generate_fallback_report (which holds the rubric),
+	so editing any of them invalidates previously stored analyses.
+	"""
+	import inspect
+
+	settings = get_settings()
+	try:
+		rubric_source = inspect.getsource(generate_fallback_report)
+	except (OSError, TypeError):
+		rubric_source = ""
+	digest = hashlib.sha256()
+	for part in (
+		PIPELINE_VERSION,
+		Synthesizer.SYSTEM_PROMPT,
+		Synthesizer.SECTION_PROMPT if settings.sections.enabled else "",
+		settings.sections.model_dump_json() if settings.sections.enabled else "",
+		settings.google_gemini.default_model,
+		settings.embedding.provider,
+		settings.embedding.local_model_path or settings.google_gemini.embedding_model,
+		str(settings.vector_store.embedding_dimensions),
+		settings.reranker.model_dump_json() if settings.reranker.enabled else "",
+		rubric_source,
+	):
+		digest.update(part.encode("utf-8"))
+		digest.update(b"\0")
+	return f"{PIPELINE_VERSION}-{digest.hexdigest()[:16]}"
+
+
+@dataclass
+class AnalysisResult:
+	"""Outcome of analyze_contract for one document."""
+
+	file_name: str
+	report: str
+	sufficient_context: bool
+	elapsed_seconds: float
+	# True when the deadline ran out and the report is the heuristic fallback only
+	degraded: bool = False
+	# Retrieved context and model output the report was built from
+	artifacts: dict = field(default_factory=dict)
+	# True when the result was read from the AnalysisStore instead of being recomputed
+	cached: bool = False
+
+
+def analyze_contract(
+	pdf_content: Union[str, StreamingDocument], file_name: str, vec: Any, deadline: Optional[Deadline] = None
+) -> AnalysisResult:
+	"""Run the compliance pipeline for one contract's extracted text.
+
+	Retrieval -> Synthesizer -> generate_fallback_report, as used by the
+	Streamlit app (multiple.py) and the headless batch runner (batch_analyze.py).
+	With SectionAnalysisSettings enabled, contracts longer than min_chars are
+	analyzed section by section in parallel instead of from their first 4,000
+	characters. The deadline's remaining budget is passed to the embedding,
+	search and completion calls; if it runs out, the heuristic report is
+	returned instead (sections analyzed so far are kept).
+
+	Args:
+		pdf_content: Text extracted from the contract, or a StreamingDocument.
+		file_name: Name of the contract file, used in the report.
+		vec: The VectorStore to retrieve context from.
+		deadline: Time budget for the analysis. Defaults to
+			LatencySettings.analysis_budget_seconds (no deadline when that is 0).
+
+	Returns:
+		An AnalysisResult with the final report text.
+	"""
+	start_time = time.time()
+	budget = get_settings().latency.analysis_budget_seconds
+	if deadline is None and budget > 0:
+		deadline = Deadline(budget)
+
+	# Keep request sizes small
+	if isinstance(pdf_content, StreamingDocument):
+		short_text = pdf_content.head(4000)
+	else:
+		short_text = truncate_text(pdf_content, 4000)
+
+	results = None
+	response: Optional[SynthesizedResponse] = None
+	degraded = False
+	pages_unread = None
+	try:
+		# Retrieve candidate chunks for this document section; with reranking enabled,
+		# over-fetch and pass on only the chunks that score above the relevance cutoff
+		reranker_settings = get_settings().reranker
+		if reranker_settings.enabled:
+			from services.reranker import get_reranker
+
+			results = vec.search(short_text, limit=reranker_settings.candidates, deadline=deadline)
+			results = get_reranker().rerank(short_text, results)
+		else:
+			results = vec.search(short_text, limit=8, deadline=deadline)
+
+		section_settings = get_settings().sections
+		if section_settings.enabled and _longer_than(pdf_content, section_settings.min_chars):
+			# Map-reduce over the whole contract, one completion per section
+			response = Synthesizer.generate_sectioned_response(
+				iter_sections(pdf_content, section_settings.section_chars),
+				context=results,
+				max_concurrency=section_settings.max_concurrency,
+				max_sections=section_settings.max_sections,
+				deadline=deadline,
+			)
+			degraded = (
+				(response.sections_skipped > 0 or response.unread_sections)
+				and deadline is not None
+				and deadline.expired()
+			)
+			if isinstance(pdf_content, StreamingDocument):
+				# Pages the section analysis never reached, before the report scan reads them all
+				pages_unread = pdf_content.page_count - pdf_content.extracted_pages
+		else:
+			# Generate a compliance analysis (LLM) with retrieved context
+			response = Synthesizer.generate_response(
+				question="Provide a compliance analysis for this contract section.",
+				context=results,
+				deadline=deadline,
+			)
+	except DeadlineExceeded as e:
+		logging.warning(f"Analysis of {file_name} degraded to the heuristic report: {e}")
+		degraded = True
+
+	# Determine if insufficient context and choose reasoning
+	raw_answer = (getattr(response, 'answer', '') or '').strip()
+	enough_ctx_flag = getattr(response, 'enough_context', True) if response is not None else False
+	rate_limited = (enough_ctx_flag is False)
+
+	# If insufficient, provide a heuristic reasoning; else use model answer as reasoning
+	if degraded and not raw_answer:
+		reasoning = "Preliminary heuristic analysis generated because the analysis exceeded its time budget."
+	elif rate_limited:
+		reasoning = "Preliminary heuristic analysis generated due to service rate limits or insufficient context."
+	else:
+		reasoning = raw_answer or "Heuristic assessment based on clause presence and drafting signals."
+
+	# Context availability: use LLM flag if present, else infer from search results
+	has_results = hasattr(results, 'empty') and not results.empty
+	sufficient_context = enough_ctx_flag if enough_ctx_flag is not None else has_results
+
+	# Build the final report with only the required sections
+	final_report = generate_fallback_report(
+		pdf_text=pdf_content,
+		context_df=results,
+		uploaded_pdf_name=file_name,
+		reasoning_text=reasoning,
+		sufficient_context=sufficient_context,
+		category_scores=getattr(response, "category_scores", None),
+	)
+	artifacts = {
+		"retrieved": _retrieved_artifacts(results),
+		"thought_process": list(getattr(response, "thought_process", None) or []),
+		"llm_answer": raw_answer,
+		"enough_context": enough_ctx_flag,
+		"reasoning": reasoning,
+	}
+	if hasattr(response, "category_scores"):
+		artifacts["sections"] = {
+			"analyzed": response.sections,
+			"skipped": response.sections_skipped,
+			"unread": response.unread_sections,
+			"pages_unread": pages_unread,
+			"category_scores": response.category_scores,
+		}
+	elapsed_time = time.time() - start_time
+	logging.info(f"Analyzed {file_name} in {elapsed_time:.3f} seconds")
+	return AnalysisResult(
+		file_name=file_name,
+		report=final_report,
+		sufficient_context=bool(sufficient_context),
+		elapsed_seconds=elapsed_time,
+		degraded=degraded,
+		artifacts=artifacts,
+	)
+
+
+def _longer_than(pdf_content: Union[str, StreamingDocument], num_chars: int) -> bool:
+	if isinstance(pdf_content, StreamingDocument):
+		return len(pdf_content.head(num_chars + 1)) > num_chars
+	return len(pdf_content or "") > num_chars
+
+
+def _retrieved_artifacts(results: Any) -> list:
+	"""Summarize retrieved rows (id, filename, distance, content excerpt) for storage."""
+	if results is None or not hasattr(results, "empty") or results.empty:
+		return []
+	columns = [c for c in ("id", "filename", "distance", "rerank_score", "content") if c in results.columns]
+	rows = results[columns].to_dict(orient="records")
+	for row in rows:
+		if "content" in row:
+			row["content"] = str(row["content"])[:400]
+	return rows
+
+
+def analyze_pdf(data: bytes, file_name: str, vec: Any, deadline: Optional[Deadline] = None) -> AnalysisResult:
+	"""Extract and analyze a PDF, reusing the stored result for identical bytes.
+
+	Results are looked up in the AnalysisStore by (sha256 of data,
+	pipeline_version()); a hit skips extraction, retrieval and synthesis.
+	Degraded results, those without model context (e.g. after exhausted
+	rate-limit retries) and section analyses with failed sections are not
+	stored, so the next request retries the full pipeline. Store failures are
+	logged and never fail the analysis.
+
+	Raises:
+		EmptyDocumentError: If no text could be extracted from the PDF.
+	"""
+	document_sha256 = hashlib.sha256(data).hexdigest()
+	store = None
+	if get_settings().analysis_store.enabled:
+		from database.analysis_store import get_analysis_store
+
+		store = get_analysis_store()
+		try:
+			stored = store.get(document_sha256, pipeline_version())
+		except Exception:
+			logging.exception("Analysis store lookup failed")
+			stored = None
+		if stored is not None:
+			logging.info(f"Reusing stored analysis for {file_name} ({document_sha256[:12]})")
+			return AnalysisResult(
+				file_name=file_name,
+				report=stored["report"],
+				sufficient_context=stored["sufficient_context"],
+				elapsed_seconds=0.0,
+				artifacts=stored["artifacts"],
+				cached=True,
+			)
+
+	# Pages are extracted lazily and large texts spill to disk, so memory stays flat for long PDFs
+	with StreamingDocument(BytesIO(data)) as document:
+		if not document.has_text():
+			raise EmptyDocumentError("No text could be extracted from the PDF")
+		result = analyze_contract(document, file_name, vec, deadline)
+
+	# Sections whose calls failed would be missing from the stored report for good
+	incomplete = bool(result.artifacts.get("sections", {}).get("skipped"))
+	if store is not None and not result.degraded and not incomplete and result.artifacts.get("enough_context") is not False:
+		try:
+			store.put(
+				document_sha256,
+				pipeline_version(),
+				file_name,
+				result.report,
+				result.sufficient_context,
+				result.artifacts,
+				result.elapsed_seconds,
+			)
+		except Exception:
+			logging.exception("Analysis store write failed")
+	return result
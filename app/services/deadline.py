@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Deque, Dict, List, Optional, TypeVar
+
+from config.settings import get_settings
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+	"""A pipeline stage could not finish within the request's remaining budget."""
+
+
+class Deadline:
+	"""Absolute point in time by which a request must finish.
+
+	Created once per request and passed down through embedding, search and
+	completion calls, so each stage only gets what is left of the budget.
+	"""
+
+	def __init__(self, budget_seconds: float):
+		self.budget_seconds = budget_seconds
+		self.expires_at = time.monotonic() + budget_seconds
+
+	def remaining(self) -> float:
+		return max(0.0, self.expires_at - time.monotonic())
+
+	def expired(self) -> bool:
+		return time.monotonic() >= self.expires_at
+
+	def check(self, stage: str) -> float:
+		"""Return the remaining seconds, or raise DeadlineExceeded if none are left before stage."""
+		remaining = self.remaining()
+		if remaining <= 0:
+			raise DeadlineExceeded(f"Deadline of {self.budget_seconds:.1f}s exceeded before {stage}")
+		return remaining
+
+
+class LatencyTracker:
+	"""Rolling window of successful call latencies per call type."""
+
+	def __init__(self, window: int = 500, min_samples: int = 20):
+		self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+		self._min_samples = min_samples
+		self._lock = threading.Lock()
+		self.hedges: Dict[str, int] = defaultdict(int)
+
+	def record(self, name: str, seconds: float) -> None:
+		with self._lock:
+			self._samples[name].append(seconds)
+
+	def percentile(self, name: str, percentile: float) -> Optional[float]:
+		"""Latency at percentile (0-100) for name, or None until min_samples calls were seen."""
+		with self._lock:
+			samples = sorted(self._samples[name])
+		if len(samples) < self._min_samples:
+			return None
+		return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+
+@lru_cache()
+def get_latency_tracker() -> LatencyTracker:
+	latency_settings = get_settings().latency
+	return LatencyTracker(latency_settings.latency_window, latency_settings.hedge_min_samples)
+
+
+@lru_cache()
+def _get_executor() -> ThreadPoolExecutor:
+	return ThreadPoolExecutor(max_workers=get_settings().latency.max_workers, thread_name_prefix="deadline-call")
+
+
+def call_with_deadline(name: str, fn: Callable[[], T], deadline: Optional[Deadline] = None) -> T:
+	"""Run fn() within deadline's remaining budget, hedging it when it runs slow.
+
+	When hedging is enabled (LatencySettings.hedge_percentile) and fn is still
+	running after that percentile of name's recent latencies, an identical
+	second call is started and whichever succeeds first is returned. fn must
+	therefore be idempotent. Calls that lose the race or outlive the deadline
+	cannot be interrupted; they finish in the background and their result is
+	discarded, so fn should also carry its own timeout where the client allows.
+
+	Raises:
+		DeadlineExceeded: If no call succeeded before the deadline.
+	"""
+	tracker = get_latency_tracker()
+	percentile = get_settings().latency.hedge_percentile
+	hedge_after = tracker.percentile(name, percentile) if percentile else None
+
+	start_time = time.monotonic()
+	if deadline is None and hedge_after is None:
+		result = fn()
+		tracker.record(name, time.monotonic() - start_time)
+		return result
+
+	if deadline is not None:
+		deadline.check(name)
+	executor = _get_executor()
+	pending: List[Future] = [executor.submit(fn)]
+	hedged = False
+	last_error: Optional[BaseException] = None
+	while True:
+		timeout = deadline.remaining() if deadline is not None else None
+		if hedge_after is not None and not hedged:
+			until_hedge = max(0.0, hedge_after - (time.monotonic() - start_time))
+			timeout = until_hedge if timeout is None else min(timeout, until_hedge)
+		done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+		for future in done:
+			if future.exception() is None:
+				tracker.record(name, time.monotonic() - start_time)
+				return future.result()
+			last_error = future.exception()
+		pending = [future for future in pending if not future.done()]
+		if not pending:
+			raise last_error
+		if deadline is not None and deadline.expired():
+			raise DeadlineExceeded(f"{name} did not finish within the {deadline.budget_seconds:.1f}s deadline")
+		if hedge_after is not None and not hedged and time.monotonic() - start_time >= hedge_after:
+			tracker.hedges[name] += 1
+			logging.info(f"Hedging {name} after {time.monotonic() - start_time:.3f} seconds")
+			pending.append(executor.submit(fn))
+			hedged = True
@@ -0,0 +1,69 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class EmbeddingBatcher:
+	"""Coalesce concurrent single-text embedding requests into batched calls.
+
+	Callers submit one text and get a future of its vector. A collector thread
+	waits up to window_ms after the first pending request (or until max_batch_size
+	texts are queued), sends them as one batch and hands each caller its row.
+	Up to max_in_flight batches run at the same time so collection continues
+	while a batch call is waiting on the network.
+	"""
+
+	def __init__(
+		self,
+		embed_batch: Callable[[List[str]], Any],
+		window_ms: float = 5.0,
+		max_batch_size: int = 100,
+		max_in_flight: int = 4,
+	):
+		self._embed_batch = embed_batch
+		self._window = window_ms / 1000.0
+		self._max_batch_size = max_batch_size
+		self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+		self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embedding-batch")
+		self._thread = threading.Thread(target=self._collect, name="embedding-batcher", daemon=True)
+		self._thread.start()
+
+	def submit(self, text: str) -> Future:
+		"""Queue text for the next batch and return a future of its embedding."""
+		future: Future = Future()
+		self._queue.put((text, future))
+		return future
+
+	def embed(self, text: str, timeout: Optional[float] = None) -> Any:
+		"""Embed one text through the batcher, blocking until its vector is ready."""
+		return self.submit(text).result(timeout)
+
+	def _collect(self) -> None:
+		while True:
+			batch = [self._queue.get()]
+			deadline = time.monotonic() + self._window
+			while len(batch) < self._max_batch_size:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					break
+				try:
+					batch.append(self._queue.get(timeout=remaining))
+				except queue.Empty:
+					break
+			self._executor.submit(self._dispatch, batch)
+
+	def _dispatch(self, batch: List[Tuple[str, Future]]) -> None:
+		start_time = time.time()
+		try:
+			matrix = self._embed_batch([text for text, _ in batch])
+		except Exception as exc:
+			for _, future in batch:
+				future.set_exception(exc)
+			return
+		for i, (_, future) in enumerate(batch):
+			future.set_result(matrix[i])
+		elapsed_time = time.time() - start_time
+		logging.info(f"Embedded batch of {len(batch)} coalesced requests in {elapsed_time:.3f} seconds")
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, List, Optional
+
+from config.settings import get_settings
+
+if TYPE_CHECKING:
+	import numpy as np
+
+class LocalEmbeddingModel:
+	"""A sentence-transformers model loaded from a local directory and run on CPU.
+
+	Texts are embedded in fixed-size batches. While the model runs one batch,
+	the next batches are tokenized on a small thread pool (the tokenizers
+	release the GIL), so tokenization overlaps with inference. Outputs are
+	truncated to the requested dimensions and L2-normalized.
+	"""
+
+	def __init__(
+		self,
+		model_path: str,
+		backend: str = "torch",
+		onnx_file: Optional[str] = None,
+		batch_size: int = 32,
+		tokenizer_workers: int = 2,
+		num_threads: Optional[int] = None,
+	):
+		import torch
+		from sentence_transformers import SentenceTransformer
+
+		if num_threads:
+			torch.set_num_threads(num_threads)
+		model_kwargs = {"file_name": onnx_file} if backend == "onnx" and onnx_file else None
+		start_time = time.time()
+		self.model = SentenceTransformer(
+			model_path,
+			device="cpu",
+			backend=backend,
+			model_kwargs=model_kwargs,
+			local_files_only=True,
+		)
+		self.model.eval()
+		self.dimensions = self.model.get_sentence_embedding_dimension()
+		self.batch_size = batch_size
+		self._tokenizer_workers = max(1, tokenizer_workers)
+		self._tokenizer_pool = ThreadPoolExecutor(
+			max_workers=self._tokenizer_workers, thread_name_prefix="embedding-tokenize"
+		)
+		elapsed_time = time.time() - start_time
+		logging.info(f"Loaded local embedding model {model_path} ({backend}) in {elapsed_time:.3f} seconds")
+
+	def embed(self, texts: List[str], dimensions: int) -> np.ndarray:
+		import numpy as np
+		import torch
+
+		if dimensions > self.dimensions:
+			raise ValueError(
+				f"Local embedding model produces {self.dimensions} dimensions, {dimensions} requested"
+			)
+		matrix = np.empty((len(texts), dimensions), dtype=np.float32)
+		starts = list(range(0, len(texts), self.batch_size))
+		pending = {}
+		# Keep a bounded number of batches tokenized ahead of the model
+		for ahead in starts[: self._tokenizer_workers + 1]:
+			pending[ahead] = self._tokenizer_pool.submit(self.model.tokenize, texts[ahead:ahead + self.batch_size])
+		for i, start in enumerate(starts):
+			features = pending.pop(start).result()
+			following = i + self._tokenizer_workers + 1
+			if following < len(starts):
+				ahead = starts[following]
+				pending[ahead] = self._tokenizer_pool.submit(
+					self.model.tokenize, texts[ahead:ahead + self.batch_size]
+				)
+			with torch.inference_mode():
+				output = self.model(features)["sentence_embedding"][:, :dimensions]
+				output = torch.nn.functional.normalize(output, p=2, dim=1)
+			matrix[start:start + output.shape[0]] = output.float().numpy()
+		return matrix
+
+
+class EmbeddingFactory:
+	"""Embed texts with the provider selected in EmbeddingSettings."""
+
+	def __init__(self, provider: str):
+		self.provider = provider
+		self.settings = get_settings()
+		self.client = self._initialize_client()
+
+	def _initialize_client(self) -> Any:
+		if self.provider == "google_gemini":
+			# Imported lazily: google.generativeai pulls in grpc/protobuf and is slow to load
+			import google.generativeai as genai
+
+			genai.configure(api_key=self.settings.google_gemini.api_key)
+			return genai
+		if self.provider == "local":
+			embedding_settings = self.settings.embedding
+			if not embedding_settings.local_model_path:
+				raise ValueError("LOCAL_EMBEDDING_MODEL_PATH must be set for the local embedding provider")
+			return LocalEmbeddingModel(
+				embedding_settings.local_model_path,
+				backend=embedding_settings.local_backend,
+				onnx_file=embedding_settings.local_onnx_file,
+				batch_size=embedding_settings.local_batch_size,
+				tokenizer_workers=embedding_settings.tokenizer_workers,
+				num_threads=embedding_settings.local_num_threads,
+			)
+		raise ValueError(f"Unsupported embedding provider: {self.provider}")
+
+	def embed(self, texts: List[str], dimensions: int, batch_size: Optional[int] = None) -> np.ndarray:
+		"""
+		Embed texts into a float32 matrix of shape (len(texts), dimensions).
+
+		Args:
+			texts: The input texts; newlines are replaced with spaces.
+			dimensions: Output dimensionality.
+			batch_size: Texts per Gemini embed_content call (at most 100). The local
+				provider uses its configured batch size.
+		"""
+		import numpy as np
+
+		texts = [text.replace("\n", " ") for text in texts]
+		if self.provider == "local":
+			return self.client.embed(texts, dimensions)
+		if self.provider == "google_gemini":
+			batch_size = batch_size or 100
+			matrix = np.empty((len(texts), dimensions), dtype=np.float32)
+			for start in range(0, len(texts), batch_size):
+				batch = texts[start:start + batch_size]
+				embeddings = self.client.embed_content(
+					model=self.settings.google_gemini.embedding_model,
+					content=batch,
+					task_type="retrieval_document",
+					output_dimensionality=dimensions,
+				)["embedding"]
+				matrix[start:start + len(batch)] = embeddings
+			return matrix
+		raise ValueError(f"Unsupported embedding provider: {self.provider}")
+
+
+@lru_cache()
+def get_embedding_factory(provider: str) -> EmbeddingFactory:
+	"""Return the process-wide EmbeddingFactory for provider, so a local model is loaded once."""
+	return EmbeddingFactory(provider)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# UUID v1 timestamps count 100 ns intervals since the Gregorian reform
+_UUID_EPOCH = datetime(1582, 10, 15, tzinfo=timezone.utc)
+
+
+def content_sha256(text: str) -> str:
+	"""Return the hex sha256 of a record's contents."""
+	return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def stable_id(key: str, content_hash: str, first_seen: datetime) -> str:
+	"""Build a deterministic UUID v1 for a source row.
+
+	The timestamp field is the row's first ingestion time, which keeps the
+	hypertable's time partitioning meaningful and stable across re-runs. The
+	clock sequence and node fields come from sha256(key, content hash), so the
+	same row content always maps to the same id and changed content gets a new one.
+	"""
+	if first_seen.tzinfo is None:
+		first_seen = first_seen.replace(tzinfo=timezone.utc)
+	delta = first_seen - _UUID_EPOCH
+	timestamp = (delta.days * 86_400 + delta.seconds) * 10_000_000 + delta.microseconds * 10
+	digest = int(hashlib.sha256(f"{key}\0{content_hash}".encode("utf-8")).hexdigest()[:16], 16)
+	clock_seq = digest & 0x3FFF
+	node = (digest >> 14) & 0xFFFFFFFFFFFF
+	return str(
+		uuid.UUID(
+			fields=(
+				timestamp & 0xFFFFFFFF,
+				(timestamp >> 32) & 0xFFFF,
+				((timestamp >> 48) & 0x0FFF) | (1 << 12),
+				((clock_seq >> 8) & 0x3F) | 0x80,
+				clock_seq & 0xFF,
+				node,
+			)
+		)
+	)
+
+
+def uuid1_time(value: str) -> datetime:
+	"""Return the timestamp embedded in a UUID v1 as an aware UTC datetime."""
+	return _UUID_EPOCH + timedelta(microseconds=uuid.UUID(str(value)).time // 10)
+
+
+@dataclass
+class ManifestEntry:
+	id: str
+	content_sha256: str
+	first_seen: str
+
+
+@dataclass
+class ManifestDiff:
+	new: List[str] = field(default_factory=list)
+	changed: List[str] = field(default_factory=list)
+	unchanged: List[str] = field(default_factory=list)
+	removed: List[str] = field(default_factory=list)
+
+
+class IngestManifest:
+	"""Per-source record of what has been embedded and stored.
+
+	Maps each source row key to its stored id and content hash, so re-ingesting
+	a source only embeds new or changed rows and deletes rows that disappeared.
+	The vector table stays the source of truth: a lost manifest can be rebuilt
+	with from_rows() from the source_key/content_sha256 metadata stored per row.
+	"""
+
+	def __init__(self, path: Path, source: str, entries: Optional[Dict[str, ManifestEntry]] = None):
+		self.path = Path(path)
+		self.source = source
+		self.entries: Dict[str, ManifestEntry] = entries or {}
+
+	@classmethod
+	def load(cls, path: Path, source: str) -> Optional["IngestManifest"]:
+		"""Load a manifest file, or return None if it does not exist."""
+		path = Path(path)
+		if not path.exists():
+			return None
+		data = json.loads(path.read_text(encoding="utf-8"))
+		entries = {key: ManifestEntry(**value) for key, value in data.get("entries", {}).items()}
+		return cls(path, data.get("source", source), entries)
+
+	@classmethod
+	def from_rows(cls, path: Path, source: str, rows: Iterable[Tuple[str, str, str]]) -> "IngestManifest":
+		"""Rebuild a manifest from stored (id, source_key, content_sha256) rows."""
+		entries = {}
+		for row_id, key, digest in rows:
+			if key:
+				entries[key] = ManifestEntry(str(row_id), digest or "", uuid1_time(row_id).isoformat())
+		logging.info(f"Rebuilt manifest for {source} from {len(entries)} stored rows")
+		return cls(path, source, entries)
+
+	def reconcile(self, rows: Iterable[Tuple[str, str, str]]) -> int:
+		"""Forget entries whose row is no longer stored, e.g. after a retention policy dropped its chunk.
+
+		rows are the stored (id, source_key, content_sha256) rows of the source.
+		Forgotten keys diff as new, so re-ingesting stores them again under a
+		fresh first-seen time. Returns the number of entries forgotten.
+		"""
+		stored_ids = {str(row_id) for row_id, _, _ in rows}
+		missing = [key for key, entry in self.entries.items() if entry.id not in stored_ids]
+		for key in missing:
+			self.forget(key)
+		if missing:
+			logging.info(f"Manifest for {self.source}: {len(missing)} rows are no longer stored")
+		return len(missing)
+
+	def save(self) -> None:
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		data = {
+			"source": self.source,
+			"updated_at": datetime.now(timezone.utc).isoformat(),
+			"entries": {key: vars(entry) for key, entry in sorted(self.entries.items())},
+		}
+		tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+		tmp_path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+		tmp_path.replace(self.path)
+
+	def diff(self, current: Dict[str, str]) -> ManifestDiff:
+		"""Compare {key: content_sha256} of the current source against the manifest."""
+		result = ManifestDiff()
+		for key, digest in current.items():
+			entry = self.entries.get(key)
+			if entry is None:
+				result.new.append(key)
+			elif entry.content_sha256 != digest:
+				result.changed.append(key)
+			else:
+				result.unchanged.append(key)
+		result.removed = [key for key in self.entries if key not in current]
+		return result
+
+	def assign_id(self, key: str, digest: str, now: Optional[datetime] = None) -> str:
+		"""Return the stable id for key/digest, keeping the key's first-seen time if known."""
+		entry = self.entries.get(key)
+		if entry is not None:
+			first_seen = datetime.fromisoformat(entry.first_seen)
+		else:
+			first_seen = now or datetime.now(timezone.utc)
+		return stable_id(key, digest, first_seen)
+
+	def record(self, key: str, row_id: str, digest: str) -> None:
+		self.entries[key] = ManifestEntry(row_id, digest, uuid1_time(row_id).isoformat())
+
+	def forget(self, key: str) -> None:
+		self.entries.pop(key, None)
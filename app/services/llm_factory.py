@@ -1,6 +1,6 @@
 from typing import Any, Dict, List, Type
+import logging
 import time
-import google.generativeai as genai
 from pydantic import BaseModel
 import json
 
@@ -8,13 +8,19 @@ from config.settings import get_settings
 
 
 class LLMFactory:
-	def __init__(self, provider: str):
+	def __init__(self, provider: str, prompt_cache: Any = None):
 		self.provider = provider
 		self.settings = getattr(get_settings(), provider)
 		self.client = self._initialize_client()
+		# services.prompt_cache.PromptCache serving static system prompts; None uses the
+		# process-wide one (if PROMPT_CACHE is enabled)
+		self.prompt_cache = prompt_cache
 
 	def _initialize_client(self) -> Any:
 		if self.provider == "google_gemini":
+			# Imported lazily: google.generativeai pulls in grpc/protobuf and is slow to load
+			import google.generativeai as genai
+
 			genai.configure(api_key=self.settings.api_key)
 			return genai.GenerativeModel(self.settings.default_model)
 		raise ValueError(f"Unsupported LLM provider: {self.provider}")
@@ -23,8 +29,14 @@ class LLMFactory:
 		self, response_model: Type[BaseModel], messages: List[Dict[str, str]], **kwargs
 	) -> Any:
 		if self.provider == "google_gemini":
-			# Convert messages to Gemini format
-			prompt = self._convert_messages_to_prompt(messages)
+			# Optional services.deadline.Deadline bounding the whole call, backoff included
+			deadline = kwargs.get("deadline")
+			generation_config = self._generation_config(
+				temperature=kwargs.get("temperature", self.settings.temperature),
+				max_output_tokens=kwargs.get("max_tokens", self.settings.max_tokens),
+				# e.g. "application/json" to make the model answer with bare JSON
+				**({"response_mime_type": kwargs["response_mime_type"]} if kwargs.get("response_mime_type") else {}),
+			)
 
 			# Retry with exponential backoff to mitigate 429 rate limits
 			attempts = kwargs.get("retries", 5)
@@ -32,13 +44,7 @@ class LLMFactory:
 			last_error: Exception | None = None
 			for attempt in range(1, attempts + 1):
 				try:
-					response = self.client.generate_content(
-						prompt,
-						generation_config=genai.types.GenerationConfig(
-							temperature=kwargs.get("temperature", self.settings.temperature),
-							max_output_tokens=kwargs.get("max_tokens", self.settings.max_tokens),
-						)
-					)
+					response = self._complete(messages, generation_config, deadline)
 					# Parse the response and create the response model instance
 					try:
 						response_text = response.text
@@ -69,10 +75,17 @@ class LLMFactory:
 						sleep_seconds = backoff_seconds * (2 ** (attempt - 1))
 						# Cap the backoff to a reasonable limit
 						sleep_seconds = min(sleep_seconds, 60)
+						if deadline is not None and sleep_seconds >= deadline.remaining():
+							from services.deadline import DeadlineExceeded
+
+							raise DeadlineExceeded("Completion rate-limited and no budget left to back off") from e
 						time.sleep(sleep_seconds)
 						continue
 					# Non-retryable error
 					raise
+			if kwargs.get("raise_on_rate_limit"):
+				# For callers that merge partial results and must not mistake this for an answer
+				raise last_error
 			# If all retries exhausted, return a graceful message
 			return response_model(
 				thought_process=[
@@ -85,6 +98,64 @@ class LLMFactory:
 			)
 		raise ValueError(f"Unsupported LLM provider: {self.provider}")
 	
+	def _get_prompt_cache(self) -> Any:
+		if self.prompt_cache is None and get_settings().prompt_cache.enabled:
+			from services.prompt_cache import get_prompt_cache
+
+			self.prompt_cache = get_prompt_cache()
+		return self.prompt_cache
+
+	def _complete(self, messages: List[Dict[str, str]], generation_config: Any, deadline: Any = None) -> Any:
+		"""Generate a completion, serving the leading system messages from the prompt cache when possible.
+
+		Falls back to the inline prompt when caching is unavailable or the cached
+		handle turns out to be gone on the provider side.
+		"""
+		# Convert messages to Gemini format
+		prompt = self._convert_messages_to_prompt(messages)
+		leading = 0
+		while leading < len(messages) and messages[leading].get("role") == "system":
+			leading += 1
+		cache = self._get_prompt_cache() if leading else None
+		if cache is None:
+			return self._generate(prompt, generation_config, deadline)
+
+		model_name = self.settings.default_model
+		prefix = "\n\n".join(message.get("content", "") for message in messages[:leading])
+		cached_model = cache.model_for(model_name, prefix)
+		if cached_model is None:
+			return self._generate(prompt, generation_config, deadline)
+		remainder = self._convert_messages_to_prompt(messages[leading:])
+		try:
+			response = self._generate(remainder, generation_config, deadline, client=cached_model)
+		except Exception as e:
+			if not any(s in str(e).lower() for s in ["404", "not found", "expired"]):
+				raise
+			logging.info(f"Cached prompt is gone on the provider side, sending it inline: {e}")
+			cache.invalidate(model_name, prefix)
+			return self._generate(prompt, generation_config, deadline)
+		cache.record_saved(len(prompt.encode("utf-8")) - len(remainder.encode("utf-8")))
+		return response
+
+	def _generate(self, prompt: str, generation_config: Any, deadline: Any = None, client: Any = None) -> Any:
+		"""One generate_content call, bounded by the deadline and hedged when enabled."""
+		from services.deadline import call_with_deadline
+
+		client = client or self.client
+
+		def call() -> Any:
+			request_options = {"timeout": deadline.check("completion")} if deadline is not None else None
+			return client.generate_content(
+				prompt, generation_config=generation_config, request_options=request_options
+			)
+
+		return call_with_deadline("completion", call, deadline)
+
+	def _generation_config(self, **kwargs) -> Any:
+		import google.generativeai as genai
+
+		return genai.types.GenerationConfig(**kwargs)
+
 	def _convert_messages_to_prompt(self, messages: List[Dict[str, str]]) -> str:
 		"""Convert OpenAI-style messages to a single prompt for Gemini."""
 		prompt_parts = []
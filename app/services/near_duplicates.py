@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+	import numpy as np
+
+DEDUP_POLICIES = ("report", "skip", "link", "diff")
+
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod p
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, size: int = 5) -> set:
+	"""Hashed word size-grams of text (lowercased, punctuation ignored)."""
+	words = re.findall(r"\w+", str(text).lower())
+	if len(words) < size:
+		return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+	return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def lsh_parameters(num_perm: int, threshold: float) -> Tuple[int, int]:
+	"""Pick (bands, rows) with bands * rows == num_perm whose S-curve midpoint is closest to threshold."""
+	best = (num_perm, 1)
+	best_error = float("inf")
+	for rows in range(1, num_perm + 1):
+		if num_perm % rows:
+			continue
+		bands = num_perm // rows
+		error = abs((1 / bands) ** (1 / rows) - threshold)
+		if error < best_error:
+			best, best_error = (bands, rows), error
+	return best
+
+
+class MinHasher:
+	"""MinHash signatures of shingle sets; the seed makes signatures comparable across runs."""
+
+	def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+		import numpy as np
+
+		rng = np.random.default_rng(seed)
+		self.num_perm = num_perm
+		self.shingle_size = shingle_size
+		self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+		self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+	def signature(self, text: str) -> np.ndarray:
+		import numpy as np
+
+		values = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64)
+		if not len(values):
+			return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+		# a, x < 2**32 so a * x + b stays below 2**64
+		hashed = (np.outer(values, self._a) + self._b) % np.uint64(_PRIME) & np.uint64(_MAX_HASH)
+		return hashed.min(axis=0)
+
+
+def estimated_jaccard(first: np.ndarray, second: np.ndarray) -> float:
+	return float((first == second).mean())
+
+
+class LSHIndex:
+	"""Banded LSH over MinHash signatures for near-duplicate candidate lookup."""
+
+	def __init__(self, num_perm: int = 128, threshold: float = 0.85):
+		self.threshold = threshold
+		self.bands, self.rows = lsh_parameters(num_perm, threshold)
+		self._buckets: List[Dict[bytes, List[str]]] = [defaultdict(list) for _ in range(self.bands)]
+		self._signatures: Dict[str, np.ndarray] = {}
+
+	def _band_keys(self, signature: np.ndarray) -> Iterable[bytes]:
+		for band in range(self.bands):
+			chunk = signature[band * self.rows:(band + 1) * self.rows]
+			yield hashlib.blake2b(chunk.tobytes(), digest_size=8).digest()
+
+	def insert(self, key: str, signature: np.ndarray) -> None:
+		self._signatures[key] = signature
+		for band, band_key in enumerate(self._band_keys(signature)):
+			self._buckets[band][band_key].append(key)
+
+	def query(self, signature: np.ndarray) -> List[Tuple[str, float]]:
+		"""Return (key, estimated Jaccard) of indexed entries at or above the threshold, most similar first."""
+		candidates = set()
+		for band, band_key in enumerate(self._band_keys(signature)):
+			candidates.update(self._buckets[band].get(band_key, ()))
+		matches = [(key, estimated_jaccard(signature, self._signatures[key])) for key in candidates]
+		return sorted((m for m in matches if m[1] >= self.threshold), key=lambda m: -m[1])
+
+
+@dataclass
+class DedupReport:
+	total: int = 0
+	# duplicate key -> (canonical key, estimated Jaccard similarity)
+	duplicates: Dict[str, Tuple[str, float]] = field(default_factory=dict)
+
+	@property
+	def ratio(self) -> float:
+		return len(self.duplicates) / self.total if self.total else 0.0
+
+	def canonical_of(self, key: str) -> Optional[str]:
+		match = self.duplicates.get(key)
+		return match[0] if match else None
+
+
+def find_near_duplicates(
+	items: Sequence[Tuple[str, str]],
+	threshold: float = 0.85,
+	num_perm: int = 128,
+	shingle_size: int = 5,
+) -> DedupReport:
+	"""Map each near-duplicate (key, text) item to the first earlier item it matches.
+
+	Items are processed in order and only non-duplicates are indexed, so every
+	cluster resolves to one canonical item: the first of its members in items.
+	The same input order therefore always yields the same canonical rows.
+	"""
+	hasher = MinHasher(num_perm, shingle_size)
+	index = LSHIndex(num_perm, threshold)
+	report = DedupReport(total=len(items))
+	for key, text in items:
+		signature = hasher.signature(text)
+		matches = index.query(signature)
+		if matches:
+			report.duplicates[key] = matches[0]
+		else:
+			index.insert(key, signature)
+	return report
+
+
+def differing_lines(text: str, canonical_text: str) -> List[str]:
+	"""Non-empty lines of text that do not appear in canonical_text."""
+	canonical = {line.strip() for line in str(canonical_text).splitlines()}
+	return [line.strip() for line in str(text).splitlines() if line.strip() and line.strip() not in canonical]
@@ -0,0 +1,200 @@
+import logging
+import mmap
+import re
+import tempfile
+import threading
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from config.settings import get_settings
+
+
+class StreamingDocument:
+	"""Text of a PDF extracted page by page, on demand, with bounded memory.
+
+	Pages are only extracted when first needed, so checking for a text layer
+	or reading the first few thousand characters touches only the first pages.
+	Extracted text is kept in memory until it exceeds spill_threshold_bytes;
+	after that every page is appended to a temporary file, which is read back
+	through mmap once extraction has finished. Scans run over windows of a few
+	pages instead of one string holding the whole document.
+
+	Use as a context manager (or call close()) to delete the spill file.
+	"""
+
+	def __init__(
+		self,
+		pdf_file: Union[BinaryIO, Any],
+		spill_threshold_bytes: Optional[int] = None,
+		window_pages: Optional[int] = None,
+	):
+		import PyPDF2
+
+		document_settings = get_settings().documents
+		self.spill_threshold_bytes = (
+			spill_threshold_bytes if spill_threshold_bytes is not None else document_settings.spill_threshold_bytes
+		)
+		self.window_pages = window_pages or document_settings.window_pages
+		self._reader = PyPDF2.PdfReader(pdf_file)
+		self.page_count = len(self._reader.pages)
+		self._lock = threading.Lock()
+		# In-memory pages until the threshold is crossed, then (offset, length) into the spill file
+		self._memory_pages: List[str] = []
+		self._memory_bytes = 0
+		self._spill: Optional[Any] = None
+		self._spans: List[Tuple[int, int]] = []
+		self._mmap: Optional[mmap.mmap] = None
+		self.total_chars = 0
+
+	def __enter__(self) -> "StreamingDocument":
+		return self
+
+	def __exit__(self, *exc_info) -> None:
+		self.close()
+
+	def close(self) -> None:
+		with self._lock:
+			if self._mmap is not None:
+				self._mmap.close()
+				self._mmap = None
+			if self._spill is not None:
+				self._spill.close()
+				self._spill = None
+			self._memory_pages = []
+
+	@property
+	def extracted_pages(self) -> int:
+		return len(self._memory_pages) + len(self._spans)
+
+	@property
+	def spilled(self) -> bool:
+		return self._spill is not None
+
+	def _extract_through(self, index: int) -> None:
+		"""Extract pages up to and including index (caller holds the lock)."""
+		while self.extracted_pages <= index:
+			text = self._reader.pages[self.extracted_pages].extract_text() or ""
+			self.total_chars += len(text)
+			if self._spill is None:
+				self._memory_pages.append(text)
+				self._memory_bytes += len(text.encode("utf-8"))
+				if self._memory_bytes > self.spill_threshold_bytes:
+					self._spill_to_disk()
+			else:
+				self._append_to_spill(text)
+		if self._spill is not None and self.extracted_pages == self.page_count and self._mmap is None:
+			self._spill.flush()
+			if self._spill.tell():
+				self._mmap = mmap.mmap(self._spill.fileno(), 0, access=mmap.ACCESS_READ)
+
+	def _spill_to_disk(self) -> None:
+		self._spill = tempfile.TemporaryFile(prefix="pdf-text-")
+		pages, self._memory_pages, self._memory_bytes = self._memory_pages, [], 0
+		for text in pages:
+			self._append_to_spill(text)
+		logging.info(f"Spilled extracted text to disk after {len(pages)} of {self.page_count} pages")
+
+	def _append_to_spill(self, text: str) -> None:
+		data = text.encode("utf-8")
+		self._spill.seek(0, 2)
+		self._spans.append((self._spill.tell(), len(data)))
+		self._spill.write(data)
+
+	def page(self, index: int) -> str:
+		"""Text of page index (0-based), extracting earlier pages first if needed."""
+		with self._lock:
+			self._extract_through(index)
+			if self._spill is None:
+				return self._memory_pages[index]
+			offset, length = self._spans[index]
+			if self._mmap is not None:
+				return self._mmap[offset:offset + length].decode("utf-8")
+			self._spill.seek(offset)
+			return self._spill.read(length).decode("utf-8")
+
+	def pages(self) -> Iterator[str]:
+		for index in range(self.page_count):
+			yield self.page(index)
+
+	def windows(self, window_pages: Optional[int] = None, overlap_chars: int = 0) -> Iterator[str]:
+		"""Yield the text of consecutive groups of window_pages pages.
+
+		Each window starts with the last overlap_chars characters of the previous
+		one, so a phrase split across a window boundary is still seen whole.
+		"""
+		window_pages = window_pages or self.window_pages
+		carry = ""
+		for start in range(0, self.page_count, window_pages):
+			text = carry + "\n".join(self.page(i) for i in range(start, min(start + window_pages, self.page_count)))
+			yield text
+			carry = text[-overlap_chars:] if overlap_chars else ""
+
+	def head(self, max_chars: int) -> str:
+		"""The first max_chars characters, extracting only the pages needed."""
+		parts: List[str] = []
+		remaining = max_chars
+		for text in self.pages():
+			parts.append(text[:remaining])
+			remaining -= len(parts[-1])
+			if remaining <= 0:
+				break
+		return "".join(parts)
+
+	def has_text(self) -> bool:
+		"""Whether any page has a text layer (stops at the first one that does)."""
+		return any(text.strip() for text in self.pages())
+
+
+def iter_windows(document: Union[str, StreamingDocument], overlap_chars: int = 0) -> Iterator[str]:
+	"""Windows of a StreamingDocument, or a plain string as a single window."""
+	if isinstance(document, StreamingDocument):
+		return document.windows(overlap_chars=overlap_chars)
+	return iter([document or ""])
+
+
+# A line starting a new clause: "ARTICLE 5", "Section 3.2", "12. Term", "4.1 Fees"
+_HEADING = re.compile(r"\n(?=[ \t]*(?:ARTICLE|Article|SECTION|Section|\d{1,2}(?:\.\d{1,2})*\.?)[ \t]+[A-Z])")
+
+
+def _section_end(text: str, max_chars: int) -> int:
+	"""Where to end a section of at most max_chars: the last heading, else paragraph or line break, in its second half."""
+	start = max_chars // 2
+	headings = [m.start() for m in _HEADING.finditer(text, start, max_chars)]
+	if headings:
+		return headings[-1] + 1
+	for separator in ("\n\n", "\n"):
+		cut = text.rfind(separator, start, max_chars)
+		if cut != -1:
+			return cut + len(separator)
+	return max_chars
+
+
+def iter_sections(document: Union[str, StreamingDocument], max_chars: int) -> Iterator[str]:
+	"""Split a document into consecutive sections of at most max_chars.
+
+	Sections end at clause headings where possible so clauses are rarely cut in
+	half. A StreamingDocument is read page by page.
+	"""
+	pages = document.pages() if isinstance(document, StreamingDocument) else iter([document or ""])
+	buffer = ""
+	for text in pages:
+		buffer += text + "\n"
+		while len(buffer) > max_chars:
+			end = _section_end(buffer, max_chars)
+			if buffer[:end].strip():
+				yield buffer[:end]
+			buffer = buffer[end:]
+	if buffer.strip():
+		yield buffer
+
+
+def scan_terms(document: Union[str, StreamingDocument], terms: Iterable[str]) -> Set[str]:
+	"""Return the terms that occur in the document (case-insensitive), scanning window by window."""
+	terms = {term.lower() for term in terms}
+	overlap = max((len(term) for term in terms), default=1) - 1
+	found: Set[str] = set()
+	for window in iter_windows(document, overlap_chars=overlap):
+		window_lower = window.lower()
+		found.update(term for term in terms - found if term in window_lower)
+		if found == terms:
+			break
+	return found
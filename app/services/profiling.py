@@ -0,0 +1,140 @@
+import cProfile
+import logging
+import marshal
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from config.settings import get_settings
+
+
+class StackSampler:
+	"""Periodically sample the call stack of one thread.
+
+	Samples are aggregated per stack and written as collapsed stacks
+	(``frame;frame;frame count``), the format consumed by flamegraph.pl,
+	speedscope and most flame-graph viewers, or as a pstats file whose call
+	counts are sample counts and whose times are samples x interval.
+	"""
+
+	def __init__(self, thread_id: int, interval: float):
+		self.thread_id = thread_id
+		self.interval = max(interval, 0.001)
+		self.samples: Counter = Counter()
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+	def start(self) -> None:
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stop.set()
+		self._thread.join()
+
+	def _run(self) -> None:
+		while not self._stop.wait(self.interval):
+			frame = sys._current_frames().get(self.thread_id)
+			if frame is None:
+				continue
+			stack = []
+			while frame is not None:
+				code = frame.f_code
+				# pstats function key: (file, first line, name)
+				stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+				frame = frame.f_back
+			self.samples[tuple(reversed(stack))] += 1
+
+	def write_collapsed(self, path: Path) -> None:
+		lines = [
+			";".join(f"{name} ({Path(filename).name}:{line})" for filename, line, name in stack) + f" {count}"
+			for stack, count in self.samples.most_common()
+		]
+		path.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+
+	def write_pstats(self, path: Path) -> None:
+		"""Write the samples in the marshalled format pstats.Stats loads (as cProfile.dump_stats does)."""
+		FunctionKey = Tuple[str, int, str]
+		stats: Dict[FunctionKey, list] = {}
+		callers: Dict[FunctionKey, Dict[FunctionKey, list]] = {}
+		for stack, count in self.samples.items():
+			seconds = count * self.interval
+			# Recursive frames count once per sample towards calls and cumulative time
+			for function in set(stack):
+				entry = stats.setdefault(function, [0, 0, 0.0, 0.0])
+				entry[0] += count
+				entry[1] += count
+				entry[3] += seconds
+			stats[stack[-1]][2] += seconds
+			for caller, callee in set(zip(stack, stack[1:])):
+				edge = callers.setdefault(callee, {}).setdefault(caller, [0, 0, 0.0, 0.0])
+				edge[0] += count
+				edge[1] += count
+				edge[2] += seconds if callee == stack[-1] else 0.0
+				edge[3] += seconds
+		data = {
+			function: (cc, nc, tt, ct, {caller: tuple(edge) for caller, edge in callers.get(function, {}).items()})
+			for function, (cc, nc, tt, ct) in stats.items()
+		}
+		with open(path, "wb") as f:
+			marshal.dump(data, f)
+
+
+def _safe_stem(name: str) -> str:
+	stem = name.rsplit(".", 1)[0] if name else "request"
+	return re.sub(r"[^A-Za-z0-9_-]+", "_", stem)[:80] or "request"
+
+
+@contextmanager
+def profile_request(label: str, filename: Optional[str] = None) -> Iterator[None]:
+	"""Profile the wrapped block when profiling is enabled in settings.
+
+	Writes ``<file>_<label>_<timestamp>.collapsed`` (flame-graph input, always
+	from the stack sampler) and a matching ``.pstats`` file into the configured
+	output directory. In sampling mode the pstats file is built from the same
+	samples; in deterministic mode it comes from cProfile (exact call counts,
+	higher overhead). The block runs untouched when profiling is disabled or
+	the run is not selected by ``sample_rate``.
+
+	Args:
+		label: Short name of the action being profiled, e.g. "ask" or "analyze".
+		filename: Name of the uploaded document the request relates to.
+	"""
+	profiling = get_settings().profiling
+	if not profiling.enabled or random.random() >= profiling.sample_rate:
+		yield
+		return
+
+	sampler = StackSampler(threading.get_ident(), profiling.sample_interval)
+	profiler = cProfile.Profile() if profiling.mode == "deterministic" else None
+	start_time = time.time()
+	sampler.start()
+	if profiler is not None:
+		profiler.enable()
+	try:
+		yield
+	finally:
+		# Streamlit's st.stop() raises inside the block, so the profile is saved in finally
+		if profiler is not None:
+			profiler.disable()
+		sampler.stop()
+		elapsed_time = time.time() - start_time
+		try:
+			output_dir = Path(profiling.output_dir)
+			output_dir.mkdir(parents=True, exist_ok=True)
+			timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+			base = output_dir / f"{_safe_stem(filename)}_{label}_{timestamp}"
+			sampler.write_collapsed(base.with_suffix(".collapsed"))
+			if profiler is not None:
+				profiler.dump_stats(str(base.with_suffix(".pstats")))
+			else:
+				sampler.write_pstats(base.with_suffix(".pstats"))
+			logging.info(f"Profiled '{label}' in {elapsed_time:.3f} seconds; saved to {base}.*")
+		except Exception:
+			logging.exception("Failed to write request profile")
@@ -0,0 +1,247 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from config.settings import get_settings
+
+
+@dataclass
+class _CachedPrefix:
+	handle: Any
+	model: Any
+	expires_at: float
+
+
+class GeminiCacheBackend:
+	"""Gemini context caching (google.generativeai.caching.CachedContent).
+
+	Only versioned model names (e.g. gemini-1.5-pro-002) can be cached, and
+	Gemini rejects cached content below its minimum token count; PromptCache
+	sends prompts inline in both cases.
+	"""
+
+	def supports(self, model_name: str) -> bool:
+		"""Whether model_name pins a version, which cached content requires."""
+		return re.search(r"-\d{3}$", model_name.rsplit("/", 1)[-1]) is not None
+
+	def create(self, model_name: str, system_instruction: str, ttl: timedelta) -> Tuple[Any, float]:
+		"""Create cached content and return (handle, expiry as epoch seconds)."""
+		import google.generativeai as genai
+
+		cached = genai.caching.CachedContent.create(
+			model=model_name,
+			display_name=f"prompt-{hashlib.sha256(system_instruction.encode('utf-8')).hexdigest()[:12]}",
+			system_instruction=system_instruction,
+			ttl=ttl,
+		)
+		return cached, cached.expire_time.timestamp()
+
+	def refresh(self, handle: Any, ttl: timedelta) -> float:
+		"""Extend the cached content's TTL and return its new expiry."""
+		handle.update(ttl=ttl)
+		return handle.expire_time.timestamp()
+
+	def bind(self, handle: Any) -> Any:
+		"""Return a model whose generate_content calls run on top of the cached prefix."""
+		import google.generativeai as genai
+
+		return genai.GenerativeModel.from_cached_content(cached_content=handle)
+
+
+class FakeCacheBackend:
+	"""Local stand-in for provider caching, for tests and load runs without Gemini.
+
+	Cached prefixes live in a dict and expire on the injected clock. Completions
+	are delegated to generate(system_instruction, prompt, **kwargs), which should
+	return an object with a ``text`` attribute. Prefixes shorter than min_chars
+	are rejected like Gemini's minimum token count.
+	"""
+
+	def __init__(
+		self,
+		generate: Callable[..., Any],
+		min_chars: int = 0,
+		clock: Callable[[], float] = time.time,
+	):
+		self.generate = generate
+		self.min_chars = min_chars
+		self.clock = clock
+		self.prefixes: Dict[str, Tuple[str, float]] = {}
+		self.created = 0
+		self.refreshed = 0
+
+	def supports(self, model_name: str) -> bool:
+		return True
+
+	def create(self, model_name: str, system_instruction: str, ttl: timedelta) -> Tuple[str, float]:
+		if len(system_instruction) < self.min_chars:
+			raise ValueError("400 Cached content is too small")
+		self.created += 1
+		handle = f"cachedContents/fake-{self.created}"
+		expires_at = self.clock() + ttl.total_seconds()
+		self.prefixes[handle] = (system_instruction, expires_at)
+		return handle, expires_at
+
+	def refresh(self, handle: str, ttl: timedelta) -> float:
+		system_instruction, _ = self._get(handle)
+		self.refreshed += 1
+		expires_at = self.clock() + ttl.total_seconds()
+		self.prefixes[handle] = (system_instruction, expires_at)
+		return expires_at
+
+	def bind(self, handle: str) -> Any:
+		return _FakeCachedModel(self, handle)
+
+	def _get(self, handle: str) -> Tuple[str, float]:
+		entry = self.prefixes.get(handle)
+		if entry is None or entry[1] <= self.clock():
+			raise LookupError(f"404 CachedContent not found (or expired): {handle}")
+		return entry
+
+
+class _FakeCachedModel:
+	def __init__(self, backend: FakeCacheBackend, handle: str):
+		self.backend = backend
+		self.handle = handle
+
+	def generate_content(self, prompt: str, **kwargs) -> Any:
+		system_instruction, _ = self.backend._get(self.handle)
+		return self.backend.generate(system_instruction, prompt, **kwargs)
+
+
+class PromptCache:
+	"""Provider-side cached content for static prompt prefixes (system prompts).
+
+	A prefix is uploaded once per (model, sha256 of the prefix) and reused by
+	handle: model_for() returns a model bound to it, so only the rest of the
+	prompt is sent per call. Handles are refreshed once they are within
+	refresh_margin_seconds of expiring. Provider calls run outside the lock;
+	while one caller creates a handle, others send the prompt inline. If the
+	backend doesn't support the model, the prefix is shorter than
+	min_prefix_chars, or creating fails, model_for() returns None and the caller
+	sends the prompt inline; a failed prefix is not retried for
+	retry_after_seconds. bytes_saved counts the inline prompt bytes not resent.
+	"""
+
+	def __init__(
+		self,
+		backend: Any,
+		ttl_seconds: float = 3600.0,
+		refresh_margin_seconds: float = 300.0,
+		retry_after_seconds: float = 3600.0,
+		min_prefix_chars: int = 0,
+		clock: Callable[[], float] = time.time,
+	):
+		self.backend = backend
+		self.ttl_seconds = ttl_seconds
+		self.refresh_margin_seconds = refresh_margin_seconds
+		self.retry_after_seconds = retry_after_seconds
+		self.min_prefix_chars = min_prefix_chars
+		self.clock = clock
+		self._entries: Dict[str, _CachedPrefix] = {}
+		self._failed_at: Dict[str, float] = {}
+		# Keys with a create/refresh call in flight
+		self._in_progress: Set[str] = set()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.fallbacks = 0
+		self.created = 0
+		self.refreshed = 0
+		self.bytes_saved = 0
+
+	@staticmethod
+	def key(model_name: str, prefix: str) -> str:
+		return hashlib.sha256(f"{model_name}\0{prefix}".encode("utf-8")).hexdigest()
+
+	def model_for(self, model_name: str, prefix: str) -> Optional[Any]:
+		"""Return a model bound to the cached prefix, or None to send the prompt inline."""
+		if len(prefix) < self.min_prefix_chars or not self.backend.supports(model_name):
+			return None
+		key = self.key(model_name, prefix)
+		ttl = timedelta(seconds=self.ttl_seconds)
+		with self._lock:
+			now = self.clock()
+			entry = self._entries.get(key)
+			busy = key in self._in_progress
+			# Fresh, or still valid while another caller extends it
+			if entry is not None and entry.expires_at > now and (
+				entry.expires_at - now > self.refresh_margin_seconds or busy
+			):
+				self.hits += 1
+				return entry.model
+			if busy or (entry is None and now - self._failed_at.get(key, float("-inf")) < self.retry_after_seconds):
+				self.fallbacks += 1
+				return None
+			self._in_progress.add(key)
+
+		# Provider calls run outside the lock so other completions don't wait behind them
+		try:
+			if entry is not None:
+				try:
+					expires_at = self.backend.refresh(entry.handle, ttl)
+				except Exception as e:
+					logging.info(f"Refreshing cached prompt failed, recreating it: {e}")
+					with self._lock:
+						self._entries.pop(key, None)
+				else:
+					with self._lock:
+						entry.expires_at = expires_at
+						self.refreshed += 1
+						self.hits += 1
+					return entry.model
+			try:
+				handle, expires_at = self.backend.create(model_name, prefix, ttl)
+				entry = _CachedPrefix(handle, self.backend.bind(handle), expires_at)
+			except Exception as e:
+				logging.warning(f"Prompt caching unavailable for {model_name}, sending prompts inline: {e}")
+				with self._lock:
+					self._failed_at[key] = now
+					self.fallbacks += 1
+				return None
+			with self._lock:
+				self._entries[key] = entry
+				self.created += 1
+				self.hits += 1
+			return entry.model
+		finally:
+			with self._lock:
+				self._in_progress.discard(key)
+
+	def invalidate(self, model_name: str, prefix: str) -> None:
+		"""Forget the handle for prefix, e.g. after the provider reported it missing."""
+		with self._lock:
+			self._entries.pop(self.key(model_name, prefix), None)
+
+	def record_saved(self, num_bytes: int) -> None:
+		with self._lock:
+			self.bytes_saved += num_bytes
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				"prefixes": len(self._entries),
+				"hits": self.hits,
+				"fallbacks": self.fallbacks,
+				"created": self.created,
+				"refreshed": self.refreshed,
+				"bytes_saved": self.bytes_saved,
+			}
+
+
+@lru_cache()
+def get_prompt_cache() -> PromptCache:
+	"""Create and return the process-wide PromptCache used by every LLMFactory."""
+	cache_settings = get_settings().prompt_cache
+	return PromptCache(
+		GeminiCacheBackend(),
+		ttl_seconds=cache_settings.ttl_seconds,
+		refresh_margin_seconds=cache_settings.refresh_margin_seconds,
+		retry_after_seconds=cache_settings.retry_after_seconds,
+		min_prefix_chars=cache_settings.min_prefix_chars,
+	)
@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+from config.settings import get_settings
+
+# Question keywords mapped to the structured "-Answer" fields stored in each row's contents
+LABEL_MAP = {
+	"governing law": "Governing Law-Answer",
+	"renewal term": "Renewal Term-Answer",
+	"effective date": "Effective Date-Answer",
+	"expiration date": "Expiration Date-Answer",
+	"parties": "Parties-Answer",
+	"termination for convenience": "Termination For Convenience-Answer",
+	"exclusivity": "Exclusivity-Answer",
+	"revenue": "Revenue/Profit Sharing-Answer",
+	"profit sharing": "Revenue/Profit Sharing-Answer",
+}
+
+
+@dataclass
+class StructuredAnswer:
+	"""Answer read from a structured '-Answer' field; answer is None when the field wasn't found."""
+
+	label: str
+	answer: Optional[str] = None
+	supporting: List[str] = field(default_factory=list)
+	# True when served from the semantic answer cache
+	cached: bool = False
+
+
+# Search embeddings of the fixed labels, computed once per process
+_label_embeddings: Dict[str, Any] = {}
+
+
+def select_label(question: str) -> Optional[str]:
+	"""Return the '-Answer' label a question asks about, if any."""
+	q_lower = question.strip().lower()
+	for key, lbl in LABEL_MAP.items():
+		if key in q_lower:
+			return lbl
+	return None
+
+
+def extract_answer(text: str, label: str) -> Optional[str]:
+	if not text:
+		return None
+	prefix = f"{label}:"
+	lines = str(text).splitlines()
+	for line in lines:
+		if line.strip().lower().startswith(prefix.lower()):
+			val = line.split(":", 1)[1].strip()
+			return val.strip().strip("[]\"'")
+	return None
+
+
+def support_from_lines(text: str, label: str) -> List[str]:
+	lines = str(text).splitlines()
+	prefix = f"{label}:"
+	out = []
+	for i, line in enumerate(lines):
+		if line.strip().lower().startswith(prefix.lower()):
+			for j in range(i+1, min(i+4, len(lines))):
+				candidate = lines[j].strip()
+				if candidate:
+					out.append(candidate[:200])
+					if len(out) >= 2:
+						return out
+	return out
+
+
+def answer_structured_question(
+	vec: Any, question: str, filename: str, deadline: Any = None
+) -> Optional[StructuredAnswer]:
+	"""Answer a question from the structured '-Answer' fields of a document's stored rows.
+
+	Args:
+		vec: The VectorStore to search.
+		question: The user's question.
+		filename: The document the question is about (metadata filename).
+		deadline: Optional services.deadline.Deadline for the search.
+
+	Answers are cached per filename by question embedding (see
+	services.semantic_cache), so a paraphrase of an earlier question costs one
+	embedding and a local lookup.
+
+	Returns:
+		None if the question doesn't map to a known label, otherwise a
+		StructuredAnswer whose answer is None when no stored row contains it.
+	"""
+	selected_label = select_label(question)
+	if not selected_label:
+		return None
+
+	# Paraphrases of an earlier question about this document (same label) reuse its answer
+	cache = None
+	question_embedding = None
+	if get_settings().answer_cache.enabled:
+		from services.semantic_cache import get_answer_cache
+
+		cache = get_answer_cache()
+		question_embedding = vec.get_embedding(question, deadline)
+		cached = cache.lookup(filename, question_embedding, selected_label)
+		if cached is not None:
+			return replace(cached, cached=True)
+
+	label_embedding = _label_embeddings.get(selected_label)
+	if label_embedding is None:
+		label_embedding = _label_embeddings[selected_label] = vec.get_embedding(selected_label, deadline)
+	cand_df = vec.search(
+		selected_label,
+		limit=5,
+		metadata_filter={"filename": filename},
+		deadline=deadline,
+		query_embedding=label_embedding,
+	)
+	structured = StructuredAnswer(selected_label)
+	series = cand_df.get("content") if "content" in cand_df.columns else cand_df.get("contents")
+	if series is not None:
+		for txt in series.tolist():
+			ans = extract_answer(txt, selected_label)
+			if ans:
+				structured = StructuredAnswer(selected_label, ans, support_from_lines(txt, selected_label))
+				break
+	if cache is not None:
+		cache.store(filename, question_embedding, structured, selected_label)
+	return structured
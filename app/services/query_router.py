@@ -0,0 +1,266 @@
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from database.search_sql import answer_field_expression, year_expression
+from services.synthesizer import SynthesizedResponse, Synthesizer
+
+
+@dataclass(frozen=True)
+class Dimension:
+	"""A per-document attribute that aggregate questions can group or filter by."""
+
+	name: str
+	label: str
+	keywords: Tuple[str, ...]
+	expression: str
+	# Filter values are compared as years (=) instead of substrings (ILIKE)
+	is_year: bool = False
+
+
+# Keywords match whole words, so inflections are listed explicitly ("law" must not match "lawsuit").
+# When several dimensions are mentioned, the earliest mention wins; ties go to the first listed.
+DIMENSIONS = (
+	Dimension("exact_law", "exact law", ("exact law", "exact laws"), "trim(metadata->>'exact_law')"),
+	Dimension(
+		"governing_law",
+		"governing law",
+		("governing law", "governing laws", "governed by", "jurisdiction", "jurisdictions", "law"),
+		answer_field_expression("Governing Law-Answer"),
+	),
+	Dimension(
+		"document_type",
+		"agreement type",
+		(
+			"agreement type", "agreement types", "type of agreement", "types of agreement", "contract type",
+			"contract types", "type of contract", "types of contract", "document type", "document types",
+			"document name",
+		),
+		answer_field_expression("Document Name-Answer"),
+	),
+	Dimension(
+		"effective_year",
+		"effective year",
+		("effective", "start", "starts", "started", "starting", "signed", "executed"),
+		year_expression(answer_field_expression("Effective Date-Answer")),
+		is_year=True,
+	),
+	Dimension(
+		"expiration_year",
+		"expiration year",
+		("expiration", "expiry", "expire", "expires", "expired", "expiring", "end date"),
+		year_expression(answer_field_expression("Expiration Date-Answer")),
+		is_year=True,
+	),
+)
+
+# Governing-law filters only accept a named jurisdiction; anything else after
+# "governed by" / "under" (e.g. "under the statement of work") is not a filter.
+JURISDICTIONS = (
+	"alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+	"district of columbia", "florida", "georgia", "hawaii", "idaho", "illinois", "indiana", "iowa", "kansas",
+	"kentucky", "louisiana", "maine", "maryland", "massachusetts", "michigan", "minnesota", "mississippi",
+	"missouri", "montana", "nebraska", "nevada", "new hampshire", "new jersey", "new mexico", "new york",
+	"north carolina", "north dakota", "ohio", "oklahoma", "oregon", "pennsylvania", "rhode island",
+	"south carolina", "south dakota", "tennessee", "texas", "utah", "vermont", "virginia", "washington",
+	"west virginia", "wisconsin", "wyoming", "united states", "england and wales", "england", "scotland",
+	"united kingdom", "ireland", "canada", "ontario", "british columbia", "quebec", "alberta", "germany",
+	"france", "switzerland", "netherlands", "luxembourg", "sweden", "italy", "spain", "israel", "india",
+	"china", "hong kong", "singapore", "japan", "australia", "mexico", "cayman islands", "bermuda",
+)
+
+_TOP_PATTERN = re.compile(r"\b(most|least)\s+(common|frequent|frequently|often|popular|used|occurr?ing)\b")
+_BREAKDOWN_PATTERN = re.compile(r"\b(breakdown|distribution|histogram|group(ed)? by|per|by each|for each|by)\b")
+_COUNT_PATTERN = re.compile(
+	r"\b(?:how many|number of|count of|count the|total number of)\s+(?:the\s+)?(?:contracts?|agreements?|documents?)\b"
+)
+_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+_JURISDICTION_PATTERN = re.compile(
+	r"\b(" + "|".join(re.escape(name) for name in sorted(JURISDICTIONS, key=len, reverse=True)) + r")\b"
+)
+_WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?|\d+")
+# Words an aggregate question may contain besides dimension keywords, years and
+# jurisdictions. Any other word is a qualifier SQL can't express (e.g. "before",
+# "supplier", "indemnification"), so the question goes to retrieval instead.
+_AGGREGATE_WORDS = frozenset(
+	"""
+	what what's which is are was were be been do does did have has had there we i our my me you can
+	show give list tell please the a an this these those all it its and of in on to for by with from
+	across per each how many number count total overall most least common frequent frequently often
+	popular used occurring occuring appear appears occur occurs recorded breakdown distribution
+	histogram group grouped contracts contract agreements agreement documents document dataset data
+	set corpus database collection portfolio stored uploaded indexed ingested value values year years
+	date dates state states laws subject under governing governed type types name
+	""".split()
+) | frozenset(word for dimension in DIMENSIONS for keyword in dimension.keywords for word in keyword.split())
+
+
+@dataclass
+class AggregateQuery:
+	"""A question recognized as a portfolio statistic rather than a retrieval question."""
+
+	kind: str  # "count", "top" or "breakdown"
+	dimension: Optional[Dimension] = None
+	filter_dimension: Optional[Dimension] = None
+	filter_value: Optional[str] = None
+	least: bool = False
+
+
+def _mentioned_dimensions(text: str) -> List[Dimension]:
+	"""Dimensions whose keywords appear in text, ordered by first mention."""
+	positions = []
+	for order, dimension in enumerate(DIMENSIONS):
+		matches = [re.search(rf"\b{re.escape(keyword)}\b", text) for keyword in dimension.keywords]
+		starts = [match.start() for match in matches if match]
+		if starts:
+			positions.append((min(starts), order, dimension))
+	return [dimension for _, _, dimension in sorted(positions, key=lambda item: item[:2])]
+
+
+def _find_filters(text: str) -> Optional[List[Tuple[Dimension, str]]]:
+	"""Filters the question asks for, or None if it has a qualifier SQL can't express.
+
+	A year is only a filter next to a single date keyword ("expire in 2015"), and a
+	governing-law filter must name a jurisdiction from JURISDICTIONS.
+	"""
+	jurisdictions = _JURISDICTION_PATTERN.findall(text)
+	remainder = _JURISDICTION_PATTERN.sub(" ", text)
+	years = [match.group(0) for match in _YEAR_PATTERN.finditer(remainder)]
+	words = [word for word in _WORD_PATTERN.findall(remainder) if word not in years]
+	if any(word not in _AGGREGATE_WORDS for word in words):
+		return None
+
+	filters = []
+	if years:
+		year_dimensions = [dimension for dimension in _mentioned_dimensions(remainder) if dimension.is_year]
+		if len(years) > 1 or len(year_dimensions) != 1:
+			return None
+		filters.append((year_dimensions[0], years[0]))
+	if jurisdictions:
+		if len(set(jurisdictions)) > 1:
+			return None
+		governing_law = next(d for d in DIMENSIONS if d.name == "governing_law")
+		filters.append((governing_law, jurisdictions[0]))
+	return filters
+
+
+def classify(question: str) -> Optional[AggregateQuery]:
+	"""Return the aggregate query a question asks for, or None for retrieval questions.
+
+	Recognized shapes:
+		"What is the most (or least) common exact law?"         -> top
+		"Most common governing law for contracts signed in 2014" -> top with year filter
+		"Breakdown of contracts by governing law"                -> breakdown
+		"How many contracts are governed by Nevada law?"         -> count with filter
+		"How many agreements expire in 2015?"                    -> count with year filter
+		"How many contracts are in the dataset?"                 -> count
+
+	At most one filter is supported. Questions with any other qualifier, or with
+	a filter that isn't a known jurisdiction or a dated year, return None and are
+	answered by retrieval.
+	"""
+	text = question.strip().lower()
+	top = _TOP_PATTERN.search(text)
+	count = _COUNT_PATTERN.search(text)
+	breakdown = re.search(r"\b(breakdown|distribution|histogram)\b", text)
+	if not (top or count or breakdown):
+		return None
+
+	filters = _find_filters(text)
+	if filters is None or len(filters) > 1:
+		return None
+	filter_dimension, filter_value = filters[0] if filters else (None, None)
+
+	def grouping(part: str) -> Optional[Dimension]:
+		# A dimension only named to filter on ("governed by Nevada law", "signed in 2014") isn't grouped by
+		candidates = [d for d in _mentioned_dimensions(part) if d is not filter_dimension]
+		return candidates[0] if candidates else None
+
+	if top:
+		dimension = grouping(text[top.end():]) or grouping(text)
+		if dimension is not None:
+			return AggregateQuery(
+				"top",
+				dimension=dimension,
+				filter_dimension=filter_dimension,
+				filter_value=filter_value,
+				least=top.group(1) == "least",
+			)
+
+	dimension = grouping(text)
+	if count:
+		if dimension is None:
+			return AggregateQuery("count", filter_dimension=filter_dimension, filter_value=filter_value)
+		if _BREAKDOWN_PATTERN.search(text.replace("governed by", "")):
+			return AggregateQuery(
+				"breakdown", dimension=dimension, filter_dimension=filter_dimension, filter_value=filter_value
+			)
+		return None
+
+	if breakdown and dimension is not None:
+		return AggregateQuery(
+			"breakdown", dimension=dimension, filter_dimension=filter_dimension, filter_value=filter_value
+		)
+	return None
+
+
+def run_aggregate(vec: Any, query: AggregateQuery) -> SynthesizedResponse:
+	"""Answer an aggregate query exactly with SQL over the stored rows."""
+	start_time = time.time()
+	condition = None
+	params = {}
+	if query.filter_dimension is not None:
+		if query.filter_dimension.is_year:
+			condition = f"{query.filter_dimension.expression} = %(filter_value)s"
+			params["filter_value"] = query.filter_value
+		else:
+			condition = f"{query.filter_dimension.expression} ILIKE %(filter_value)s"
+			params["filter_value"] = f"%{query.filter_value}%"
+
+	if query.kind == "count":
+		(_, documents), = vec.aggregate(condition=condition, params=params)
+		if query.filter_dimension is not None:
+			answer = f"{documents} contracts have a {query.filter_dimension.label} matching '{query.filter_value}'."
+		else:
+			answer = f"The dataset contains {documents} contracts."
+		rows: List[Tuple[Any, int]] = []
+	else:
+		rows = vec.aggregate(query.dimension.expression, condition, params)
+		if not rows:
+			answer = f"No contracts have a recorded {query.dimension.label}."
+		elif query.kind == "top":
+			counts = [count for _, count in rows]
+			target = min(counts) if query.least else max(counts)
+			values = [str(value) for value, count in rows if count == target]
+			adjective = "least" if query.least else "most"
+			answer = (
+				f"The {adjective} frequent {query.dimension.label} is {' / '.join(values)} "
+				f"({target} of {sum(counts)} contracts with a recorded {query.dimension.label})."
+			)
+		else:
+			answer = f"Contracts by {query.dimension.label}:\n" + "\n".join(
+				f"- {value}: {count}" for value, count in rows
+			)
+	elapsed_time = time.time() - start_time
+	logging.info(f"Answered {query.kind} aggregate with SQL in {elapsed_time:.3f} seconds")
+	return SynthesizedResponse(
+		thought_process=[
+			f"Recognized a {query.kind} question"
+			+ (f" over {query.dimension.label}" if query.dimension else "")
+			+ (f" filtered by {query.filter_dimension.label}" if query.filter_dimension else ""),
+			"Answered exactly with a SQL aggregate over the stored contract metadata; no retrieval or LLM call",
+		],
+		answer=answer,
+		enough_context=True,
+	)
+
+
+def answer_question(vec: Any, question: str, limit: int = 3, deadline: Any = None) -> SynthesizedResponse:
+	"""Answer aggregate questions with SQL and everything else with retrieval + Synthesizer."""
+	query = classify(question)
+	if query is not None:
+		return run_aggregate(vec, query)
+	results = vec.search(question, limit=limit, deadline=deadline)
+	return Synthesizer.generate_response(question=question, context=results, deadline=deadline)
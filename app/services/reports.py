@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Iterable, List, Tuple
+from xml.sax.saxutils import escape
+
+from config.settings import get_settings
+
+
+def generate_pdf_with_features(response_text, uploaded_pdf_name, report_title: str = "Analysis Report"):
+	"""
+	Generate a styled PDF based on input text, including bold, normal text, and bullet points.
+	The uploaded PDF's name (without extension) is displayed as the title of the output PDF.
+	"""
+	from reportlab.lib.pagesizes import letter
+	from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+	from reportlab.lib.styles import getSampleStyleSheet
+
+	# Remove the .pdf extension from the uploaded file name
+	pdf_name = uploaded_pdf_name.rsplit(".", 1)[0]
+	title_text = f"{pdf_name} {report_title}"
+
+	# Create an in-memory file
+	buffer = BytesIO()
+	doc = SimpleDocTemplate(buffer, pagesize=letter)
+	styles = getSampleStyleSheet()
+
+	# Define styles
+	normal_style = styles['Normal']
+	bold_style = styles['Heading1']
+	title_style = styles['Title']
+
+	# Create a list to hold Paragraph objects
+	paragraphs = []
+
+	# Add title
+	paragraphs.append(Paragraph(title_text, title_style))
+	paragraphs.append(Spacer(1, 20))  # Add spacing after the title
+
+	# Process the response_text
+	if not response_text or not response_text.strip():
+		response_text = "No analysis generated."
+	lines = response_text.split('\n')
+	for line in lines:
+		if line.startswith('**') and line.endswith('**'):
+			# Bold text (heading-like)
+			heading_text = escape(line.strip('**'))
+			paragraphs.append(Paragraph(heading_text, bold_style))
+			paragraphs.append(Spacer(1, 12))  # Add spacing after headings
+		elif line.startswith('- '):
+			# Bullet points
+			bullet_text = escape(line)
+			paragraphs.append(Paragraph(bullet_text, normal_style))
+		else:
+			# Normal text
+			paragraphs.append(Paragraph(escape(line), normal_style))
+			paragraphs.append(Spacer(1, 10))  # Add spacing after paragraphs
+
+	# Build the PDF
+	doc.build(paragraphs)
+	buffer.seek(0)
+	return buffer
+
+
+class ReportRenderer:
+	"""Render PDF reports once on a background worker and cache the bytes.
+
+	Reports are keyed by (sha256 of the report text, file name, title), so
+	Streamlit reruns and repeated clicks reuse the rendered bytes instead of
+	running ReportLab again. The cache is a bounded LRU of futures; a failed
+	render is evicted so it can be retried.
+	"""
+
+	def __init__(self, max_workers: int = 2, cache_size: int = 64):
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-render")
+		self._cache: "OrderedDict[str, Future]" = OrderedDict()
+		self._cache_size = cache_size
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def report_key(response_text: str, file_name: str, report_title: str = "Analysis Report") -> str:
+		"""Return the cache key for a report."""
+		digest = hashlib.sha256()
+		for part in (report_title, file_name, response_text or ""):
+			digest.update(part.encode("utf-8"))
+			digest.update(b"\0")
+		return digest.hexdigest()
+
+	@staticmethod
+	def output_name(response_text: str, file_name: str, report_title: str = "Analysis Report") -> str:
+		"""Stable download/disk file name for a report (same content -> same name)."""
+		key = ReportRenderer.report_key(response_text, file_name, report_title)
+		return f"{file_name.rsplit('.', 1)[0]}_analysis_{key[:12]}.pdf"
+
+	def _submit(self, key: str, fn, *args) -> Future:
+		with self._lock:
+			future = self._cache.get(key)
+			if future is not None and not (future.done() and future.exception() is not None):
+				self._cache.move_to_end(key)
+				return future
+			future = self._executor.submit(fn, *args)
+			self._cache[key] = future
+			while len(self._cache) > self._cache_size:
+				self._cache.popitem(last=False)
+			return future
+
+	def submit(self, response_text: str, file_name: str, report_title: str = "Analysis Report") -> Future:
+		"""Schedule rendering (if not already cached) and return a future of the PDF bytes."""
+		key = self.report_key(response_text, file_name, report_title)
+		return self._submit(key, self._render, response_text, file_name, report_title)
+
+	def get(self, response_text: str, file_name: str, report_title: str = "Analysis Report") -> bytes:
+		"""Return the rendered PDF bytes, waiting for the background render if needed."""
+		return self.submit(response_text, file_name, report_title).result()
+
+	def save(
+		self,
+		response_text: str,
+		file_name: str,
+		reports_dir: Path,
+		report_title: str = "Analysis Report",
+	) -> Path:
+		"""Write the report to reports_dir unless an identical report is already there."""
+		out_path = Path(reports_dir) / self.output_name(response_text, file_name, report_title)
+		if not out_path.exists():
+			out_path.parent.mkdir(parents=True, exist_ok=True)
+			out_path.write_bytes(self.get(response_text, file_name, report_title))
+			logging.info(f"Saved report to {out_path}")
+		return out_path
+
+	def get_zip(self, reports: Iterable[Tuple[str, str]], report_title: str = "Analysis Report") -> bytes:
+		"""Return a zip archive containing the PDF for every (response_text, file_name) pair."""
+		reports = list(reports)
+		keys = [self.report_key(text, name, report_title) for text, name in reports]
+		zip_key = "zip:" + hashlib.sha256("".join(keys).encode("utf-8")).hexdigest()
+		futures = [self.submit(text, name, report_title) for text, name in reports]
+		return self._submit(zip_key, self._build_zip, reports, futures, report_title).result()
+
+	@staticmethod
+	def _render(response_text: str, file_name: str, report_title: str) -> bytes:
+		return generate_pdf_with_features(response_text, file_name, report_title).getvalue()
+
+	@staticmethod
+	def _build_zip(reports: List[Tuple[str, str]], futures: List[Future], report_title: str) -> bytes:
+		buffer = BytesIO()
+		with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+			for (text, name), future in zip(reports, futures):
+				archive.writestr(ReportRenderer.output_name(text, name, report_title), future.result())
+		return buffer.getvalue()
+
+
+@lru_cache()
+def get_report_renderer() -> ReportRenderer:
+	"""Create and return the process-wide ReportRenderer, shared across Streamlit sessions and reruns."""
+	report_settings = get_settings().reports
+	return ReportRenderer(
+		max_workers=report_settings.max_workers,
+		cache_size=report_settings.cache_size,
+	)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional
+
+from config.settings import get_settings
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+	"a an and are as at be by for from has have in is it its of on or shall that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+	return [t for t in _TOKEN_PATTERN.findall(str(text).lower()) if t not in _STOPWORDS]
+
+
+def bm25_scores(query: str, documents: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+	"""Okapi BM25 score of each document for query, with IDF taken over documents."""
+	docs = [Counter(tokenize(doc)) for doc in documents]
+	if not docs:
+		return []
+	lengths = [sum(doc.values()) for doc in docs]
+	avg_length = sum(lengths) / len(docs) or 1.0
+	query_terms = set(tokenize(query))
+	doc_freq = Counter(term for doc in docs for term in doc if term in query_terms)
+	scores = []
+	for doc, length in zip(docs, lengths):
+		score = 0.0
+		for term in query_terms:
+			tf = doc.get(term)
+			if not tf:
+				continue
+			df = doc_freq[term]
+			idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+			score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+		scores.append(score)
+	return scores
+
+
+class Reranker:
+	"""Rescore over-fetched search results and keep only the relevant chunks.
+
+	The "hybrid" method mixes BM25 over the candidate set (scaled to 0-1 by the
+	best candidate) with the cosine similarity from the vector search. The
+	"cross_encoder" method scores (query, chunk) pairs with a locally stored
+	sentence-transformers CrossEncoder on CPU. Chunks below min_score are
+	dropped, keeping at least min_chunks and at most max_chunks, best first.
+	"""
+
+	def __init__(
+		self,
+		method: str = "hybrid",
+		max_chunks: int = 6,
+		min_score: float = 0.35,
+		min_chunks: int = 1,
+		lexical_weight: float = 0.3,
+		cross_encoder_path: Optional[str] = None,
+	):
+		self.method = method
+		self.max_chunks = max_chunks
+		self.min_score = min_score
+		self.min_chunks = min_chunks
+		self.lexical_weight = lexical_weight
+		self._cross_encoder = None
+		if method == "cross_encoder":
+			if not cross_encoder_path:
+				raise ValueError("RERANKER_MODEL_PATH must be set for the cross_encoder reranker")
+			from sentence_transformers import CrossEncoder
+
+			self._cross_encoder = CrossEncoder(cross_encoder_path, device="cpu", local_files_only=True)
+		elif method != "hybrid":
+			raise ValueError(f"Unsupported reranker method: {method}")
+
+	def score(self, query: str, texts: List[str], distances: Optional[List[float]] = None) -> List[float]:
+		"""Relevance of each text to query, roughly in [0, 1]."""
+		if self._cross_encoder is not None:
+			logits = self._cross_encoder.predict([(query, text) for text in texts])
+			return [1 / (1 + math.exp(-float(logit))) for logit in logits]
+		lexical = bm25_scores(query, texts)
+		best = max(lexical, default=0.0) or 1.0
+		similarities = [1 - float(d) for d in distances] if distances is not None else [0.0] * len(texts)
+		return [
+			self.lexical_weight * (lex / best) + (1 - self.lexical_weight) * sim
+			for lex, sim in zip(lexical, similarities)
+		]
+
+	def rerank(self, query: str, candidates: pd.DataFrame) -> pd.DataFrame:
+		"""Return the relevant candidates, best first, with a rerank_score column."""
+		if candidates is None or candidates.empty:
+			return candidates
+		start_time = time.time()
+		text_column = "content" if "content" in candidates.columns else "contents"
+		distances = candidates["distance"].tolist() if "distance" in candidates.columns else None
+		ranked = candidates.assign(
+			rerank_score=self.score(query, candidates[text_column].astype(str).tolist(), distances)
+		).sort_values("rerank_score", ascending=False)
+		keep = max(self.min_chunks, int((ranked["rerank_score"] >= self.min_score).sum()))
+		ranked = ranked.head(min(keep, self.max_chunks)).reset_index(drop=True)
+		elapsed_time = time.time() - start_time
+		logging.info(
+			f"Reranked {len(candidates)} candidates to {len(ranked)} chunks in {elapsed_time:.3f} seconds"
+		)
+		return ranked
+
+
+@lru_cache()
+def get_reranker() -> Reranker:
+	"""Create and return the process-wide Reranker (a cross-encoder is loaded once)."""
+	reranker_settings = get_settings().reranker
+	return Reranker(
+		method=reranker_settings.method,
+		max_chunks=reranker_settings.max_chunks,
+		min_score=reranker_settings.min_score,
+		min_chunks=reranker_settings.min_chunks,
+		lexical_weight=reranker_settings.lexical_weight,
+		cross_encoder_path=reranker_settings.cross_encoder_path,
+	)
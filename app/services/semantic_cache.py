@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
+
+from config.settings import get_settings
+
+if TYPE_CHECKING:
+	import numpy as np
+
+
+@dataclass
+class _CacheEntry:
+	embedding: np.ndarray
+	label: Optional[str]
+	value: Any
+	created_at: float
+
+
+@dataclass
+class _DocumentEntries:
+	fingerprint: Optional[str] = None
+	checked_at: float = 0.0
+	entries: List[_CacheEntry] = field(default_factory=list)
+
+
+class SemanticAnswerCache:
+	"""In-process cache of answers per document, matched by question embedding.
+
+	A question whose embedding has cosine similarity >= similarity_threshold with
+	a cached question about the same filename reuses that answer, so paraphrases
+	cost one embedding and a local dot product instead of a retrieval. Only
+	entries stored under the same label can match, since e.g. "effective date"
+	and "expiration date" questions embed close together. Entries expire after ttl_seconds. A document's entries are dropped
+	when its fingerprint (see VectorStore.document_fingerprint) changes, i.e. when
+	it was re-ingested; the fingerprint is re-read at most every
+	fingerprint_ttl_seconds.
+	"""
+
+	def __init__(
+		self,
+		fingerprint: Callable[[str], str],
+		similarity_threshold: float = 0.92,
+		ttl_seconds: float = 3600.0,
+		max_entries_per_document: int = 256,
+		fingerprint_ttl_seconds: float = 30.0,
+		max_documents: int = 512,
+	):
+		self._fingerprint = fingerprint
+		self.similarity_threshold = similarity_threshold
+		self.ttl_seconds = ttl_seconds
+		self.max_entries_per_document = max_entries_per_document
+		self.fingerprint_ttl_seconds = fingerprint_ttl_seconds
+		self.max_documents = max_documents
+		# LRU of documents; the least recently used one is dropped beyond max_documents
+		self._documents: "OrderedDict[str, _DocumentEntries]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def _document(self, filename: str) -> _DocumentEntries:
+		"""Return (creating if needed) the entries of filename; call with the lock held."""
+		document = self._documents.get(filename)
+		if document is None:
+			document = self._documents[filename] = _DocumentEntries()
+			while len(self._documents) > self.max_documents:
+				self._documents.popitem(last=False)
+		else:
+			self._documents.move_to_end(filename)
+		return document
+
+	def _refresh(self, filename: str) -> None:
+		"""Drop the document's entries if its stored rows changed since the last check."""
+		with self._lock:
+			document = self._document(filename)
+			if time.time() - document.checked_at < self.fingerprint_ttl_seconds:
+				return
+		current = self._fingerprint(filename)
+		with self._lock:
+			document = self._document(filename)
+			if document.fingerprint != current:
+				document.entries.clear()
+				document.fingerprint = current
+			document.checked_at = time.time()
+
+	@staticmethod
+	def _normalize(embedding: Any) -> np.ndarray:
+		import numpy as np
+
+		vector = np.asarray(embedding, dtype=np.float32)
+		return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+	def lookup(self, filename: str, embedding: Any, label: Optional[str] = None) -> Optional[Any]:
+		"""Return the cached value of the most similar question about filename, or None."""
+		import numpy as np
+
+		self._refresh(filename)
+		query = self._normalize(embedding)
+		now = time.time()
+		with self._lock:
+			document = self._document(filename)
+			document.entries = [e for e in document.entries if now - e.created_at < self.ttl_seconds]
+			candidates = [e for e in document.entries if e.label == label]
+			if candidates:
+				similarities = np.stack([e.embedding for e in candidates]) @ query
+				best = int(np.argmax(similarities))
+				if similarities[best] >= self.similarity_threshold:
+					self.hits += 1
+					return candidates[best].value
+			self.misses += 1
+		return None
+
+	def store(self, filename: str, embedding: Any, value: Any, label: Optional[str] = None) -> None:
+		"""Cache value as the answer to the question with this embedding."""
+		self._refresh(filename)
+		entry = _CacheEntry(self._normalize(embedding), label, value, time.time())
+		with self._lock:
+			entries = self._document(filename).entries
+			entries.append(entry)
+			del entries[:-self.max_entries_per_document]
+
+	def invalidate(self, filename: str) -> None:
+		"""Drop every cached answer about filename."""
+		with self._lock:
+			self._documents.pop(filename, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._documents.clear()
+
+	def stats(self) -> dict:
+		with self._lock:
+			entries = sum(len(d.entries) for d in self._documents.values())
+			return {"documents": len(self._documents), "entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache()
+def get_answer_cache() -> SemanticAnswerCache:
+	"""Create and return the process-wide answer cache, shared across Streamlit sessions and reruns."""
+	from database.vector_store import get_vector_store
+
+	cache_settings = get_settings().answer_cache
+	return SemanticAnswerCache(
+		lambda filename: get_vector_store().document_fingerprint(filename),
+		similarity_threshold=cache_settings.similarity_threshold,
+		ttl_seconds=cache_settings.ttl_seconds,
+		max_entries_per_document=cache_settings.max_entries_per_document,
+		fingerprint_ttl_seconds=cache_settings.fingerprint_ttl_seconds,
+		max_documents=cache_settings.max_documents,
+	)
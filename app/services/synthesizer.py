@@ -1,8 +1,15 @@
-from typing import List
-import pandas as pd
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 from pydantic import BaseModel, Field
 from services.llm_factory import LLMFactory
 
+if TYPE_CHECKING:
+	import pandas as pd
+
+	from services.deadline import Deadline
+
 
 class SynthesizedResponse(BaseModel):
 	thought_process: List[str] = Field(
@@ -14,6 +21,26 @@ class SynthesizedResponse(BaseModel):
 	)
 
 
+# Rubric categories and weights of SYSTEM_PROMPT (and generate_fallback_report)
+RUBRIC_WEIGHTS = {
+	"Core legal protections": 30,
+	"Data protection and confidentiality": 20,
+	"Operational clarity": 20,
+	"Compliance with applicable law": 20,
+	"Drafting quality and completeness": 10,
+}
+
+
+class SectionAnalysis(SynthesizedResponse):
+	category_scores: Dict[str, float] = Field(
+		default_factory=dict,
+		description="Points per rubric category supported by the analyzed text, between 0 and the category weight",
+	)
+	sections: int = Field(default=1, description="Number of contract sections analyzed")
+	sections_skipped: int = Field(default=0, description="Sections read but not analyzed (failed call or time budget)")
+	unread_sections: bool = Field(default=False, description="Whether later sections were never read (time budget or section limit)")
+
+
 class Synthesizer:
 	SYSTEM_PROMPT = """
 	 # Role and Purpose
@@ -60,15 +87,38 @@ You are an AI assistant designed to evaluate contracts for compliance, risk, and
 
 	"""
 
+	SECTION_PROMPT = """
+# Role and Purpose
+You are an AI assistant extracting compliance evidence from one section of a longer commercial contract. Other sections are analyzed separately and the results are merged, so only report what this section contains.
+
+# Guidelines:
+1. List the clauses in this section that matter for compliance and risk (indemnities, liability caps, warranties, confidentiality, data protection, scope, SLAs, termination, change control, governing law, export, anti-bribery, IP ownership/license, definitions, precedence, severability).
+2. Note drafting problems: ambiguous terms, placeholders (TBD, to be agreed), conflicting provisions.
+3. Score each rubric category by how well THIS section covers it, from 0 up to the category weight. Use 0 for categories the section does not address:
+   - Core legal protections: 30
+   - Data protection and confidentiality: 20
+   - Operational clarity: 20
+   - Compliance with applicable law: 20
+   - Drafting quality and completeness: 10
+4. Reply with JSON only, with these keys:
+   - "thought_process": list of short strings
+   - "answer": at most 5 bullet points ("- ...") with the section's strengths and gaps, citing clause numbers when present
+   - "enough_context": false if the section has no substantive contract terms, else true
+   - "category_scores": object mapping each category name above to its score
+	"""
+
 	   
 	    
 	@staticmethod
-	def generate_response(question: str, context: pd.DataFrame, concise_answer: bool = False) -> SynthesizedResponse:
+	def generate_response(
+		question: str, context: pd.DataFrame, concise_answer: bool = False, deadline: Optional[Deadline] = None
+	) -> SynthesizedResponse:
 		"""Generates a synthesized response based on the question and context.
 
 		Args:
 			question: The user's question.
 			context: The relevant context retrieved from the knowledge base.
+			deadline: Optional request deadline for the completion call.
 
 		Returns:
 			A SynthesizedResponse containing thought process and answer.
@@ -98,6 +148,143 @@ You are an AI assistant designed to evaluate contracts for compliance, risk, and
 		return llm.create_completion(
 			response_model=SynthesizedResponse,
 			messages=messages,
+			deadline=deadline,
+		)
+
+	@staticmethod
+	def analyze_section(
+		section: str, index: int, context_str: str, deadline: Optional[Deadline] = None
+	) -> SectionAnalysis:
+		"""Map step: extract compliance findings and rubric scores from one contract section."""
+		messages = [
+			{"role": "system", "content": Synthesizer.SECTION_PROMPT},
+			{"role": "user", "content": f"# Contract section {index}:\n{section}"},
+			{"role": "assistant", "content": f"# Retrieved reference information:\n{context_str}"},
+		]
+		llm = LLMFactory("google_gemini")
+		return llm.create_completion(
+			response_model=SectionAnalysis,
+			messages=messages,
+			deadline=deadline,
+			response_mime_type="application/json",
+			# Exhausted retries raise, so the section is counted as skipped rather than empty
+			raise_on_rate_limit=True,
+		)
+
+	@staticmethod
+	def generate_sectioned_response(
+		sections: Iterable[str],
+		context: pd.DataFrame,
+		max_concurrency: int = 4,
+		max_sections: Optional[int] = None,
+		deadline: Optional[Deadline] = None,
+	) -> SectionAnalysis:
+		"""Map-reduce compliance analysis of a long contract.
+
+		Each section is analyzed by its own completion call, at most
+		max_concurrency at a time; sections are read from the iterable only as
+		slots free up. The partial results are merged: findings are concatenated
+		in section order, and each rubric category gets the highest score any
+		section supports (a clause only needs to appear once in the contract).
+		A section whose call fails (rate limit, blocked or malformed response)
+		is logged and counted in sections_skipped; the rest are still merged.
+		When the deadline runs out or max_sections is reached, no further
+		sections are read and unread_sections is set.
+
+		Args:
+			sections: Contract text split into sections (see pdf_document.iter_sections).
+			context: Retrieved reference rows, sent along with every section.
+			max_concurrency: Completion calls in flight at once.
+			max_sections: Analyze at most this many sections; the rest are not read.
+			deadline: Optional request deadline shared by all section calls.
+
+		Raises:
+			DeadlineExceeded: If the deadline ran out before any section was analyzed.
+			Exception: The last section's error, if every section failed.
+		"""
+		from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+		from itertools import islice
+
+		from services.deadline import DeadlineExceeded
+
+		context_str = Synthesizer.dataframe_to_json(context, columns_to_keep=["content", "filename"])
+		section_iter = iter(sections)
+		limited = islice(section_iter, max_sections) if max_sections is not None else section_iter
+		results: Dict[int, SectionAnalysis] = {}
+		limit = max(1, max_concurrency)
+		skipped = 0
+		unread = False
+		read = 0
+		last_error: Optional[BaseException] = None
+
+		def collect(future, index: int) -> None:
+			nonlocal skipped, last_error
+			try:
+				results[index] = future.result()
+			except Exception as e:
+				logging.warning(f"Analysis of contract section {index} failed: {type(e).__name__}: {e}")
+				skipped += 1
+				last_error = e
+
+		with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="section-analysis") as executor:
+			pending = {}
+			for index, section in enumerate(limited, start=1):
+				read = index
+				if isinstance(last_error, DeadlineExceeded) or (deadline is not None and deadline.expired()):
+					# Stop reading: the rest of the document is left unextracted
+					skipped += 1
+					unread = True
+					break
+				pending[executor.submit(Synthesizer.analyze_section, section, index, context_str, deadline)] = index
+				while len(pending) >= limit:
+					done, _ = wait(pending, return_when=FIRST_COMPLETED)
+					for future in done:
+						collect(future, pending.pop(future))
+			for future, index in pending.items():
+				collect(future, index)
+		if max_sections is not None and not unread:
+			# Reads at most one more section to tell whether the limit cut the contract short
+			unread = next(section_iter, None) is not None
+		if not results:
+			raise last_error or DeadlineExceeded("No contract section was analyzed")
+
+		merged = Synthesizer.merge_section_analyses([results[i] for i in sorted(results)], sorted(results))
+		merged.sections_skipped = skipped
+		merged.unread_sections = unread
+		if skipped:
+			logging.warning(f"Section analysis skipped {skipped} of {len(results) + skipped} sections")
+			merged.answer += f"\n\n- {skipped} section{'s' if skipped != 1 else ''} could not be analyzed."
+		if unread:
+			merged.answer += f"\n\n- Sections after section {read} were not analyzed (time budget or section limit)."
+		return merged
+
+	@staticmethod
+	def merge_section_analyses(analyses: List[SectionAnalysis], indexes: List[int]) -> SectionAnalysis:
+		"""Reduce step: combine per-section analyses into one response and rubric score."""
+		thought_process: List[str] = []
+		answers: List[str] = []
+		category_scores: Dict[str, float] = {}
+		for index, analysis in zip(indexes, analyses):
+			thought_process.extend(f"Section {index}: {thought}" for thought in analysis.thought_process)
+			if not analysis.enough_context:
+				continue
+			if analysis.answer.strip():
+				answers.append(f"Section {index}:\n{analysis.answer.strip()}")
+			for category, score in analysis.category_scores.items():
+				weight = RUBRIC_WEIGHTS.get(category)
+				if weight is None:
+					continue
+				try:
+					score = max(0.0, min(float(weight), float(score)))
+				except (TypeError, ValueError):
+					continue
+				category_scores[category] = max(category_scores.get(category, 0.0), score)
+		return SectionAnalysis(
+			thought_process=thought_process,
+			answer="\n\n".join(answers),
+			enough_context=any(analysis.enough_context for analysis in analyses),
+			category_scores=category_scores,
+			sections=len(analyses),
 		)
 
 	@staticmethod
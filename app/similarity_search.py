@@ -1,6 +1,6 @@
 from datetime import datetime
 from database.vector_store import VectorStore
-from services.synthesizer import Synthesizer
+from services.query_router import answer_question
 from timescale_vector import client
 
 # Initialize VectorStore
@@ -12,11 +12,9 @@ vec = VectorStore()
 
 #relevant_question = "What is the most frequently occuring exact law in the dataset?"
 relevant_question = "Explain the discrepancy of CybergyHoldingsInc_20140520_10-Q_EX-10.27_8605784_EX-10.27_Affiliate Agreement.pdf"
-results = vec.search(relevant_question, limit=3)
-print(results.columns)
-
-
-response = Synthesizer.generate_response(question=relevant_question, context=results)
+# Aggregate questions (counts, most common exact law, ...) are answered with SQL;
+# everything else goes through retrieval + Synthesizer
+response = answer_question(vec, relevant_question, limit=3)
 
 print(f"\n{response.answer}")
 print("\nThought process:")
@@ -30,9 +28,7 @@ print(f"\nContext: {response.enough_context}")
 
 """irrelevant_question = "Explain the discrepancy of CybergyHoldingsInc_20140520_10-Q_EX-10.27_8605784_EX-10.27_Affiliate Agreement.pdf"
 
-results = vec.search(irrelevant_question, limit=3)
-
-response = Synthesizer.generate_response(question=irrelevant_question, context=results)
+response = answer_question(vec, irrelevant_question, limit=3)
 
 print(f"\n{response.answer}")
 print("\nThought process:")
@@ -0,0 +1,206 @@
+"""Administrative commands for the vector table.
+
+Usage:
+    python app/vector_admin.py footprint
+    python app/vector_admin.py recall --sample 50 --k 10
+    python app/vector_admin.py create-index
+    python app/vector_admin.py dimensions --dims 256 384 --sample 2000
+    python app/vector_admin.py lifecycle
+    python app/vector_admin.py chunks
+    python app/vector_admin.py metadata-indexes
+    python app/vector_admin.py analysis-store --prune
+"""
+
+import argparse
+
+from config.settings import get_settings
+from database.vector_store import VectorStore
+
+
+def _format_bytes(num_bytes) -> str:
+    if num_bytes is None:
+        return "-"
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def cmd_footprint(vec: VectorStore, args: argparse.Namespace) -> None:
+    footprint = vec.storage_footprint()
+    print(f"Storage mode: {vec.vector_settings.storage_mode}")
+    for key in ("table_bytes", "index_bytes", "toast_bytes", "total_bytes"):
+        print(f"{key:>12}: {_format_bytes(footprint[key])}")
+    print("Indexes:")
+    for name, size in footprint["indexes"].items():
+        print(f"  {name}: {_format_bytes(size)}")
+
+
+def cmd_recall(vec: VectorStore, args: argparse.Namespace) -> None:
+    if vec.vector_settings.storage_mode == "float":
+        print("Storage mode is 'float'; set VECTOR_STORAGE_MODE=halfvec or binary to measure quantized recall.")
+        return
+    recall = vec.measure_recall(sample_size=args.sample, k=args.k)
+    print(
+        f"Recall@{args.k} of {vec.vector_settings.storage_mode} search "
+        f"(rescore factor {vec.vector_settings.rescore_factor}) over {args.sample} queries: {recall:.3f}"
+    )
+
+
+def cmd_create_index(vec: VectorStore, args: argparse.Namespace) -> None:
+    vec.create_index()
+    print(f"Index ensured for storage mode '{vec.vector_settings.storage_mode}'")
+
+
+# Typical questions asked through main.py, used as default evaluation queries
+DEFAULT_EVAL_QUERIES = [
+    "What is the governing law?",
+    "What is the renewal term?",
+    "What is the effective date?",
+    "What is the expiration date?",
+    "Who are the parties to the agreement?",
+    "Is there a termination for convenience clause?",
+    "Does the agreement grant exclusivity?",
+    "Is there revenue or profit sharing?",
+    "indemnity",
+    "limitation of liability",
+    "confidentiality",
+    "intellectual property license",
+]
+
+
+def _top_k(corpus, queries, dims: int, k: int):
+    import numpy as np
+
+    def normalize(matrix):
+        truncated = matrix[:, :dims]
+        norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+        return truncated / np.maximum(norms, 1e-12)
+
+    scores = normalize(queries) @ normalize(corpus).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def cmd_dimensions(vec: VectorStore, args: argparse.Namespace) -> None:
+    """Compare retrieval at reduced dimensions against the full-dimension baseline.
+
+    Gemini's output_dimensionality truncates the (Matryoshka-trained) embedding,
+    so reduced vectors are simulated by truncating and re-normalizing the stored
+    full-dimension embeddings; only the queries are embedded through the API.
+    """
+    full_dims = vec.vector_settings.embedding_dimensions
+    corpus = vec.sample_embeddings(args.sample)
+    if not len(corpus):
+        print("The vector table is empty.")
+        return
+    queries_text = DEFAULT_EVAL_QUERIES
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries_text = [line.strip() for line in f if line.strip()]
+    queries = vec.get_embeddings(queries_text, output_dimensionality=full_dims)
+
+    k = min(args.k, len(corpus))
+    baseline = _top_k(corpus, queries, full_dims, k)
+    print(f"Baseline: {full_dims} dims, {len(corpus)} stored rows, {len(queries_text)} queries")
+    for dims in sorted(args.dims):
+        if dims > full_dims:
+            print(f"{dims:>5} dims: skipped (larger than stored {full_dims})")
+            continue
+        reduced = _top_k(corpus, queries, dims, k)
+        recall = sum(len(set(a) & set(b)) for a, b in zip(baseline, reduced)) / (k * len(queries_text))
+        print(f"{dims:>5} dims: recall@{k} = {recall:.3f}, storage {dims / full_dims:.0%} of baseline")
+
+
+def cmd_lifecycle(vec: VectorStore, args: argparse.Namespace) -> None:
+    policies = vec.apply_lifecycle_policies()
+    for name, interval in policies.items():
+        print(f"{name}: {interval if interval is not None else 'disabled'}")
+    horizon = vec.vector_settings.default_search_horizon
+    print(f"default_search_horizon: {horizon if horizon is not None else 'disabled'}")
+
+
+def cmd_chunks(vec: VectorStore, args: argparse.Namespace) -> None:
+    chunks = vec.chunk_report()
+    total = 0
+    for chunk in chunks:
+        total += chunk["total_bytes"] or 0
+        state = "compressed" if chunk["is_compressed"] else "uncompressed"
+        print(
+            f"{chunk['chunk']}: {chunk['range_start']} -> {chunk['range_end']}, "
+            f"{state}, {_format_bytes(chunk['total_bytes'])}"
+        )
+    print(f"{len(chunks)} chunks, {_format_bytes(total)} total")
+
+
+def cmd_metadata_indexes(vec: VectorStore, args: argparse.Namespace) -> None:
+    vec.create_metadata_indexes()
+    print(f"Metadata indexes ensured for: {', '.join(vec.vector_settings.indexed_metadata_keys)}")
+
+
+def cmd_analysis_store(vec: VectorStore, args: argparse.Namespace) -> None:
+    from database.analysis_store import get_analysis_store
+    from services.analysis import pipeline_version
+
+    store = get_analysis_store()
+    current = pipeline_version()
+    if args.clear:
+        print(f"Deleted {store.prune()} stored analyses")
+    elif args.prune:
+        print(f"Deleted {store.prune(keep_version=current)} analyses from older pipeline versions")
+    print(f"Current pipeline version: {current}")
+    for version, count in sorted(store.stats().items()):
+        marker = " (current)" if version == current else ""
+        print(f"  {version}: {count} analyses{marker}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Vector table administration")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("footprint", help="Show table and index sizes").set_defaults(func=cmd_footprint)
+
+    recall = subparsers.add_parser("recall", help="Measure quantized search recall against exact search")
+    recall.add_argument("--sample", type=int, default=50, help="Number of stored rows used as queries")
+    recall.add_argument("--k", type=int, default=10, help="Number of neighbours compared per query")
+    recall.set_defaults(func=cmd_recall)
+
+    subparsers.add_parser(
+        "create-index", help="Create the embedding index for the configured storage mode"
+    ).set_defaults(func=cmd_create_index)
+
+    dimensions = subparsers.add_parser(
+        "dimensions", help="Measure retrieval quality of reduced embedding dimensions vs. the stored baseline"
+    )
+    dimensions.add_argument("--dims", type=int, nargs="+", default=[256, 384, 512])
+    dimensions.add_argument("--sample", type=int, default=2000, help="Number of stored rows used as the corpus")
+    dimensions.add_argument("--k", type=int, default=10)
+    dimensions.add_argument("--queries-file", help="Text file with one evaluation query per line")
+    dimensions.set_defaults(func=cmd_dimensions)
+
+    subparsers.add_parser(
+        "lifecycle", help="Apply the configured compression and retention policies"
+    ).set_defaults(func=cmd_lifecycle)
+    subparsers.add_parser("chunks", help="Show hypertable chunk ranges and sizes").set_defaults(func=cmd_chunks)
+    subparsers.add_parser(
+        "metadata-indexes", help="Create GIN and per-key expression indexes on metadata"
+    ).set_defaults(func=cmd_metadata_indexes)
+
+    analysis_store = subparsers.add_parser(
+        "analysis-store", help="Show stored contract analyses per pipeline version"
+    )
+    analysis_store.add_argument("--prune", action="store_true", help="Delete analyses from older pipeline versions")
+    analysis_store.add_argument("--clear", action="store_true", help="Delete all stored analyses")
+    analysis_store.set_defaults(func=cmd_analysis_store)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    get_settings()
+    args.func(VectorStore(), args)
+
+
+if __name__ == "__main__":
+    main()
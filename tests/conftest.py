@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app modules import each other as top-level packages (config, services, database)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
@@ -0,0 +1,79 @@
+import os
+import sys
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+
+from services.embedding_factory import LocalEmbeddingModel
+
+TEXTS = [f"Clause {i}: the supplier shall retain records for {i + 1} years." for i in range(7)]
+
+
+class StubSentenceTransformer:
+	"""Same interface LocalEmbeddingModel uses, with embeddings derived from a hash of each text."""
+
+	DIMENSIONS = 16
+
+	def __init__(self, model_path, **kwargs):
+		self.kwargs = kwargs
+
+	def eval(self):
+		return self
+
+	def get_sentence_embedding_dimension(self):
+		return self.DIMENSIONS
+
+	def tokenize(self, texts):
+		return {"input_ids": torch.tensor([zlib.crc32(text.encode("utf-8")) for text in texts])}
+
+	def __call__(self, features):
+		rows = []
+		for seed in features["input_ids"].tolist():
+			generator = torch.Generator().manual_seed(seed)
+			rows.append(torch.randn(self.DIMENSIONS, generator=generator))
+		return {"sentence_embedding": torch.stack(rows).double()}
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+	monkeypatch.setitem(
+		sys.modules, "sentence_transformers", SimpleNamespace(SentenceTransformer=StubSentenceTransformer)
+	)
+	return LocalEmbeddingModel("/models/stub", batch_size=3, tokenizer_workers=2)
+
+
+def test_embed_returns_normalized_float32_rows(stub_model):
+	matrix = stub_model.embed(TEXTS, 8)
+	assert matrix.shape == (len(TEXTS), 8)
+	assert matrix.dtype == np.float32
+	np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-5)
+
+
+def test_embed_is_deterministic_across_batches(stub_model):
+	matrix = stub_model.embed(TEXTS, 8)
+	np.testing.assert_array_equal(stub_model.embed(TEXTS, 8), matrix)
+	# Rows don't depend on how texts were grouped into batches
+	single = np.vstack([stub_model.embed([text], 8) for text in TEXTS])
+	np.testing.assert_allclose(single, matrix, rtol=1e-6)
+
+
+def test_embed_rejects_more_dimensions_than_the_model(stub_model):
+	with pytest.raises(ValueError):
+		stub_model.embed(TEXTS, StubSentenceTransformer.DIMENSIONS + 1)
+
+
+@pytest.mark.skipif(
+	not os.getenv("LOCAL_EMBEDDING_MODEL_PATH"), reason="LOCAL_EMBEDDING_MODEL_PATH is not set"
+)
+def test_local_model_from_disk():
+	pytest.importorskip("sentence_transformers")
+	model = LocalEmbeddingModel(os.environ["LOCAL_EMBEDDING_MODEL_PATH"], batch_size=4)
+	matrix = model.embed(TEXTS, model.dimensions)
+	assert matrix.shape == (len(TEXTS), model.dimensions)
+	assert matrix.dtype == np.float32
+	np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-4)
+	np.testing.assert_allclose(model.embed(TEXTS, model.dimensions), matrix, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+
+from services.ingest_manifest import IngestManifest
+
+FIRST_SEEN = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _manifest(tmp_path, keys):
+	manifest = IngestManifest(tmp_path / "manifest.json", "final.csv")
+	for key in keys:
+		manifest.record(key, manifest.assign_id(key, f"sha-{key}", now=FIRST_SEEN), f"sha-{key}")
+	return manifest
+
+
+def test_reconcile_forgets_rows_dropped_by_retention(tmp_path):
+	manifest = _manifest(tmp_path, ["a.pdf", "b.pdf", "c.pdf"])
+	kept = manifest.entries["b.pdf"]
+	stored = [(kept.id, "b.pdf", kept.content_sha256)]
+
+	assert manifest.reconcile(stored) == 2
+	diff = manifest.diff({key: f"sha-{key}" for key in ("a.pdf", "b.pdf", "c.pdf")})
+	# Dropped rows are ingested again rather than skipped or deleted
+	assert (sorted(diff.new), diff.unchanged, diff.removed) == (["a.pdf", "c.pdf"], ["b.pdf"], [])
+	assert manifest.assign_id("a.pdf", "sha-a.pdf") != manifest.assign_id("a.pdf", "sha-a.pdf", now=FIRST_SEEN)
+
+
+def test_reconcile_keeps_a_fully_stored_manifest(tmp_path):
+	manifest = _manifest(tmp_path, ["a.pdf", "b.pdf"])
+	stored = [(entry.id, key, entry.content_sha256) for key, entry in manifest.entries.items()]
+	assert manifest.reconcile(stored) == 0
+	assert sorted(manifest.entries) == ["a.pdf", "b.pdf"]
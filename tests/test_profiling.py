@@ -0,0 +1,33 @@
+import pstats
+import threading
+import time
+
+from services.profiling import StackSampler
+
+
+def busy_until_sampled(sampler, timeout=5.0):
+	deadline = time.time() + timeout
+	while sum(sampler.samples.values()) < 5 and time.time() < deadline:
+		sum(i * i for i in range(1000))
+
+
+def test_sampler_writes_collapsed_stacks_and_loadable_pstats(tmp_path):
+	sampler = StackSampler(threading.get_ident(), 0.001)
+	sampler.start()
+	try:
+		busy_until_sampled(sampler)
+	finally:
+		sampler.stop()
+
+	sampler.write_collapsed(tmp_path / "run.collapsed")
+	lines = (tmp_path / "run.collapsed").read_text(encoding="utf-8").splitlines()
+	assert any("busy_until_sampled (test_profiling.py:" in line for line in lines)
+	assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sum(sampler.samples.values())
+
+	sampler.write_pstats(tmp_path / "run.pstats")
+	stats = pstats.Stats(str(tmp_path / "run.pstats"))
+	busy = [key for key in stats.stats if key[2] == "busy_until_sampled"]
+	assert busy
+	cc, nc, tt, ct, callers = stats.stats[busy[0]]
+	assert ct >= tt and ct > 0
+	assert any(caller[2] == "test_sampler_writes_collapsed_stacks_and_loadable_pstats" for caller in callers)
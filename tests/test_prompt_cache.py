@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+from services.llm_factory import LLMFactory
+from services.prompt_cache import FakeCacheBackend, PromptCache
+
+PREFIX = "Evaluate the contract against the compliance rubric. " * 4
+MODEL = "gemini-1.5-pro-002"
+
+
+class Clock:
+	def __init__(self, now: float = 1000.0):
+		self.now = now
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def generate(system_instruction, prompt, **kwargs):
+	return SimpleNamespace(text=f"{len(system_instruction)}:{prompt}")
+
+
+def make_cache(clock, min_chars=0, **kwargs):
+	backend = FakeCacheBackend(generate, min_chars=min_chars, clock=clock)
+	cache = PromptCache(
+		backend, ttl_seconds=100, refresh_margin_seconds=10, retry_after_seconds=50, clock=clock, **kwargs
+	)
+	return backend, cache
+
+
+def test_hit_reuses_the_created_handle():
+	backend, cache = make_cache(Clock())
+	model = cache.model_for(MODEL, PREFIX)
+	assert cache.model_for(MODEL, PREFIX) is model
+	assert model.generate_content("question").text == f"{len(PREFIX)}:question"
+	assert backend.created == 1
+	assert cache.stats()["hits"] == 2
+
+
+def test_handle_is_refreshed_before_it_expires():
+	clock = Clock()
+	backend, cache = make_cache(clock)
+	cache.model_for(MODEL, PREFIX)
+	clock.now += 95  # within the 10 s refresh margin
+	assert cache.model_for(MODEL, PREFIX) is not None
+	assert (backend.created, backend.refreshed) == (1, 1)
+	clock.now += 50  # the refreshed handle is still fresh
+	cache.model_for(MODEL, PREFIX)
+	assert backend.refreshed == 1
+
+
+def test_expired_handle_is_recreated():
+	clock = Clock()
+	backend, cache = make_cache(clock)
+	cache.model_for(MODEL, PREFIX)
+	clock.now += 500
+	model = cache.model_for(MODEL, PREFIX)
+	assert model.generate_content("q").text == f"{len(PREFIX)}:q"
+	assert backend.created == 2
+
+
+def test_create_failure_falls_back_inline_until_retry():
+	clock = Clock()
+	backend, cache = make_cache(clock, min_chars=10 * len(PREFIX))
+	attempts = []
+	create = backend.create
+	backend.create = lambda *args: attempts.append(args) or create(*args)
+
+	assert cache.model_for(MODEL, PREFIX) is None
+	assert cache.model_for(MODEL, PREFIX) is None
+	assert len(attempts) == 1
+	clock.now += 60
+	assert cache.model_for(MODEL, PREFIX) is None
+	assert len(attempts) == 2
+	assert cache.stats()["fallbacks"] == 3
+
+
+def test_short_prefix_and_unsupported_model_skip_the_provider():
+	backend, cache = make_cache(Clock(), min_prefix_chars=len(PREFIX) + 1)
+	assert cache.model_for(MODEL, PREFIX) is None
+	backend.supports = lambda model_name: False
+	cache.min_prefix_chars = 0
+	assert cache.model_for(MODEL, PREFIX) is None
+	assert backend.created == 0
+	assert cache.stats()["fallbacks"] == 0
+
+
+def _factory(cache, inline_prompts):
+	llm = LLMFactory.__new__(LLMFactory)
+	llm.provider = "google_gemini"
+	llm.settings = SimpleNamespace(default_model=MODEL)
+	llm.client = SimpleNamespace(
+		generate_content=lambda prompt, **kwargs: inline_prompts.append(prompt) or SimpleNamespace(text="inline")
+	)
+	llm.prompt_cache = cache
+	return llm
+
+
+def test_llm_factory_sends_only_the_remainder_and_counts_saved_bytes():
+	backend, cache = make_cache(Clock())
+	inline_prompts = []
+	llm = _factory(cache, inline_prompts)
+	messages = [{"role": "system", "content": PREFIX}, {"role": "user", "content": "What is the governing law?"}]
+
+	response = llm._complete(messages, generation_config={})
+	assert response.text == f"{len(PREFIX)}:User: What is the governing law?"
+	assert inline_prompts == []
+	assert cache.stats()["bytes_saved"] == len(f"System: {PREFIX}\n\n".encode("utf-8"))
+
+
+def test_llm_factory_falls_back_inline_when_the_handle_is_gone():
+	backend, cache = make_cache(Clock())
+	inline_prompts = []
+	llm = _factory(cache, inline_prompts)
+	messages = [{"role": "system", "content": PREFIX}, {"role": "user", "content": "q"}]
+	llm._complete(messages, generation_config={})
+
+	backend.prefixes.clear()  # deleted on the provider side
+	assert llm._complete(messages, generation_config={}).text == "inline"
+	assert inline_prompts == [f"System: {PREFIX}\n\nUser: q"]
+	assert cache.stats()["prefixes"] == 0
@@ -0,0 +1,62 @@
+import pytest
+
+from services.query_router import classify
+
+
+def _summary(query):
+	if query is None:
+		return None
+	return (
+		query.kind,
+		query.dimension.name if query.dimension else None,
+		query.filter_dimension.name if query.filter_dimension else None,
+		query.filter_value,
+	)
+
+
+@pytest.mark.parametrize(
+	"question, expected",
+	[
+		("What is the most common exact law?", ("top", "exact_law", None, None)),
+		("What is the most frequently occuring exact law in the dataset?", ("top", "exact_law", None, None)),
+		("Breakdown of contracts by governing law", ("breakdown", "governing_law", None, None)),
+		("How many contracts are governed by Nevada law?", ("count", None, "governing_law", "nevada")),
+		(
+			"How many agreements are governed by the laws of the State of New York?",
+			("count", None, "governing_law", "new york"),
+		),
+		("How many agreements expire in 2015?", ("count", None, "expiration_year", "2015")),
+		("How many contracts are in the dataset?", ("count", None, None, None)),
+		(
+			"What is the most common governing law for agreements signed in 2014?",
+			("top", "governing_law", "effective_year", "2014"),
+		),
+		(
+			"What is the most common expiration year for contracts governed by Delaware law?",
+			("top", "expiration_year", "governing_law", "delaware"),
+		),
+	],
+)
+def test_aggregate_questions(question, expected):
+	assert _summary(classify(question)) == expected
+
+
+@pytest.mark.parametrize(
+	"question",
+	[
+		# "under X" where X isn't a jurisdiction
+		"How many documents should the supplier deliver under the statement of work?",
+		"How many contracts are governed by the master services agreement?",
+		# "law" only as a whole word
+		"What is the most common lawsuit?",
+		"How many contracts mention laws on data protection?",
+		# A year without a date keyword, or a range SQL here can't express
+		"How many contracts are from 2014?",
+		"How many agreements expire before 2015?",
+		# More than one filter
+		"How many contracts signed in 2014 are governed by Texas law?",
+		"Explain the discrepancy of the Affiliate Agreement.pdf",
+	],
+)
+def test_unsupported_qualifiers_fall_back_to_retrieval(question):
+	assert classify(question) is None
@@ -0,0 +1,111 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import database.analysis_store
+import services.analysis as analysis
+import services.llm_factory as llm_factory
+import services.synthesizer as synthesizer
+from services.synthesizer import Synthesizer
+
+SECTION_ANSWER = {
+	"thought_process": ["Found an indemnity clause"],
+	"answer": "Indemnification is mutual.",
+	"enough_context": True,
+	"category_scores": {"Core legal protections": 20},
+}
+
+
+class StubLLM(llm_factory.LLMFactory):
+	"""Answers every section except those in rate_limited, which always get a 429."""
+
+	rate_limited = set()
+
+	def __init__(self, provider, prompt_cache=None):
+		self.provider = provider
+		self.settings = SimpleNamespace(temperature=0.0, max_tokens=256)
+		self.prompt_cache = prompt_cache
+
+	def _generation_config(self, **kwargs):
+		return kwargs
+
+	def _complete(self, messages, generation_config, deadline=None):
+		if any(f"# Contract section {index}:" in messages[1]["content"] for index in self.rate_limited):
+			raise RuntimeError("429 Resource has been exhausted (e.g. check quota)")
+		return SimpleNamespace(text=json.dumps(SECTION_ANSWER))
+
+
+class TextDocument(str):
+	"""Stands in for StreamingDocument: the PDF bytes are the contract text."""
+
+	page_count = extracted_pages = 1
+
+	def __new__(cls, stream):
+		return super().__new__(cls, stream.read().decode("utf-8"))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+	def has_text(self):
+		return bool(self.strip())
+
+	def head(self, num_chars):
+		return self[:num_chars]
+
+
+class FakeStore:
+	def __init__(self):
+		self.puts = []
+
+	def get(self, document_sha256, version):
+		return None
+
+	def put(self, *args):
+		self.puts.append(args)
+
+
+@pytest.fixture
+def rate_limited(monkeypatch):
+	monkeypatch.setattr(synthesizer, "LLMFactory", StubLLM)
+	monkeypatch.setattr(llm_factory.time, "sleep", lambda seconds: None)
+	monkeypatch.setattr(Synthesizer, "dataframe_to_json", staticmethod(lambda context, columns_to_keep: "[]"))
+	monkeypatch.setattr(StubLLM, "rate_limited", {2})
+	return StubLLM.rate_limited
+
+
+def test_rate_limited_section_counts_as_skipped(rate_limited):
+	response = Synthesizer.generate_sectioned_response(["Section one", "Section two", "Section three"], context=None)
+	assert (response.sections, response.sections_skipped) == (2, 1)
+	assert response.category_scores == {"Core legal protections": 20.0}
+	assert "1 section could not be analyzed" in response.answer
+
+
+def test_partial_analysis_is_not_stored(rate_limited, monkeypatch):
+	store = FakeStore()
+	monkeypatch.setattr(analysis, "StreamingDocument", TextDocument)
+	monkeypatch.setattr(analysis, "pipeline_version", lambda: "test")
+	monkeypatch.setattr(database.analysis_store, "get_analysis_store", lambda: store)
+	monkeypatch.setattr(
+		analysis,
+		"get_settings",
+		lambda: SimpleNamespace(
+			analysis_store=SimpleNamespace(enabled=True),
+			latency=SimpleNamespace(analysis_budget_seconds=0),
+			reranker=SimpleNamespace(enabled=False),
+			sections=SimpleNamespace(enabled=True, min_chars=100, section_chars=120, max_sections=10, max_concurrency=2),
+		),
+	)
+	vec = SimpleNamespace(search=lambda text, limit, deadline=None: None)
+	contract = "\n".join(f"{i}. The supplier shall indemnify the customer under clause {i}." for i in range(1, 9))
+
+	result = analysis.analyze_pdf(contract.encode("utf-8"), "contract.pdf", vec)
+	assert result.artifacts["sections"]["skipped"] == 1
+	assert store.puts == []
+
+	rate_limited.clear()
+	analysis.analyze_pdf(contract.encode("utf-8"), "contract.pdf", vec)
+	assert len(store.puts) == 1